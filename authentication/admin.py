@@ -1,3 +1,12 @@
 from django.contrib import admin
+from .models import OutboundEmail
 
-# Register your models here.
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at')
+    # May hold password reset links
+    exclude = ('context',)
+
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from authentication.outbox import BATCH_SIZE, drain_outbox
+
+class Command(BaseCommand):
+    help = 'Render and send queued transactional email, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Emails claimed per batch',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the outbox instead of exiting once it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_outbox(batch_size=options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s), {failed} failed"))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
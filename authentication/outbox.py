@@ -0,0 +1,151 @@
+"""
+Transactional email outbox.
+
+``queue_email`` only inserts an ``OutboundEmail`` row, inside whatever
+transaction the caller is in, so an email exists exactly when the signup or
+reset that caused it commits. ``drain_outbox`` (run by the ``send_outbox``
+command) claims pending rows in batches. It renders their templates, sends
+them all over one reused backend connection and retries failures with
+exponential backoff.
+
+Contexts can hold secrets such as password reset links, so they are
+cleared once an email is sent or given up on.
+
+Workers claim rows by stamping them with a token and pushing
+``next_attempt_at`` out by a lease. Several workers can run at once, and rows
+held by a worker that dies become due again when the lease runs out.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from college_feedback_system.utils.logging import logger
+
+from .models import OutboundEmail
+
+BATCH_SIZE = 50
+LEASE_SECONDS = 5 * 60
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 6 * 60 * 60
+
+
+def queue_email(to_email, subject, template, context=None, user=None):
+    """Add an email to the outbox; ``context`` must be JSON serializable"""
+    return OutboundEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        template=template,
+        context=context or {},
+        user=user,
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the ``attempts``-th failure"""
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Lease up to ``batch_size`` due emails to this worker and return them"""
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Rows another worker claimed in the meantime no longer match
+    due.filter(id__in=ids).update(claimed_by=token, next_attempt_at=now + timedelta(seconds=LEASE_SECONDS))
+    return list(
+        OutboundEmail.objects.filter(claimed_by=token, status=OutboundEmail.PENDING)
+        .select_related('user')
+        .order_by('id')
+    )
+
+
+def render_email(email):
+    context = dict(email.context, user=email.user)
+    html_message = render_to_string(email.template, context)
+    message = EmailMultiAlternatives(
+        email.subject, strip_tags(html_message), settings.DEFAULT_FROM_EMAIL, [email.to_email]
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+class OutboxSender:
+    """Sends claimed emails over one backend connection, reopened only after a failure"""
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection()
+        self.is_open = False
+
+    def send(self, emails):
+        """Send claimed emails; returns (sent, failed) counts"""
+        sent = []
+        failed = 0
+        for email in emails:
+            try:
+                if not self.is_open:
+                    self.connection.open()
+                    self.is_open = True
+                message = render_email(email)
+                message.connection = self.connection
+                message.send()
+            except Exception as e:
+                failed += 1
+                record_failure(email, e)
+                # The connection may be broken; start a fresh one for the next email
+                self.close()
+            else:
+                sent.append(email.id)
+        if sent:
+            OutboundEmail.objects.filter(id__in=sent).update(
+                status=OutboundEmail.SENT, sent_at=timezone.now(), claimed_by='', last_error='', context={}
+            )
+        return len(sent), failed
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.is_open = False
+
+
+def record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.claimed_by = ''
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboundEmail.FAILED
+        email.context = {}
+    else:
+        email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+    email.save(update_fields=['attempts', 'last_error', 'claimed_by', 'status', 'next_attempt_at', 'context'])
+    logger.warning(
+        "outbound_email_failed",
+        email_id=email.id, to=email.to_email, attempts=email.attempts, error=str(error)
+    )
+
+
+def drain_outbox(batch_size=BATCH_SIZE, max_batches=None):
+    """Send every due email, batch by batch, over one connection. Returns (sent, failed)."""
+    sent = failed = batches = 0
+    sender = OutboxSender()
+    try:
+        while max_batches is None or batches < max_batches:
+            emails = claim_batch(batch_size)
+            if not emails:
+                break
+            batch_sent, batch_failed = sender.send(emails)
+            sent += batch_sent
+            failed += batch_failed
+            batches += 1
+    finally:
+        sender.close()
+    return sent, failed
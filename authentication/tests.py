@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .admin import OutboundEmailAdmin
+from .models import OutboundEmail
+from .outbox import MAX_ATTEMPTS, drain_outbox, queue_email
+
+User = get_user_model()
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def register(self):
+        return self.client.post('/auth/api/register/', {
+            'username': 'newstudent',
+            'email': 'new@example.com',
+            'password': 'Str0ng!Passw0rd',
+            'first_name': 'Ada',
+        }, format='json')
+
+    def test_registration_queues_email_instead_of_sending(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.PENDING)
+        self.assertEqual(email.to_email, 'new@example.com')
+
+        output = StringIO()
+        call_command('send_outbox', stdout=output)
+        self.assertIn('Sent 1 email(s)', output.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Welcome to College Feedback System')
+        self.assertIn('Hello Ada', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.SENT)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_password_reset_is_queued(self):
+        User.objects.create_user(email='student@example.com', password='testpass123', user_type='student')
+        response = self.client.post('/auth/api/password-reset/', {'email': 'student@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        self.assertIn('reset_url', OutboundEmail.objects.get().context)
+        self.assertEqual(drain_outbox(), (1, 0))
+        self.assertIn('/auth/api/password-reset/', mail.outbox[0].body)
+        # The reset link isn't kept once sent, nor shown in the admin
+        self.assertEqual(OutboundEmail.objects.get().context, {})
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser(email='staff@example.com', password='testpass123')
+        form = OutboundEmailAdmin(OutboundEmail, admin.site).get_form(request)
+        self.assertNotIn('context', form.base_fields)
+
+    def test_batches_share_one_connection(self):
+        for i in range(5):
+            queue_email(f'user{i}@example.com', 'Hello', 'accounts/welcome_email.html', {'login_url': '/'})
+        with mock.patch('authentication.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(drain_outbox(batch_size=2), (5, 0))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failures_back_off_and_give_up(self):
+        email = queue_email('user@example.com', 'Hello', 'accounts/welcome_email.html', {'login_url': '/'})
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(drain_outbox(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), (OutboundEmail.PENDING, 1, 'down'))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due yet
+            self.assertEqual(drain_outbox(), (0, 0))
+
+            for _ in range(MAX_ATTEMPTS - 1):
+                OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+                drain_outbox()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.FAILED, MAX_ATTEMPTS))
+        self.assertEqual(email.context, {})
+        self.assertEqual(drain_outbox(), (0, 0))
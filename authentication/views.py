@@ -7,8 +7,7 @@ from django.contrib.auth import get_user_model, authenticate, login, logout
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -23,6 +22,10 @@ from college_feedback_system.utils.security import (
 )
 from college_feedback_system.utils.login_tracker import track_login_attempt, get_remaining_attempts
 from college_feedback_system.utils.logging import logger
+from college_feedback_system.utils.ratelimit import rate_limit
+from .outbox import queue_email
+from feedback.models import FeedbackStatusCounter
+from feedback.counters import status_counts
 from .serializers import (
     CustomTokenObtainPairSerializer,
     UserRegistrationSerializer,
@@ -37,38 +40,12 @@ from .forms import LoginForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
-from django.template.loader import render_to_string
 from django.urls import reverse
 import re
 from datetime import datetime, timedelta
 
 User = get_user_model()
 
-# Rate limiting decorator
-def rate_limit(key_prefix, limit=5, period=60):
-    def decorator(view_func):
-        def wrapped_view(request, *args, **kwargs):
-            if request.user.is_authenticated:
-                return view_func(request, *args, **kwargs)
-                
-            ip = request.META.get('REMOTE_ADDR')
-            key = f"{key_prefix}:{ip}"
-            
-            # Get current count
-            count = cache.get(key, 0)
-            
-            if count >= limit:
-                return Response(
-                    {'error': 'Too many attempts. Please try again later.'},
-                    status=status.HTTP_429_TOO_MANY_REQUESTS
-                )
-            
-            # Increment count
-            cache.set(key, count + 1, period)
-            return view_func(request, *args, **kwargs)
-        return wrapped_view
-    return decorator
-
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom token view that uses our custom serializer"""
     serializer_class = CustomTokenObtainPairSerializer
@@ -82,27 +59,12 @@ class UserRegistrationView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            
-            # Send welcome email
-            try:
-                subject = 'Welcome to College Feedback System'
-                html_message = render_to_string('accounts/welcome_email.html', {
-                    'user': user,
+            with transaction.atomic():
+                user = serializer.save()
+                # Welcome email is rendered and sent by the outbox worker
+                queue_email(user.email, 'Welcome to College Feedback System', 'accounts/welcome_email.html', {
                     'login_url': request.build_absolute_uri(reverse('login'))
-                })
-                plain_message = strip_tags(html_message)
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    html_message=html_message,
-                    fail_silently=False
-                )
-            except Exception as e:
-                # Log the error but don't fail the registration
-                print(f"Failed to send welcome email: {str(e)}")
+                }, user=user)
             
             return Response({
                 'message': 'User registered successfully',
@@ -164,26 +126,14 @@ class PasswordResetView(generics.CreateAPIView):
                 
                 # Create reset URL
                 reset_url = request.build_absolute_uri(
-                    reverse('password_reset_confirm', kwargs={'uid': uid, 'token': token})
+                    reverse('api_password_reset_confirm', kwargs={'uid': uid, 'token': token})
                 )
                 
-                # Send reset email
-                subject = 'Password Reset Request'
-                html_message = render_to_string('accounts/password_reset_email.html', {
-                    'user': user,
+                # Reset email is rendered and sent by the outbox worker
+                queue_email(email, 'Password Reset Request', 'accounts/password_reset_email.html', {
                     'reset_url': reset_url,
                     'expiry_hours': 24
-                })
-                plain_message = strip_tags(html_message)
-                
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    html_message=html_message,
-                    fail_silently=False
-                )
+                }, user=user)
                 
                 return Response({
                     'message': 'Password reset email sent successfully'
@@ -425,39 +375,24 @@ def register_view(request):
             first_name = name_parts[0]
             last_name = name_parts[1] if len(name_parts) > 1 else ''
             
-            # Create the user
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
-                first_name=first_name,
-                last_name=last_name,
-                user_type='student'
-            )
+            # Create the user and queue the welcome email together; the
+            # outbox worker renders and sends it
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password,
+                    first_name=first_name,
+                    last_name=last_name,
+                    user_type='student'
+                )
+                queue_email(email, 'Welcome to College Feedback System', 'accounts/welcome_email.html', {
+                    'login_url': request.build_absolute_uri(reverse('login'))
+                }, user=user)
             
             # Log the user in
             login(request, user)
             
-            # Send welcome email
-            try:
-                subject = 'Welcome to College Feedback System'
-                html_message = render_to_string('accounts/welcome_email.html', {
-                    'user': user,
-                    'login_url': request.build_absolute_uri(reverse('login'))
-                })
-                plain_message = strip_tags(html_message)
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    html_message=html_message,
-                    fail_silently=False
-                )
-            except Exception as e:
-                # Log the error but don't fail the registration
-                print(f"Failed to send welcome email: {str(e)}")
-            
             # Redirect to student dashboard
             messages.success(request, 'Registration successful! Welcome to College Feedback System.')
             return redirect('student_dashboard')
@@ -501,16 +436,15 @@ def admin_dashboard(request):
         return redirect('student_dashboard')
     
     # Get feedbacks assigned to this admin
-    feedbacks = request.user.assigned_feedbacks.all().order_by('-created_at')
+    feedbacks = request.user.assigned_feedbacks.select_related('student').order_by('-created_at')
     
-    # Count pending and resolved feedbacks
-    pending_count = feedbacks.filter(status='pending').count()
-    resolved_count = feedbacks.filter(status='resolved').count()
+    # Count pending and resolved feedbacks from the denormalized counters
+    counts = status_counts(request.user, FeedbackStatusCounter.ROLE_ADMIN)
     
     context = {
         'feedbacks': feedbacks,
-        'pending_count': pending_count,
-        'resolved_count': resolved_count
+        'pending_count': counts['pending'],
+        'resolved_count': counts['resolved']
     }
     
     return render(request, 'accounts/admin_dashboard.html', context)
@@ -0,0 +1,295 @@
+"""
+Benchmark: the hot endpoints against 10k, 100k and 1M feedback datasets.
+
+Run from the project root:
+
+    python benchmarks/endpoints.py [--sizes 10k,100k,1m] [--requests 30]
+        [--output results.json] [--baseline previous.json] [--cold]
+
+Each size gets its own SQLite database under benchmarks/data/, filled once
+by ``generate_synthetic_data`` with a fixed seed and reused by later runs,
+so every commit is measured against the same rows. Generating 1M feedback
+takes a while the first time.
+
+Every endpoint is requested in-process through the Django test client, as
+the busiest admin or the busiest student, so the numbers cover the worst
+case of the skewed data. Writes (resolve, logins) are rolled back after each
+request, so the dataset never changes. For each endpoint:
+
+- latency: p50/p95/mean over ``--requests`` timed requests, after warm-up;
+- queries: SQL statements one request runs;
+- peak memory: the most Python memory allocated while serving one request
+  (tracemalloc; measured separately, so it doesn't slow the timed runs).
+
+Results are written as JSON (``--output``, or stdout). ``--baseline``
+compares them with an earlier results file and exits non-zero if any
+endpoint's p95 grew by more than ``--threshold`` or it runs more queries.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_feedback_system.settings')
+
+import django  # noqa: E402
+import structlog  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from feedback.models import Feedback  # noqa: E402
+from feedback.synthetic import DEFAULT_PASSWORD  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SEED = 0
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+WARMUP = 3
+# Requests run under tracemalloc and query capture
+INSTRUMENTED = 3
+# Rate limits would turn repeated logins into 429s
+NO_RATE_LIMITS = {
+    name: {'limit': 10 ** 9, 'period': 60} for name in getattr(settings, 'RATE_LIMIT', {})
+}
+
+# (name, method, path, as, writes): "as" is who is logged in, or whose
+# credentials are posted for logins; {pending} is one of the admin's
+# pending feedback
+ENDPOINTS = [
+    ('api feedback list', 'get', '/api/feedbacks/', 'admin', False),
+    ('api feedback student', 'get', '/api/feedbacks/student/', 'student', False),
+    ('api feedback admin', 'get', '/api/feedbacks/admin/', 'admin', False),
+    ('api feedback resolve', 'put', '/api/feedbacks/{pending}/resolve/', 'admin', True),
+    ('api response list', 'get', '/api/responses/', 'admin', False),
+    ('api admin trends', 'get', '/api/feedbacks/trends/?days=30', 'admin', False),
+    ('web list_feedbacks', 'get', '/', 'admin', False),
+    ('web admin_dashboard', 'get', '/auth/dashboard/admin/', 'admin', False),
+    ('web student_dashboard', 'get', '/auth/dashboard/student/', 'student', False),
+    ('api token login', 'login', '/api/auth/login/', 'student', True),
+    ('api jwt login', 'login', '/auth/api/login/', 'student', True),
+    ('web login', 'form-login', '/auth/login/', 'student', True),
+]
+
+
+def parse_size(label):
+    label = label.strip().lower()
+    if label in SIZES:
+        return label, SIZES[label]
+    return label, int(label)
+
+
+def use_dataset(label, feedback):
+    """Point the default database at the dataset for ``label``, generating it if needed"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f'feedback-{label}-seed{SEED}.sqlite3')
+    marker = path + '.complete'
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    if os.path.exists(marker):
+        # Pick up migrations added since the dataset was generated
+        call_command('migrate', verbosity=0)
+        return
+    if os.path.exists(path):
+        # An interrupted generation
+        os.remove(path)
+    print(f'Generating the {label} dataset in {path}...', file=sys.stderr)
+    call_command('migrate', verbosity=0)
+    call_command(
+        'generate_synthetic_data', seed=SEED, feedback=feedback,
+        students=max(100, feedback // 10), admins=max(10, feedback // 5000),
+        stdout=open(os.devnull, 'w'),
+    )
+    open(marker, 'w').close()
+
+
+def busiest(field):
+    row = (
+        Feedback.objects.values(field).annotate(n=Count('id')).order_by('-n', field).first()
+    )
+    return row[field]
+
+
+def make_request(client, method, path, user):
+    if method == 'login':
+        return client.post(path, {'email': user.email, 'password': DEFAULT_PASSWORD},
+                           content_type='application/json')
+    if method == 'form-login':
+        return client.post(path, {'email': user.email, 'password': DEFAULT_PASSWORD})
+    return getattr(client, method)(path)
+
+
+def serve(client, method, path, user, writes):
+    """One request; writes are rolled back. Returns the response and its size."""
+    if not writes:
+        response = make_request(client, method, path, user)
+    else:
+        with transaction.atomic():
+            response = make_request(client, method, path, user)
+            transaction.set_rollback(True)
+    # Streaming responses only do their work when read
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return response, len(body)
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+
+def measure(client, method, path, user, writes, requests, cold):
+    for _ in range(WARMUP):
+        serve(client, method, path, user, writes)
+
+    timings = []
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        start = time.perf_counter()
+        serve(client, method, path, user, writes)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    queries = peak = 0
+    for _ in range(INSTRUMENTED):
+        if cold:
+            cache.clear()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as captured:
+            response, size = serve(client, method, path, user, writes)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        queries = max(queries, len(captured))
+
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': queries,
+        'peak_memory_kb': round(peak / 1024, 1),
+        'bytes': size,
+    }
+
+
+def run_size(label, feedback, args):
+    use_dataset(label, feedback)
+    User = get_user_model()
+    users = {
+        'admin': User.objects.get(pk=busiest('assigned_admin')),
+        'student': User.objects.get(pk=busiest('student')),
+    }
+    pending = (
+        Feedback.objects.filter(assigned_admin=users['admin'], status=Feedback.PENDING)
+        .order_by('-created_at').values_list('id', flat=True).first()
+    )
+
+    results = []
+    for name, method, path, role, writes in ENDPOINTS:
+        if '{pending}' in path and pending is None:
+            continue
+        client = Client()
+        if method not in ('login', 'form-login'):
+            client.force_login(users[role])
+        path = path.format(pending=pending)
+        result = measure(client, method, path, users[role], writes, args.requests, args.cold)
+        results.append({'size': label, 'feedback': feedback, 'endpoint': name,
+                        'method': method.upper(), 'path': path, **result})
+        print(f"{label:>5} {name:<24} {result['status']:>4} p50 {result['p50_ms']:>9.2f}ms "
+              f"p95 {result['p95_ms']:>9.2f}ms {result['queries']:>4}q "
+              f"{result['peak_memory_kb']:>9.1f}KB", file=sys.stderr)
+    return results
+
+
+def git(*args):
+    try:
+        return subprocess.run(
+            ('git',) + args, cwd=os.path.dirname(DATA_DIR), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print changes against ``baseline`` and return the regressions"""
+    previous = {(row['size'], row['endpoint']): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        old = previous.get((row['size'], row['endpoint']))
+        if old is None:
+            continue
+        change = row['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0
+        regressed = change > threshold or row['queries'] > old['queries']
+        print(f"{row['size']:>5} {row['endpoint']:<24} p95 {change:+7.1%} "
+              f"queries {old['queries']}->{row['queries']}{'  REGRESSION' if regressed else ''}",
+              file=sys.stderr)
+        if regressed:
+            regressions.append(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10k,100k,1m', help='Comma-separated dataset sizes in feedback rows')
+    parser.add_argument('--requests', type=int, default=30, help='Timed requests per endpoint')
+    parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+    parser.add_argument('--output', help='Write JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='p95 growth counted as a regression')
+    args = parser.parse_args()
+
+    # As in production: no per-query logging, and the test client's host allowed
+    settings.DEBUG = False
+    # Request logs are still rendered, but kept out of the JSON on stdout
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(open(os.devnull, 'w')))
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+    results = []
+    with override_settings(RATE_LIMIT=NO_RATE_LIMITS):
+        for label in args.sizes.split(','):
+            results.extend(run_size(*parse_size(label), args))
+
+    report = {
+        'meta': {
+            'commit': git('rev-parse', 'HEAD'),
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': f'{connection.vendor} {connection.Database.sqlite_version}'
+            if connection.vendor == 'sqlite' else connection.vendor,
+            'seed': SEED,
+            'requests': args.requests,
+            'cache': 'cold' if args.cold else 'warm',
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Microbenchmark: lazy InputSanitizationMiddleware against the previous eager one.
+
+Run from the project root:
+
+    python benchmarks/sanitization.py [--number 2000]
+
+Each scenario builds a request with RequestFactory and passes it through the
+middleware to a view that reads what a real view would read. Times are per
+request, best of five runs.
+"""
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import timeit
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_feedback_system.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+
+from college_feedback_system.middleware import InputSanitizationMiddleware  # noqa: E402
+
+
+class LegacyInputSanitizationMiddleware:
+    """The middleware as it was before the lazy rewrite, kept for comparison"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sanitize_patterns = [
+            (r'<script.*?>.*?</script>', ''),
+            (r'<.*?javascript:.*?>', ''),
+            (r'<.*?\son\w+=.*?>', ''),
+        ]
+
+    def __call__(self, request):
+        request.GET = self._sanitize_dict(request.GET)
+        if request.method == 'POST':
+            request.POST = self._sanitize_dict(request.POST)
+        if request.content_type == 'application/json':
+            try:
+                request._body = self._sanitize_json(request.body)
+            except Exception:
+                pass
+        return self.get_response(request)
+
+    def _sanitize_dict(self, data):
+        sanitized = {}
+        for key, value in data.items():
+            if isinstance(value, str):
+                sanitized[key] = self._sanitize_string(value)
+            elif isinstance(value, (list, tuple)):
+                sanitized[key] = [self._sanitize_string(v) if isinstance(v, str) else v for v in value]
+            else:
+                sanitized[key] = value
+        return sanitized
+
+    def _sanitize_string(self, value):
+        value = html.escape(value)
+        for pattern, replacement in self.sanitize_patterns:
+            value = re.sub(pattern, replacement, value, flags=re.IGNORECASE | re.DOTALL)
+        return value
+
+    def _sanitize_json(self, json_data):
+        data = json.loads(json_data)
+        return json.dumps(self._sanitize_dict(data))
+
+
+DESCRIPTION = (
+    "The projector in lecture hall B2 flickers every few minutes and the "
+    "HDMI adapter is missing. Students at the back can't read the slides & "
+    "the lecturer has to restart it twice per class. "
+) * 40  # ~6 KB, a long but realistic feedback description
+
+factory = RequestFactory()
+
+
+def list_page():
+    # Dashboard list: a handful of query parameters, only two read
+    return factory.get('/', {'search': 'projector', 'page': '3', 'status': 'pending', 'sort': '-created_at'})
+
+
+def list_page_view(request):
+    request.GET.get('search')
+    request.GET.get('page')
+
+
+def json_submit():
+    body = json.dumps({
+        'title': 'Projector flickers in B2',
+        'description': DESCRIPTION,
+        'category': 'infrastructure',
+    })
+    return factory.post('/api/feedbacks/', body, content_type='application/json')
+
+
+def json_submit_view(request):
+    json.loads(request.body)
+
+
+def json_unread():
+    # e.g. a request rejected by permissions before the body is parsed
+    return json_submit()
+
+
+def form_submit():
+    body = urlencode({
+        'title': 'Projector flickers in B2',
+        'description': DESCRIPTION,
+        'category': 'infrastructure',
+        'csrfmiddlewaretoken': 'x' * 64,
+    })
+    return factory.post('/submit/', body, content_type='application/x-www-form-urlencoded')
+
+
+def form_submit_view(request):
+    for field in ('title', 'description', 'category'):
+        request.POST.get(field)
+
+
+SCENARIOS = [
+    ('GET list page, 2 of 4 params read', list_page, list_page_view),
+    ('POST JSON feedback, body read', json_submit, json_submit_view),
+    ('POST JSON feedback, body not read', json_unread, lambda request: None),
+    ('POST form feedback, 3 of 4 fields read', form_submit, form_submit_view),
+]
+
+
+def measure(middleware_class, make_request, view, number):
+    middleware = middleware_class(view)
+
+    def run():
+        middleware(make_request())
+    baseline = min(timeit.repeat(make_request, number=number, repeat=5))
+    return (min(timeit.repeat(run, number=number, repeat=5)) - baseline) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--number', type=int, default=2000, help='Requests per timing run')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<42} {'legacy':>10} {'lazy':>10} {'speedup':>8}")
+    for name, make_request, view in SCENARIOS:
+        legacy = measure(LegacyInputSanitizationMiddleware, make_request, view, args.number)
+        lazy = measure(InputSanitizationMiddleware, make_request, view, args.number)
+        print(f"{name:<42} {legacy * 1e6:>8.1f}us {lazy * 1e6:>8.1f}us {legacy / max(lazy, 1e-9):>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
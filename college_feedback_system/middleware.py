@@ -1,148 +1,106 @@
-from django.core.cache import cache
-from django.http import HttpResponseForbidden, JsonResponse
+import time
+from django.http import JsonResponse
 from django.utils import timezone
 from django.conf import settings
-import re
-import html
 from .utils.logging import logger
-import time
+from .utils.querystats import QueryStats
+from .utils.ratelimit import check_request
+from .utils.sanitization import SanitizedJSONStream, SanitizedQueryDict
 from django.utils.deprecation import MiddlewareMixin
 
-class RequestThrottlingMiddleware:
+class QueryInstrumentationMiddleware:
     """
-    Middleware to implement request throttling
+    Middleware measuring each request's SQL: query count, database time and
+    repeated statements, see utils/querystats.py. Sent to the client as a
+    Server-Timing header (``SERVER_TIMING``), added to the request log, and
+    logged as a warning when a request runs more than ``QUERY_BUDGET``
+    queries. Must come first, so middleware queries are counted too.
+
+    Queries a streaming response runs while being sent are not counted.
     """
+
     def __init__(self, get_response):
         self.get_response = get_response
-        self.rate_limit = getattr(settings, 'RATE_LIMIT', 100)  # requests per minute
-        self.rate_window = 60  # 1 minute window
 
     def __call__(self, request):
-        # Skip throttling for admin and documentation URLs
-        if request.path.startswith(('/admin/', '/swagger/', '/redoc/')):
-            return self.get_response(request)
-
-        # Generate cache key based on IP and path
-        ip = request.META.get('REMOTE_ADDR')
-        path = request.path
-        cache_key = f"throttle:{ip}:{path}"
-
-        # Get current request count
-        request_count = cache.get(cache_key, 0)
-
-        # Check if rate limit exceeded
-        if request_count >= self.rate_limit:
+        stats = request.query_stats = QueryStats()
+        start = time.perf_counter()
+        with stats.recording():
+            response = self.get_response(request)
+        duration = (time.perf_counter() - start) * 1000
+
+        if getattr(settings, 'SERVER_TIMING', True):
+            timing = f'{stats.server_timing()}, total;dur={duration:.2f}'
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        budget = getattr(settings, 'QUERY_BUDGET', None)
+        if budget is not None and stats.count > budget:
+            statement, times = stats.most_repeated() or (None, 0)
             logger.warning(
-                "rate_limit_exceeded",
-                ip=ip,
-                path=path,
-                count=request_count
+                "query_budget_exceeded",
+                method=request.method,
+                path=request.path,
+                status_code=response.status_code,
+                duration_ms=round(duration, 2),
+                budget=budget,
+                most_repeated=statement,
+                most_repeated_count=times,
+                **stats.log_fields()
             )
-            return HttpResponseForbidden("Rate limit exceeded. Please try again later.")
+        return response
 
-        # Increment request count
-        cache.set(cache_key, request_count + 1, self.rate_window)
+class RequestThrottlingMiddleware:
+    """
+    Middleware to throttle API requests with the ``api`` rate limit policy
+    """
+    policy = 'api'
 
-        response = self.get_response(request)
-        return response
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Only the API is throttled; admin, docs and pages are not
+        if request.path.startswith('/api/'):
+            limited = check_request(self.policy, request)
+            if limited is not None:
+                return limited
+        return self.get_response(request)
 
 class InputSanitizationMiddleware:
     """
-    Middleware to sanitize user input
+    Middleware to sanitize user input lazily.
+
+    Query and form values are sanitized the first time each key is read and
+    JSON bodies only when the view reads the body. Safe methods never have
+    their body touched and multipart uploads are passed through untouched.
     """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
     def __init__(self, get_response):
         self.get_response = get_response
-        self.sanitize_patterns = [
-            (r'<script.*?>.*?</script>', ''),  # Remove script tags
-            (r'<.*?javascript:.*?>', ''),     # Remove javascript: URLs
-            (r'<.*?\son\w+=.*?>', ''),        # Remove event handlers
-        ]
 
     def __call__(self, request):
-        # Sanitize GET parameters
-        request.GET = self._sanitize_dict(request.GET)
-        
-        # Sanitize POST parameters
-        if request.method == 'POST':
-            request.POST = self._sanitize_dict(request.POST)
-        
-        # Sanitize request body for JSON requests
-        if request.content_type == 'application/json':
-            try:
-                request._body = self._sanitize_json(request.body)
-            except:
-                pass
-
-        response = self.get_response(request)
-        return response
+        # Swapping the class keeps the parsed QueryDict; nothing is copied
+        request.GET.__class__ = SanitizedQueryDict
 
-    def _sanitize_dict(self, data):
-        """
-        Sanitize dictionary values
-        """
-        sanitized = {}
-        for key, value in data.items():
-            if isinstance(value, str):
-                sanitized[key] = self._sanitize_string(value)
-            elif isinstance(value, (list, tuple)):
-                sanitized[key] = [self._sanitize_string(v) if isinstance(v, str) else v for v in value]
-            else:
-                sanitized[key] = value
-        return sanitized
-
-    def _sanitize_string(self, value):
-        """
-        Sanitize string value
-        """
-        # HTML escape
-        value = html.escape(value)
-        
-        # Apply additional sanitization patterns
-        for pattern, replacement in self.sanitize_patterns:
-            value = re.sub(pattern, replacement, value, flags=re.IGNORECASE | re.DOTALL)
-        
-        return value
+        if request.method not in self.SAFE_METHODS:
+            if request.content_type == 'application/x-www-form-urlencoded':
+                request.POST.__class__ = SanitizedQueryDict
+            elif request.content_type == 'application/json' and hasattr(request, '_stream'):
+                request._stream = SanitizedJSONStream(request._stream)
 
-    def _sanitize_json(self, json_data):
-        """
-        Sanitize JSON data
-        """
-        import json
-        data = json.loads(json_data)
-        sanitized = self._sanitize_dict(data)
-        return json.dumps(sanitized)
+        return self.get_response(request)
 
 class BasicSecurityMiddleware(MiddlewareMixin):
     """
     Basic security middleware for the college feedback system.
     Implements:
     - Basic XSS protection
-    - Rate limiting for API requests
+    
+    API rate limiting is handled by RequestThrottlingMiddleware.
     """
     
-    def __init__(self, get_response):
-        self.get_response = get_response
-        self.rate_limit = 60  # requests per minute
-        self.rate_limit_window = 60  # seconds
-        
-    def process_request(self, request):
-        """
-        Process the incoming request.
-        - Check rate limiting
-        """
-        # Skip middleware for admin and static files
-        if request.path.startswith('/admin/') or request.path.startswith('/static/'):
-            return None
-            
-        # Rate limiting for API requests
-        if request.path.startswith('/api/'):
-            ip = self.get_client_ip(request)
-            if not self.check_rate_limit(ip):
-                logger.warning(f"Rate limit exceeded for IP: {ip}")
-                return HttpResponseForbidden("Rate limit exceeded. Try again later.")
-        
-        return None
-        
     def process_response(self, request, response):
         """
         Process the outgoing response.
@@ -154,43 +112,6 @@ class BasicSecurityMiddleware(MiddlewareMixin):
         response['X-Frame-Options'] = 'SAMEORIGIN'
         
         return response
-        
-    def get_client_ip(self, request):
-        """Get the client IP address."""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
-        
-    def check_rate_limit(self, ip):
-        """
-        Check if the IP has exceeded rate limits.
-        Return True if request is allowed, False otherwise.
-        """
-        cache_key = f"rate_limit:{ip}"
-        history = cache.get(cache_key)
-        
-        now = time.time()
-        
-        if history is None:
-            # First request from this IP
-            new_history = [now]
-            cache.set(cache_key, new_history, self.rate_limit_window * 2)
-            return True
-            
-        # Filter out requests older than the window
-        updated_history = [timestamp for timestamp in history if now - timestamp < self.rate_limit_window]
-        
-        # Add current request
-        updated_history.append(now)
-        
-        # Update cache
-        cache.set(cache_key, updated_history, self.rate_limit_window * 2)
-        
-        # Check if rate limit is exceeded
-        return len(updated_history) <= self.rate_limit
 
 class ErrorHandlingMiddleware(MiddlewareMixin):
     """Middleware for handling errors in the application."""
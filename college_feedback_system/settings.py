@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the queries of every other middleware are counted
+    'college_feedback_system.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -157,8 +159,10 @@ REST_FRAMEWORK = {
     ]
 }
 
-# File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
+# File upload settings: image uploads stream to temporary files and are
+# checked and hashed as they arrive, see college_feedback_system/utils/uploads.py.
+# Other requests keep Django's default FILE_UPLOAD_HANDLERS.
+FILE_UPLOAD_MAX_SIZE = 10485760  # 10MB
 
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development, not for production
@@ -173,7 +177,9 @@ EMAIL_HOST_USER = 'your.email@gmail.com'  # Replace with your Gmail address
 EMAIL_HOST_PASSWORD = 'your-app-password'  # Replace with your app password
 DEFAULT_FROM_EMAIL = 'College Feedback System <your.email@gmail.com>'  # Replace with your Gmail address
 
-# Cache settings
+# Cache settings. Response cache generations (utils/caching.py) only reach
+# every worker through a shared backend such as Redis or Memcached;
+# LocMemCache is per process and only suits a single-process deployment.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -181,9 +187,38 @@ CACHES = {
     }
 }
 
-# Rate limiting settings
+# Rate limiting policies, see college_feedback_system/utils/ratelimit.py
 RATE_LIMIT = {
     'login': {'limit': 5, 'period': 60},  # 5 attempts per minute
     'password_reset': {'limit': 3, 'period': 3600},  # 3 attempts per hour
+    'password_reset_confirm': {'limit': 5, 'period': 60},  # 5 attempts per minute
+    'change_password': {'limit': 5, 'period': 60},  # 5 attempts per minute
+    'password_change': {'limit': 5, 'period': 60},  # 5 attempts per minute
     'register': {'limit': 3, 'period': 3600},  # 3 attempts per hour
-}
\ No newline at end of file
+    'web_register': {'limit': 5, 'period': 60},  # 5 page loads or attempts per minute
+    'api': {'limit': 100, 'period': 60},  # 100 API requests per minute
+}
+# Addresses or networks of the reverse proxies in front of the app. Only
+# requests from these have X-Forwarded-For read for the client address.
+RATE_LIMIT_TRUSTED_PROXIES = []
+
+# Deliver notifications from a background thread after commit; False delivers
+# them inline. Events left undelivered are picked up by the next delivery or
+# by manage.py deliver_notifications, see feedback/notifications.py
+NOTIFICATIONS_ASYNC = True
+
+# Each open notification stream holds a worker thread for up to five
+# minutes; a process refuses streams beyond this with 503. Keep it below the
+# server's threads per process, see feedback/events.py
+NOTIFICATION_STREAM_LIMIT = 50
+
+# Thumbnails and previews of uploaded images are generated after commit on a
+# thread pool; False generates them inline, see feedback/images.py
+IMAGE_RENDITIONS_ASYNC = True
+IMAGE_RENDITION_WORKERS = 2
+
+# Per-request SQL instrumentation, see college_feedback_system/middleware.py:
+# a Server-Timing header with query count and database time, and a warning
+# log for requests running more queries than the budget (None disables it)
+SERVER_TIMING = True
+QUERY_BUDGET = 50
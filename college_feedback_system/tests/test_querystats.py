@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from college_feedback_system.middleware import QueryInstrumentationMiddleware
+from college_feedback_system.utils.querystats import query_log_fields
+
+User = get_user_model()
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(email='student@example.com', password='pass12345')
+
+    def run_middleware(self, lookups):
+        def view(request):
+            for pk in lookups:
+                User.objects.filter(pk=pk).exists()
+            return HttpResponse('ok')
+        request = self.factory.get('/feedback/')
+        return request, QueryInstrumentationMiddleware(view)(request)
+
+    def test_counts_queries_and_repeated_statements(self):
+        request, response = self.run_middleware([self.user.pk, self.user.pk + 1, self.user.pk])
+        self.assertEqual(request.query_stats.count, 3)
+        # Parameters are ignored: the same lookup with another pk is a repeat
+        self.assertEqual(request.query_stats.duplicates, 2)
+        self.assertTrue(response['Server-Timing'].startswith('db;desc="3 queries, 2 duplicate";dur='))
+        self.assertIn('total;dur=', response['Server-Timing'])
+        fields = query_log_fields(request)
+        self.assertEqual((fields['db_queries'], fields['db_duplicate_queries']), (3, 2))
+        self.assertGreaterEqual(fields['db_time_ms'], 0)
+
+    def test_header_matches_the_queries_of_a_real_request(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/notifications/')
+        self.assertIn(f'db;desc="{len(queries)} queries', response['Server-Timing'])
+
+    @override_settings(QUERY_BUDGET=2)
+    def test_requests_over_budget_are_logged(self):
+        with mock.patch('college_feedback_system.middleware.logger') as logger:
+            self.run_middleware([self.user.pk, self.user.pk])
+            logger.warning.assert_not_called()
+            self.run_middleware([self.user.pk] * 3)
+        event, fields = logger.warning.call_args.args[0], logger.warning.call_args.kwargs
+        self.assertEqual(event, 'query_budget_exceeded')
+        self.assertEqual((fields['db_queries'], fields['budget'], fields['most_repeated_count']), (3, 2, 3))
+        self.assertIn('SELECT', fields['most_repeated'])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_header_can_be_turned_off(self):
+        _, response = self.run_middleware([self.user.pk])
+        self.assertFalse(response.has_header('Server-Timing'))
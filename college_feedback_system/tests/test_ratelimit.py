@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory, override_settings
+from rest_framework.test import APIClient
+
+from college_feedback_system.middleware import RequestThrottlingMiddleware
+from college_feedback_system.utils.ratelimit import get_client_ip, hit
+
+
+@override_settings(RATE_LIMIT={
+    'login': {'limit': 3, 'period': 60},
+    'api': {'limit': 2, 'period': 60},
+    'burst': {'limit': 10, 'period': 60},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window_weights_previous_window(self):
+        start = 6000.0  # the start of a window
+        for _ in range(10):
+            self.assertTrue(hit('burst', 'client', now=start + 1)[0])
+        self.assertFalse(hit('burst', 'client', now=start + 2)[0])
+
+        # Halfway into the next window about half of the old burst still counts
+        allowed = [hit('burst', 'client', now=start + 90)[0] for _ in range(6)]
+        self.assertEqual(allowed.count(True), 4)
+
+    def test_retry_after_points_past_the_window(self):
+        for _ in range(10):
+            hit('burst', 'client', now=6001.0)
+        allowed, retry_after = hit('burst', 'client', now=6001.0)
+        self.assertFalse(allowed)
+        self.assertGreaterEqual(retry_after, 59)
+        self.assertLessEqual(retry_after, 120)
+        self.assertTrue(hit('burst', 'client', now=6001.0 + retry_after + 1)[0])
+
+    def test_state_is_constant_per_client(self):
+        for second in range(50):
+            hit('burst', 'client', now=6000.0 + second)
+        self.assertIsInstance(cache.get('ratelimit:burst:client:100'), int)
+
+    def test_login_is_limited_with_retry_after(self):
+        client = APIClient()
+        statuses = [
+            client.post('/auth/api/login/', {'email': 'x@example.com', 'password': 'wrong'}).status_code
+            for _ in range(4)
+        ]
+        self.assertNotIn(429, statuses[:3])
+        self.assertEqual(statuses[3], 429)
+        response = client.post('/auth/api/login/', {'email': 'x@example.com', 'password': 'wrong'})
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_middleware_only_limits_the_api(self):
+        middleware = RequestThrottlingMiddleware(lambda request: 'ok')
+        factory = RequestFactory()
+        api = [middleware(factory.get('/api/feedbacks/')) for _ in range(3)]
+        self.assertEqual(api[:2], ['ok', 'ok'])
+        self.assertEqual(api[2].status_code, 429)
+        self.assertEqual(middleware(factory.get('/feedback/')), 'ok')
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        request = RequestFactory().post('/auth/api/login/', REMOTE_ADDR='203.0.113.9', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(get_client_ip(request), '203.0.113.9')
+
+    @override_settings(RATE_LIMIT_TRUSTED_PROXIES=['10.0.0.0/8'])
+    def test_rightmost_untrusted_hop_is_the_client(self):
+        factory = RequestFactory()
+        request = factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='1.2.3.4, 198.51.100.7, 10.0.0.1')
+        self.assertEqual(get_client_ip(request), '198.51.100.7')
+        # Not from a proxy: the header is the client's own
+        request = factory.get('/', REMOTE_ADDR='198.51.100.7', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(get_client_ip(request), '198.51.100.7')
+
+    def test_forged_forwarded_for_does_not_reset_the_login_limit(self):
+        client = APIClient()
+        statuses = [
+            client.post('/auth/api/login/', {'email': 'x@example.com', 'password': 'wrong'},
+                        HTTP_X_FORWARDED_FOR=f'192.0.2.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses[3], 429)
@@ -0,0 +1,64 @@
+import json
+from urllib.parse import urlencode
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, RequestFactory
+
+from college_feedback_system.middleware import InputSanitizationMiddleware
+
+
+class InputSanitizationTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = {}
+
+    def run_middleware(self, request, read):
+        def view(request):
+            self.seen['value'] = read(request)
+            return 'ok'
+        InputSanitizationMiddleware(view)(request)
+        return self.seen['value']
+
+    def test_query_values_are_escaped_on_read(self):
+        request = self.factory.get('/feedback/', {'search': '<b>chairs</b>', 'page': '2'})
+        self.assertEqual(self.run_middleware(request, lambda r: r.GET['search']), '&lt;b&gt;chairs&lt;/b&gt;')
+        # Only the key that was read has been processed
+        self.assertEqual(set(request.GET._sanitized_values), {'search'})
+        self.assertEqual(request.GET.getlist('page'), ['2'])
+        self.assertEqual(request.GET.copy()['search'], '&lt;b&gt;chairs&lt;/b&gt;')
+
+    def test_form_values_are_escaped(self):
+        request = self.factory.post(
+            '/submit/', urlencode({'title': 'a "quote"', 'category': 'academic'}),
+            content_type='application/x-www-form-urlencoded'
+        )
+        title = self.run_middleware(request, lambda r: r.POST['title'])
+        self.assertEqual(title, 'a &quot;quote&quot;')
+        self.assertEqual(request.POST.get('title'), 'a &quot;quote&quot;')
+        self.assertEqual(request.POST.get('missing', 'default'), 'default')
+        self.assertEqual(dict(request.POST.items())['category'], 'academic')
+
+    def test_json_is_only_rewritten_when_read(self):
+        body = json.dumps({'title': '<script>x</script>', 'tags': ['<i>']})
+        request = self.factory.post('/api/feedbacks/', body, content_type='application/json')
+        data = self.run_middleware(request, lambda r: json.loads(r.body))
+        self.assertEqual(data, {'title': '&lt;script&gt;x&lt;/script&gt;', 'tags': ['&lt;i&gt;']})
+
+        untouched = self.factory.post('/api/feedbacks/', body, content_type='application/json')
+        self.run_middleware(untouched, lambda r: None)
+        self.assertIsNone(untouched._stream._buffer)
+
+    def test_only_top_level_json_values_are_escaped(self):
+        body = json.dumps({'title': '<b>', 'meta': {'note': '<i>'}, 'tags': ['<u>', {'x': '<s>'}]})
+        request = self.factory.post('/api/feedbacks/', body, content_type='application/json')
+        data = self.run_middleware(request, lambda r: json.loads(r.body))
+        self.assertEqual(data, {'title': '&lt;b&gt;', 'meta': {'note': '<i>'}, 'tags': ['&lt;u&gt;', {'x': '<s>'}]})
+
+        batch = json.dumps([{'title': '<b>'}])
+        request = self.factory.post('/api/feedbacks/bulk/', batch, content_type='application/json')
+        self.assertEqual(self.run_middleware(request, lambda r: json.loads(r.body)), [{'title': '<b>'}])
+
+    def test_safe_methods_and_uploads_keep_their_body(self):
+        upload = SimpleUploadedFile('photo.png', b'<not really a png>')
+        request = self.factory.post('/submit/', {'title': '<b>', 'photo': upload})
+        self.assertEqual(self.run_middleware(request, lambda r: r.POST['title']), '<b>')
@@ -19,13 +19,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
-from feedback.api_views import FeedbackViewSet, FeedbackResponseViewSet
+from feedback.api_views import FeedbackViewSet, FeedbackResponseViewSet, NotificationViewSet
 from authentication.api_views import CreateUserView, LoginView, LogoutView
 
 # Create a router for our API viewsets
 router = DefaultRouter()
 router.register(r'feedbacks', FeedbackViewSet, basename='feedback')
 router.register(r'responses', FeedbackResponseViewSet, basename='response')
+router.register(r'notifications', NotificationViewSet, basename='notification')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -2,7 +2,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
-from .logging import log_request_response, cache_view
+from .logging import log_request_response
+from .caching import cache_response
 
 class BaseAPIView(APIView):
     """
@@ -43,11 +44,12 @@ class BaseAPIView(APIView):
 
 class CachedAPIView(BaseAPIView):
     """
-    API view with caching support
+    API view with caching support. Entries are invalidated as soon as
+    feedback or responses change, see utils.caching.
     """
     cache_timeout = 60 * 15  # 15 minutes by default
 
-    @cache_view(timeout=cache_timeout)
+    @cache_response(timeout=cache_timeout)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
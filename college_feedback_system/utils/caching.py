@@ -0,0 +1,142 @@
+"""
+Response caching with generation-based invalidation.
+
+Cached entries hold rendered bytes, never ``Response`` objects, and are keyed
+on method, path, query string, negotiated media type, user scope and the
+current generation of every data scope the view reads. Writers call
+``bump_generation`` (the ``Feedback``/``FeedbackResponse`` signal receivers do
+this), which moves every key for that scope at once; stale entries are never
+read again and simply age out.
+
+A missing generation (never set, evicted, or lost in a cache restart) is
+seeded with a random value rather than 0, so it can't land back on a
+generation that old entries were stored under. Generations only invalidate
+across processes when every worker shares one cache backend.
+"""
+import hashlib
+import secrets
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from .logging import logger
+
+GENERATION_KEY = 'cache_generation:{}'
+ENTRY_KEY = 'response_cache:{}'
+
+# Response headers worth replaying from a cached entry
+CACHED_HEADERS = ('Content-Language', 'Vary', 'Allow')
+
+
+def new_generation():
+    return secrets.randbits(48)
+
+
+def get_generations(scopes):
+    """Return the current generation of each scope, in order"""
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    stored = cache.get_many(keys)
+    for key in keys:
+        if key not in stored:
+            # add() keeps whichever process seeded the key first
+            cache.add(key, new_generation(), timeout=None)
+            stored[key] = cache.get(key)
+    return [stored[key] for key in keys]
+
+
+def bump_generation(*scopes):
+    """
+    Invalidate every cached response reading ``scopes``. Bumped again once
+    the surrounding transaction commits, so a response cached between the
+    write and the commit is invalidated too.
+    """
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        # add() is a no-op if the key exists; incr() is atomic on shared caches
+        cache.add(key, new_generation(), timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, new_generation(), timeout=None)
+
+
+def user_scope(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return 'anonymous'
+
+
+def response_cache_key(request, scopes, per_user=True):
+    """Cache key for a DRF request after authentication and negotiation"""
+    parts = [
+        request.method,
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        getattr(request, 'accepted_media_type', '') or request.META.get('HTTP_ACCEPT', ''),
+        user_scope(request) if per_user else 'public',
+    ]
+    parts += [f'{scope}={generation}' for scope, generation in zip(scopes, get_generations(scopes))]
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return ENTRY_KEY.format(digest)
+
+
+def cache_response(timeout=60 * 15, scopes=('feedback',), per_user=True):
+    """
+    Cache successful GET responses of a DRF view method.
+
+    The wrapped handler runs after authentication and content negotiation,
+    so the key can use the real user and media type. A miss renders the
+    response immediately and stores its bytes. Checks made inside the
+    handler are skipped on a hit, so only pass ``per_user=False`` for
+    responses that are the same for everyone allowed to reach the view.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return handler(view, request, *args, **kwargs)
+
+            key = response_cache_key(request, scopes, per_user)
+            entry = cache.get(key)
+            if entry is not None:
+                logger.info("cache_hit", path=request.path)
+                return build_response(entry)
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            if getattr(response, 'accepted_renderer', None) is None and hasattr(response, 'render'):
+                # DRF only renders in finalize_response, so do it now
+                response.accepted_renderer = request.accepted_renderer
+                response.accepted_media_type = request.accepted_media_type
+                response.renderer_context = view.get_renderer_context()
+            if hasattr(response, 'render'):
+                response.render()
+
+            cache.set(key, {
+                'status': response.status_code,
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'headers': {name: response[name] for name in CACHED_HEADERS if response.has_header(name)},
+            }, timeout)
+            logger.info("cache_miss", path=request.path)
+            return response
+        return wrapper
+    return decorator
+
+
+def build_response(entry):
+    response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    return response
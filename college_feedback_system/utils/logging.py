@@ -1,8 +1,9 @@
 import structlog
 from functools import wraps
-from django.core.cache import cache
 from django.conf import settings
 
+from .querystats import query_log_fields
+
 logger = structlog.get_logger()
 
 def log_request_response(logger=logger):
@@ -28,7 +29,8 @@ def log_request_response(logger=logger):
                 logger.info(
                     "response_sent",
                     status_code=response.status_code,
-                    path=request.path
+                    path=request.path,
+                    **query_log_fields(request)
                 )
                 return response
             except Exception as e:
@@ -43,33 +45,6 @@ def log_request_response(logger=logger):
         return wrapper
     return decorator
 
-def cache_view(timeout=60 * 15):  # Default 15 minutes
-    """
-    Decorator to cache view responses
-    """
-    def decorator(view_func):
-        @wraps(view_func)
-        def wrapper(request, *args, **kwargs):
-            # Generate cache key
-            cache_key = f"view_cache:{request.path}:{request.user.id if request.user.is_authenticated else 'anonymous'}"
-            
-            # Try to get from cache
-            response = cache.get(cache_key)
-            if response is not None:
-                logger.info("cache_hit", path=request.path)
-                return response
-
-            # If not in cache, execute view
-            response = view_func(request, *args, **kwargs)
-            
-            # Cache the response
-            cache.set(cache_key, response, timeout)
-            logger.info("cache_miss", path=request.path)
-            
-            return response
-        return wrapper
-    return decorator
-
 def log_model_changes(model_name):
     """
     Decorator to log model changes
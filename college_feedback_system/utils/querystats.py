@@ -0,0 +1,69 @@
+"""
+Per-request SQL statistics.
+
+``QueryStats`` is installed with ``connection.execute_wrapper`` on every
+database connection for the length of a request. It counts statements and
+their total time, and how many repeated SQL already run in the same request.
+Repeats are compared without parameters, so an N+1 loop shows up as one
+statement repeated N times. Nothing is stored per query beyond a count per
+distinct statement, and it works without ``DEBUG``.
+"""
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+# Statements are shortened to this in logs
+STATEMENT_PREVIEW = 200
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Executions that repeated a statement already run"""
+        return self.count - len(self.statements)
+
+    def most_repeated(self):
+        """(statement preview, times run) for the most repeated statement, or None"""
+        if not self.duplicates:
+            return None
+        sql, times = self.statements.most_common(1)[0]
+        return sql[:STATEMENT_PREVIEW], times
+
+    def log_fields(self):
+        return {
+            'db_queries': self.count,
+            'db_time_ms': round(self.duration * 1000, 2),
+            'db_duplicate_queries': self.duplicates,
+        }
+
+    def server_timing(self):
+        return f'db;desc="{self.count} queries, {self.duplicates} duplicate";dur={self.duration * 1000:.2f}'
+
+    def recording(self):
+        """Context manager installing this on every configured connection"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def query_log_fields(request):
+    """The request's query statistics as log fields, if it is being instrumented"""
+    stats = getattr(getattr(request, '_request', request), 'query_stats', None)
+    return stats.log_fields() if stats is not None else {}
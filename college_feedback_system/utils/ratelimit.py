@@ -0,0 +1,149 @@
+"""
+Request rate limiting.
+
+Limits use a sliding-window counter: one cache counter per client for the
+current fixed window plus the previous window's total, weighted by how much
+of it still overlaps the sliding window. Every request is a single atomic
+``cache.incr``, so concurrent requests are never under-counted, and each
+client costs two small integers however busy it is.
+
+Policies are named in ``settings.RATE_LIMIT`` as
+``{'name': {'limit': requests, 'period': seconds}}``.
+
+Anonymous clients are keyed on ``REMOTE_ADDR``. ``X-Forwarded-For`` is
+client-controlled, so it is only read when the connection comes from one of
+``settings.RATE_LIMIT_TRUSTED_PROXIES``.
+"""
+import ipaddress
+import math
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from .logging import logger
+
+DEFAULT_POLICY = {'limit': 5, 'period': 60}
+KEY_FORMAT = 'ratelimit:{policy}:{ident}:{window}'
+
+
+def get_policy(name):
+    """Return (limit, period) for a named policy"""
+    policy = getattr(settings, 'RATE_LIMIT', {}).get(name, DEFAULT_POLICY)
+    return policy['limit'], policy['period']
+
+
+@lru_cache(maxsize=None)
+def proxy_networks(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def is_trusted_proxy(address, networks):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def get_client_ip(request):
+    """
+    The address of the client. Behind trusted proxies this is the rightmost
+    X-Forwarded-For hop that isn't one of them; everything left of it was
+    written by the client and can't be believed.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    networks = proxy_networks(tuple(getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', ())))
+    if not is_trusted_proxy(remote_addr, networks):
+        return remote_addr
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop, networks):
+            return hop
+    return hops[0] if hops else remote_addr
+
+
+def client_ident(request):
+    """Signed-in users are limited per account, everyone else per IP"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{get_client_ip(request)}'
+
+
+def hit(name, ident, now=None):
+    """
+    Count one request against a policy. Returns (allowed, retry_after),
+    where retry_after is the number of seconds until a request would be let
+    through again.
+    """
+    limit, period = get_policy(name)
+    now = time.time() if now is None else now
+    window = int(now // period)
+    key = KEY_FORMAT.format(policy=name, ident=ident, window=window)
+    previous_key = KEY_FORMAT.format(policy=name, ident=ident, window=window - 1)
+
+    # add() only creates the counter; incr() is atomic on shared caches
+    cache.add(key, 0, timeout=period * 2)
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.add(key, 1, timeout=period * 2)
+        current = 1
+    previous = cache.get(previous_key, 0)
+
+    elapsed = (now - window * period) / period
+    if previous * (1 - elapsed) + current <= limit:
+        return True, 0
+    return False, retry_after(limit, period, elapsed, previous, current)
+
+
+def retry_after(limit, period, elapsed, previous, current):
+    """Seconds until one more request would fit under the limit"""
+    if current < limit and previous:
+        # Enough of the previous window slides out before this one ends
+        wait = (1 - (limit - current - 1) / previous) - elapsed
+    else:
+        # This window alone is at the limit; wait for it to slide out too
+        wait = (1 - elapsed) + (1 - (limit - 1) / current)
+    return max(1, math.ceil(wait * period))
+
+
+def too_many_requests(retry_after_seconds):
+    response = JsonResponse(
+        {'error': 'Too many attempts. Please try again later.'},
+        status=429
+    )
+    response['Retry-After'] = str(retry_after_seconds)
+    return response
+
+
+def check_request(name, request):
+    """Return a 429 response if ``request`` is over the policy, else None"""
+    ident = client_ident(request)
+    allowed, wait = hit(name, ident)
+    if allowed:
+        return None
+    logger.warning("rate_limit_exceeded", policy=name, client=ident, path=request.path, retry_after=wait)
+    return too_many_requests(wait)
+
+
+def rate_limit(name):
+    """
+    Limit a view with the named policy. Works on function views and on
+    view methods, and answers 429 with Retry-After once the limit is hit.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(*args, **kwargs):
+            # Function views get the request first, view methods second
+            request = args[0] if hasattr(args[0], 'META') else args[1]
+            limited = check_request(name, request)
+            if limited is not None:
+                return limited
+            return view_func(*args, **kwargs)
+        return wrapped_view
+    return decorator
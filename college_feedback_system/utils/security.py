@@ -4,8 +4,6 @@ from django.utils.html import strip_tags
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-from django.core.mail import send_mail
-from django.conf import settings
 import re
 from .logging import logger
 
@@ -92,43 +90,18 @@ def generate_password_reset_token(user):
 
 def send_password_reset_email(user, reset_url):
     """
-    Send password reset email to user
+    Queue a password reset email for the outbox worker
     """
-    try:
-        subject = 'Password Reset Request'
-        message = f"""
-        Hello {user.first_name},
-
-        You have requested to reset your password. Please click the link below to reset your password:
-
-        {reset_url}
-
-        If you did not request this password reset, please ignore this email.
-
-        Best regards,
-        {settings.SITE_NAME} Team
-        """
-        
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
-        
-        logger.info(
-            "password_reset_email_sent",
-            user=user.email
-        )
-        return True
-    except Exception as e:
-        logger.error(
-            "password_reset_email_failed",
-            error=str(e),
-            user=user.email
-        )
-        return False
+    from authentication.outbox import queue_email
+    queue_email(user.email, 'Password Reset Request', 'emails/password_reset_email.html', {
+        'reset_url': reset_url,
+        'expiry_hours': 24
+    }, user=user)
+    logger.info(
+        "password_reset_email_queued",
+        user=user.email
+    )
+    return True
 
 def validate_reset_token(user, token):
     """
@@ -0,0 +1,129 @@
+"""
+Streaming upload handling.
+
+``StreamingUploadHandler`` writes every uploaded file straight to a temporary
+file chunk by chunk, so a worker holds one chunk of any upload in memory at a
+time, not the whole file. In the same pass it:
+
+- checks the first bytes against the image signatures we accept and rejects
+  anything else before the rest of the body is read;
+- rejects a file as soon as it grows past ``FILE_UPLOAD_MAX_SIZE``;
+- computes a SHA-256 of the content, left on the uploaded file as
+  ``content_hash``.
+
+Rejections raise ``UploadRejected``, which DRF turns into a 400 parse error
+and Django answers with 400 Bad Request.
+
+Only the views that take images use it, via ``streaming_uploads`` or
+``use_streaming_uploads``; every other request keeps Django's default
+``FILE_UPLOAD_HANDLERS``.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.files.uploadhandler import FileUploadHandler
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.http.multipartparser import MultiPartParserError
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .logging import logger
+
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024  # 10MB, as the model validators allow
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the image formats the upload validators accept
+SIGNATURES = {
+    b'\xff\xd8\xff': 'image/jpeg',
+    b'\x89PNG\r\n\x1a\n': 'image/png',
+    b'GIF87a': 'image/gif',
+    b'GIF89a': 'image/gif',
+}
+SIGNATURE_LENGTH = max(len(signature) for signature in SIGNATURES)
+
+
+class UploadRejected(MultiPartParserError, BadRequest):
+    pass
+
+
+def sniff_content_type(header):
+    """The image type ``header`` starts with, or None"""
+    for signature, content_type in SIGNATURES.items():
+        if header.startswith(signature):
+            return content_type
+    return None
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """Spool uploads to disk while validating and hashing them"""
+    chunk_size = CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        # The previous file of this request is complete and no longer ours
+        self.file = None
+        self.max_size = getattr(settings, 'FILE_UPLOAD_MAX_SIZE', DEFAULT_MAX_SIZE)
+        if self.content_length is not None and self.content_length > self.max_size:
+            self.reject('is too large')
+        self.header = b''
+        self.received = 0
+        self.hasher = hashlib.sha256()
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.reject('is too large')
+        if len(self.header) < SIGNATURE_LENGTH:
+            self.header += raw_data[:SIGNATURE_LENGTH - len(self.header)]
+            if len(self.header) >= SIGNATURE_LENGTH and sniff_content_type(self.header) is None:
+                self.reject('is not a JPEG, PNG or GIF image')
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if sniff_content_type(self.header) is None:
+            # Shorter than any signature
+            self.reject('is not a JPEG, PNG or GIF image')
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.hasher.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        self.discard()
+
+    def discard(self):
+        file = getattr(self, 'file', None)
+        if file is not None:
+            # Closing a NamedTemporaryFile deletes it
+            file.close()
+            self.file = None
+
+    def reject(self, reason):
+        self.discard()
+        logger.warning("upload_rejected", field=self.field_name, file=self.file_name, reason=reason)
+        raise UploadRejected(f"Uploaded file '{self.file_name}' {reason}.")
+
+
+def use_streaming_uploads(request):
+    """Parse this request's files with StreamingUploadHandler; must run before the body is read"""
+    request.upload_handlers = [StreamingUploadHandler(request)]
+
+
+def streaming_uploads(view):
+    """
+    Decorate an image upload view to use StreamingUploadHandler. The CSRF
+    check reads the body, so it is moved inside, after the handlers are set.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        use_streaming_uploads(request)
+        return protected(request, *args, **kwargs)
+    return wrapped
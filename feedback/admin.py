@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db.models import Q
 from .models import FeedbackCategory, Feedback, FeedbackComment
+from .search import search_filter, fts_enabled
+from .bulk import change_status
 
 class FeedbackCommentInline(admin.TabularInline):
     model = FeedbackComment
@@ -10,9 +13,35 @@ class FeedbackCommentInline(admin.TabularInline):
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'student', 'status', 'created_at')
     list_filter = ('status', 'category', 'created_at')
+    list_select_related = ('student',)
     search_fields = ('title', 'description', 'student__email')
     readonly_fields = ('created_at',)
     inlines = [FeedbackCommentInline]
+    actions = ['mark_resolved', 'mark_pending']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE scans over search_fields
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        queryset = queryset.filter(
+            search_filter(search_term, queryset.db) |
+            Q(student__email__iexact=search_term.strip())
+        )
+        return queryset, not fts_enabled(queryset.db)
+
+    def save_model(self, request, obj, form, change):
+        # The staff member making the change isn't notified about it
+        obj.save(changed_by=request.user)
+
+    @admin.action(description='Mark selected feedback as resolved')
+    def mark_resolved(self, request, queryset):
+        changed = change_status(queryset, Feedback.RESOLVED, request.user)
+        self.message_user(request, f"{len(changed)} feedback marked as resolved.")
+
+    @admin.action(description='Mark selected feedback as pending')
+    def mark_pending(self, request, queryset):
+        changed = change_status(queryset, Feedback.PENDING, request.user)
+        self.message_user(request, f"{len(changed)} feedback marked as pending.")
 
 class FeedbackCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'description')
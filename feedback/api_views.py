@@ -1,10 +1,38 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Feedback, FeedbackResponse
-from .serializers import FeedbackSerializer, FeedbackResponseSerializer
+from rest_framework.parsers import JSONParser
+from .models import Feedback, FeedbackResponse, Notification
+from .serializers import (
+    FeedbackSerializer, FeedbackResponseSerializer, BulkStatusSerializer, NotificationSerializer,
+    MarkReadSerializer, ExportQuerySerializer
+)
+from .notifications import mark_read, unread_count
+from .events import (
+    EventStreamRenderer, StreamTicketAuthentication, broadcaster, event_stream, issue_stream_ticket,
+    parse_last_event_id, RETRY_MILLISECONDS, STREAM_TICKET_SECONDS
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, StreamingHttpResponse
+from .pagination import FeedbackCursorPagination
+from .search import search_feedback, attach_snippets
+from .rollups import GRANULARITIES, feedback_trends
+from .parsers import NDJSONParser
+from .bulk import ingest_feedback, change_status, MAX_BATCH_SIZE
+from .export import FORMATS as EXPORT_FORMATS, export_feedback, export_filename
+from .models import CACHE_SCOPE, FeedbackStatusCounter, FeedbackTrendRollup
+from .counters import status_counts
+from college_feedback_system.utils.caching import cache_response
+from college_feedback_system.utils.uploads import use_streaming_uploads
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from datetime import timedelta
+from functools import partial
+from django.db.models import Max, Q
+import hashlib
 
 class IsOwnerOrAdmin(permissions.BasePermission):
     """
@@ -16,31 +44,134 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         
         # Check if the object has a student attribute (Feedback model)
-        if hasattr(obj, 'student'):
-            return obj.student == request.user
+        if hasattr(obj, 'student_id'):
+            return obj.student_id == request.user.pk
         
         # Check if the object has a responder attribute (FeedbackResponse model)
-        if hasattr(obj, 'responder'):
-            return obj.responder == request.user
+        if hasattr(obj, 'responder_id'):
+            return obj.responder_id == request.user.pk
         
         return False
 
-class FeedbackViewSet(viewsets.ModelViewSet):
+class SparseFieldsetViewMixin:
+    """
+    Loads only the columns behind the fields a read request asked for with
+    ?fields= and ?expand=, joining the related users those fields render.
+    """
+    # Columns needed whatever is rendered: pagination and permission checks
+    always_loaded = ('id',)
+    
+    def sparse_queryset(self, queryset):
+        columns, related = self.get_serializer_class().sparse_columns(self.request)
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        if columns is not None:
+            queryset = queryset.only(*self.always_loaded, *columns)
+        return queryset
+
+
+class StreamingUploadMixin:
+    """Parse uploads with StreamingUploadHandler, for views that take images"""
+    def initialize_request(self, request, *args, **kwargs):
+        use_streaming_uploads(request)
+        return super().initialize_request(request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since with 304 before anything is
+    serialized. The validators are read from the database: max(updated_at)
+    over the scoped queryset plus a row total, so edits, additions and
+    removals all change the ETag. Last-Modified alone can't see a removal
+    that leaves the newest row in place; clients that send If-None-Match
+    are answered from the ETag, which takes precedence.
+    """
+    def get_validators(self, queryset, total=None):
+        latest = queryset.order_by().aggregate(latest=Max('updated_at'))['latest']
+        return latest, total
+    
+    def make_etag(self, latest, total):
+        # Same rows render differently per user, query string and format
+        key = '|'.join([
+            str(self.request.user.pk),
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT', ''),
+            latest.isoformat() if latest else '',
+            '' if total is None else str(total),
+        ])
+        return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+    
+    def conditional_response(self, queryset, render, total=None):
+        """Return 304 if the client's copy is current, otherwise render()"""
+        if self.request.query_params.get('search'):
+            # Matches also depend on comments and responses
+            return render()
+        
+        latest, total = self.get_validators(queryset, total)
+        etag = self.make_etag(latest, total)
+        last_modified = int(latest.timestamp()) if latest else None
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Let clients keep a copy but always revalidate it
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+class FeedbackViewSet(StreamingUploadMixin, ConditionalGetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing feedback instances.
     """
     serializer_class = FeedbackSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+    pagination_class = FeedbackCursorPagination
+    always_loaded = ('id', 'created_at', 'student', 'assigned_admin')
     
     def get_queryset(self):
         user = self.request.user
+        # Users rendered for every row are joined in the same query
+        queryset = self.sparse_queryset(Feedback.objects.all())
         
         # Admins can see all feedback assigned to them
         if user.user_type == 'admin':
-            return Feedback.objects.filter(assigned_admin=user)
-        
+            queryset = queryset.filter(assigned_admin=user)
         # Students can only see their own feedback
-        return Feedback.objects.filter(student=user)
+        else:
+            queryset = queryset.filter(student=user)
+        
+        # Ranked full-text search over title, description, comments and responses
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_feedback(queryset, search)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # The row total comes from the owner's status counters, not a COUNT(*)
+        if request.user.user_type == 'admin':
+            role = FeedbackStatusCounter.ROLE_ADMIN
+        else:
+            role = FeedbackStatusCounter.ROLE_STUDENT
+        total = status_counts(request.user, role)['total']
+        return self.conditional_response(queryset, partial(super().list, request, *args, **kwargs), total)
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_queryset().filter(pk=kwargs[self.lookup_field])
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        return self.conditional_response(queryset, partial(super().retrieve, request, *args, **kwargs))
+    
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        search = self.request.query_params.get('search')
+        if page is not None and search:
+            # Highlighted excerpts are only built for the rows on this page
+            page = attach_snippets(page, search)
+        return page
     
     @action(detail=False, methods=['get'])
     def student(self, request):
@@ -53,9 +184,7 @@ class FeedbackViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        feedbacks = Feedback.objects.filter(student=request.user)
-        serializer = self.get_serializer(feedbacks, many=True)
-        return Response(serializer.data)
+        return self.list(request)
     
     @action(detail=False, methods=['get'])
     def admin(self, request):
@@ -68,9 +197,130 @@ class FeedbackViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        feedbacks = Feedback.objects.filter(assigned_admin=request.user)
-        serializer = self.get_serializer(feedbacks, many=True)
-        return Response(serializer.data)
+        return self.list(request)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Action to submit many feedback at once, as a JSON array or as NDJSON
+        (one object per line). Students submit as themselves; admins importing
+        on behalf of students give each item a student_email. Valid items are
+        created even if others fail; each gets a result in request order.
+        """
+        results = ingest_feedback(request.data, request.user)
+        created = sum(1 for result in results if 'id' in result)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results,
+        }, status=response_status)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Action to move many assigned feedback to a new status at once. Takes
+        {"status", "ids": [...]} or {"status", "filter": {...}}; a filter
+        matching more than one batch is worked off oldest first and reports
+        has_more until it is drained.
+        """
+        if request.user.user_type != 'admin':
+            return Response(
+                {"detail": "Only admins can change feedback status"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        
+        # Only feedback assigned to this admin can be changed
+        queryset = serializer.filter_queryset(Feedback.objects.filter(assigned_admin=request.user))
+        changed = change_status(
+            queryset, new_status, request.user,
+            notes=serializer.validated_data['notes']
+        )
+        has_more = len(changed) == MAX_BATCH_SIZE and queryset.exclude(status=new_status).exists()
+        return Response({
+            'status': new_status,
+            'updated': len(changed),
+            'ids': changed,
+            'has_more': has_more,
+        })
+    
+    @action(detail=False, methods=['get'])
+    @cache_response(scopes=(CACHE_SCOPE,))
+    def trends(self, request):
+        """
+        Action to get feedback counts over time from the rollup tables.
+        Accepts ?days=, ?granularity=hour|day|week|month, ?event=, ?category=
+        and ?status=.
+        """
+        if request.user.user_type != 'admin':
+            return Response(
+                {"detail": "Only admins can access this endpoint"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            days = 0
+        granularity = request.query_params.get('granularity', 'day')
+        event = request.query_params.get('event', FeedbackTrendRollup.CREATED)
+        
+        if not 1 <= days <= 3660:
+            return Response({"detail": "days must be between 1 and 3660"}, status=status.HTTP_400_BAD_REQUEST)
+        if granularity not in GRANULARITIES:
+            return Response(
+                {"detail": f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if event not in dict(FeedbackTrendRollup.EVENT_CHOICES):
+            return Response({"detail": "Invalid event"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        end = timezone.now()
+        trends = feedback_trends(
+            end - timedelta(days=days), end,
+            granularity=granularity,
+            event=event,
+            category=request.query_params.get('category'),
+            status=request.query_params.get('status'),
+        )
+        return Response(trends)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Action to download the admin's assigned feedback, with responses,
+        comments and history, as a streamed file. Accepts ?output=csv|ndjson,
+        ?gzip=true and the bulk-status filters (?status=, ?category=,
+        ?created_after=, ?created_before=).
+        """
+        if request.user.user_type != 'admin':
+            return Response(
+                {"detail": "Only admins can export feedback"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = ExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        output = serializer.validated_data['output']
+        gzip = serializer.validated_data['gzip']
+        
+        queryset = serializer.filter_queryset(Feedback.objects.filter(assigned_admin=request.user))
+        response = StreamingHttpResponse(
+            export_feedback(queryset, output, gzip),
+            content_type='application/gzip' if gzip else EXPORT_FORMATS[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(output, gzip)}"'
+        response['Cache-Control'] = 'no-store'
+        return response
     
     @action(detail=True, methods=['put'])
     def resolve(self, request, pk=None):
@@ -93,33 +343,110 @@ class FeedbackViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Mark as resolved
-        feedback.status = Feedback.RESOLVED
-        feedback.resolved_at = timezone.now()
-        feedback.save()
+        # Mark as resolved, recording the change in the feedback history
+        change_status(Feedback.objects.filter(pk=feedback.pk), Feedback.RESOLVED, request.user)
+        feedback.refresh_from_db()
         
         serializer = self.get_serializer(feedback)
         return Response(serializer.data)
 
-class FeedbackResponseViewSet(viewsets.ModelViewSet):
+class FeedbackResponseViewSet(StreamingUploadMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing feedback response instances.
     """
     serializer_class = FeedbackResponseSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+    always_loaded = ('id', 'feedback', 'responder')
     
     def get_queryset(self):
         user = self.request.user
+        # Users rendered for every row are joined in the same query
+        queryset = self.sparse_queryset(FeedbackResponse.objects.all())
         
         if user.user_type == 'admin':
-            # Admins can see all responses to feedback assigned to them
-            return FeedbackResponse.objects.filter(
-                Q(feedback__assigned_admin=user) | 
+            # Admins can see all responses to feedback assigned to them.
+            # The subquery keeps both sides of the OR on their own index.
+            assigned = Feedback.objects.filter(assigned_admin=user).values('id')
+            return queryset.filter(
+                Q(feedback__in=assigned) | 
                 Q(responder=user)
             )
         
         # Students can see all responses to their feedback
-        return FeedbackResponse.objects.filter(
+        return queryset.filter(
             Q(feedback__student=user) & 
             Q(is_internal=False)  # Don't show internal responses to students
-        ) 
\ No newline at end of file
+        )
+    
+    @cache_response(scopes=(CACHE_SCOPE,))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The signed-in user's notifications, newest first. ?unread=true limits
+    the list to unread ones.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedbackCursorPagination
+    
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+    
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """Action to get the unread badge count"""
+        return Response({'unread': unread_count(request.user.pk)})
+    
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """
+        Action to mark notifications read with one UPDATE. Takes
+        {"all": true}, {"up_to": id} or {"ids": [...]}.
+        """
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = mark_read(
+            request.user,
+            ids=serializer.validated_data.get('ids'),
+            up_to=serializer.validated_data.get('up_to'),
+        )
+        return Response({'marked': marked, 'unread': unread_count(request.user.pk)})
+    
+    @action(detail=False, methods=['post'], url_path='stream-ticket')
+    def stream_ticket(self, request):
+        """Action to get a single-use ticket for opening the event stream"""
+        return Response({'ticket': issue_stream_ticket(request.user), 'expires_in': STREAM_TICKET_SECONDS})
+    
+    @action(
+        detail=False, methods=['get'],
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+        authentication_classes=[StreamTicketAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    def stream(self, request):
+        """
+        Action to stream the user's new notifications as Server-Sent Events.
+        Resumes after the Last-Event-ID header (or ?last_event_id=).
+        """
+        if not broadcaster.has_capacity():
+            response = Response(
+                {"detail": "Too many open notification streams, try again later"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = str(RETRY_MILLISECONDS // 1000)
+            return response
+        last_event_id = parse_last_event_id(
+            request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('last_event_id')
+        )
+        response = StreamingHttpResponse(
+            event_stream(request.user.pk, last_event_id), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,127 @@
+"""
+Admin auto-assignment.
+
+``AdminLoad`` keeps one row per admin with the number of pending feedback
+currently assigned to them. New feedback goes to the active admin with the
+fewest open items; ties go to whoever was assigned least recently. The pick is
+a single ``ORDER BY ... LIMIT 1`` read on the partial (open_count,
+last_assigned_at, admin) index of active admins, so it costs O(log n) in the
+number of admins.
+
+``open_count`` is maintained by ``feedback.counters.apply_deltas`` from the
+same transitions that drive the status counters, so it follows reassignment,
+resolution and deletion as well as new submissions.
+
+Concurrent submissions are kept apart by claiming the chosen row with a
+compare-and-set on ``open_count``: the claim only succeeds if the load is
+still what was read. The feedback must then be saved in the same transaction
+(``assign_admin`` does both), which bumps ``open_count`` and makes any racing
+claim on the same row miss and pick again.
+"""
+import heapq
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import AdminLoad, Feedback
+
+# Claims lost to concurrent submissions before settling for the last pick
+MAX_CLAIM_ATTEMPTS = 5
+
+
+def pick_admin(using='default'):
+    """
+    Claim the least-loaded active admin and return their id, or None when
+    there is no active admin. Must run inside the transaction that saves the
+    assigned feedback.
+    """
+    loads = AdminLoad.objects.using(using)
+    admin_id = None
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        candidate = (
+            loads.filter(is_active=True)
+            .order_by('open_count', 'last_assigned_at', 'admin_id')
+            .values_list('admin_id', 'open_count')
+            .first()
+        )
+        if candidate is None:
+            return None
+        admin_id, open_count = candidate
+        claimed = loads.filter(
+            admin_id=admin_id, open_count=open_count, is_active=True
+        ).update(last_assigned_at=timezone.now())
+        if claimed:
+            return admin_id
+    return admin_id
+
+
+def pick_admins(count, using='default'):
+    """
+    Claim admins for ``count`` new feedback at once and return their ids in
+    assignment order, spreading the batch so loads end up as even as
+    possible. Only the ``count`` least-loaded admins can receive any of it,
+    so only they are read. Same transaction rules as ``pick_admin``.
+    """
+    if count <= 0:
+        return []
+    loads = AdminLoad.objects.using(using)
+    picks = [None] * count
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        candidates = list(
+            loads.filter(is_active=True)
+            .order_by('open_count', 'last_assigned_at', 'admin_id')
+            .values_list('admin_id', 'open_count')[:count]
+        )
+        if not candidates:
+            return picks
+
+        # (load, turn, admin): an admin that just received an item queues
+        # behind others with the same load, as last_assigned_at does
+        heap = [(open_count, turn, admin_id) for turn, (admin_id, open_count) in enumerate(candidates)]
+        heapq.heapify(heap)
+        for index in range(count):
+            open_count, _, admin_id = heapq.heappop(heap)
+            picks[index] = admin_id
+            heapq.heappush(heap, (open_count + 1, len(candidates) + index, admin_id))
+
+        now = timezone.now()
+        picked = set(picks)
+        claimed = all(
+            loads.filter(admin_id=admin_id, open_count=open_count, is_active=True)
+            .update(last_assigned_at=now)
+            for admin_id, open_count in candidates
+            if admin_id in picked
+        )
+        if claimed:
+            return picks
+    return picks
+
+
+def assign_admin(feedback, using='default'):
+    """Assign the least-loaded admin to an unsaved feedback and save it"""
+    with transaction.atomic(using=using):
+        feedback.assigned_admin_id = pick_admin(using)
+        feedback.save(using=using)
+    return feedback
+
+
+def rebuild_admin_loads(using='default'):
+    """Recompute every admin's open count from the feedback table"""
+    open_counts = dict(
+        Feedback.objects.using(using)
+        .filter(status=Feedback.PENDING, assigned_admin__isnull=False)
+        .values('assigned_admin')
+        .annotate(n=Count('id'))
+        .values_list('assigned_admin', 'n')
+    )
+    with transaction.atomic(using=using):
+        for load in AdminLoad.objects.using(using).select_for_update():
+            count = open_counts.pop(load.admin_id, 0)
+            if load.open_count != count:
+                AdminLoad.objects.using(using).filter(pk=load.pk).update(open_count=count)
+        for admin_id, count in open_counts.items():
+            AdminLoad.objects.using(using).update_or_create(
+                admin_id=admin_id, defaults={'open_count': count}
+            )
+    return AdminLoad.objects.using(using).count()
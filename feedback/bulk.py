@@ -0,0 +1,178 @@
+"""
+Batch feedback writes.
+
+Ingestion validates a whole batch up front, assigns admins with one
+``pick_admins`` call and writes every valid row with ``bulk_create`` in a
+single transaction. Status changes lock the affected rows, move them with one
+conditional UPDATE and record ``FeedbackHistory`` with ``bulk_create``.
+
+Both bypass ``Feedback.save()``, so the status counters, admin loads, trend
+rollups, response cache generation and notifications are handled here once
+per batch. The full-text index is kept in sync by its database triggers.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from college_feedback_system.utils.caching import bump_generation
+
+from .assignment import pick_admins
+from .counters import apply_deltas, counter_state, transition_deltas
+from .models import CACHE_SCOPE, Feedback, FeedbackHistory, FeedbackTrendRollup
+from .notifications import CREATED, STATUS_CHANGED, NotificationEvent, publish
+from .rollups import record_event_counts
+
+User = get_user_model()
+
+MAX_BATCH_SIZE = 5000
+INSERT_BATCH_SIZE = 500
+
+
+class FeedbackBulkItemSerializer(serializers.ModelSerializer):
+    """One feedback in a batch; admins importing for students name them by email"""
+    student_email = serializers.EmailField(required=False)
+
+    class Meta:
+        model = Feedback
+        fields = ['title', 'description', 'category', 'student_email']
+
+
+def ingest_feedback(items, user, using='default'):
+    """
+    Create feedback for every valid item and return one result per item, in
+    order: ``{'index', 'id', 'assigned_admin'}`` or ``{'index', 'errors'}``.
+    """
+    if not isinstance(items, list) or not items:
+        raise serializers.ValidationError('Expected a non-empty list of feedback items.')
+    if len(items) > MAX_BATCH_SIZE:
+        raise serializers.ValidationError(f'A batch may hold at most {MAX_BATCH_SIZE} items.')
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = FeedbackBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'errors': serializer.errors}
+
+    feedbacks = []
+    students = resolve_students(valid, user, using)
+    for index, data in valid:
+        student = students.get(data.get('student_email'))
+        if student is None:
+            message = 'Unknown student.' if data.get('student_email') else 'This field is required.'
+            results[index] = {'index': index, 'errors': {'student_email': [message]}}
+            continue
+        feedbacks.append((index, Feedback(
+            title=data['title'],
+            description=data.get('description', ''),
+            category=data['category'],
+            student_id=student,
+        )))
+
+    if feedbacks:
+        create_feedback([feedback for _, feedback in feedbacks], using, changed_by=user)
+    for index, feedback in feedbacks:
+        results[index] = {'index': index, 'id': feedback.id, 'assigned_admin': feedback.assigned_admin_id}
+    return results
+
+
+def resolve_students(valid, user, using='default'):
+    """
+    Map each item's ``student_email`` to a student id with one query.
+    Students always submit as themselves; the ``None`` key is the requester.
+    """
+    if user.user_type != 'admin':
+        return {email: user.pk for email in {data.get('student_email') for _, data in valid}}
+
+    emails = {data['student_email'] for _, data in valid if data.get('student_email')}
+    return dict(
+        User.objects.using(using)
+        .filter(email__in=emails, user_type='student')
+        .values_list('email', 'pk')
+    ) if emails else {}
+
+
+def create_feedback(feedbacks, using='default', changed_by=None):
+    """
+    Assign, insert and count a list of unsaved feedback in one transaction.
+    ``changed_by`` isn't notified; by default each feedback's student.
+    """
+    with transaction.atomic(using=using):
+        for feedback, admin_id in zip(feedbacks, pick_admins(len(feedbacks), using)):
+            feedback.assigned_admin_id = admin_id
+        Feedback.objects.using(using).bulk_create(feedbacks, batch_size=INSERT_BATCH_SIZE)
+
+        deltas = Counter()
+        events = Counter()
+        for feedback in feedbacks:
+            deltas.update(transition_deltas(None, counter_state(feedback)))
+            events[(FeedbackTrendRollup.CREATED, feedback.created_at, feedback.category, feedback.status)] += 1
+        apply_deltas(deltas, using=using)
+        record_event_counts(events, using=using)
+        bump_generation(CACHE_SCOPE)
+        publish((
+            NotificationEvent(CREATED, feedback.pk, changed_by.pk if changed_by else feedback.student_id)
+            for feedback in feedbacks
+        ), using=using)
+    return feedbacks
+
+
+def change_status(queryset, new_status, changed_by, notes='', limit=MAX_BATCH_SIZE):
+    """
+    Move up to ``limit`` feedback in ``queryset`` (oldest first) to
+    ``new_status`` and return the ids that actually changed. Rows already in
+    that status are left alone and get no history.
+    """
+    using = queryset.db
+    with transaction.atomic(using=using):
+        rows = list(
+            queryset.exclude(status=new_status)
+            .select_for_update()
+            .order_by('created_at', 'id')
+            .values_list('id', *Feedback.COUNTED_FIELDS)[:limit]
+        )
+        if not rows:
+            return []
+
+        ids = [row[0] for row in rows]
+        now = timezone.now()
+        Feedback.objects.using(using).filter(id__in=ids).exclude(status=new_status).update(
+            status=new_status,
+            resolved_at=now if new_status == Feedback.RESOLVED else None,
+            updated_at=now,
+        )
+
+        FeedbackHistory.objects.using(using).bulk_create([
+            FeedbackHistory(
+                feedback_id=feedback_id,
+                changed_by=changed_by,
+                old_status=old_status,
+                new_status=new_status,
+                old_assigned_to_id=admin_id,
+                new_assigned_to_id=admin_id,
+                notes=notes,
+            )
+            for feedback_id, _, admin_id, old_status, _ in rows
+        ], batch_size=INSERT_BATCH_SIZE)
+
+        deltas = Counter()
+        events = Counter()
+        for _, student_id, admin_id, old_status, category in rows:
+            deltas.update(transition_deltas(
+                (student_id, admin_id, old_status, category),
+                (student_id, admin_id, new_status, category),
+            ))
+            events[(FeedbackTrendRollup.STATUS_CHANGED, now, category, new_status)] += 1
+        apply_deltas(deltas, using=using)
+        record_event_counts(events, using=using)
+        bump_generation(CACHE_SCOPE)
+        publish(
+            (NotificationEvent(STATUS_CHANGED, feedback_id, changed_by.pk, status=new_status) for feedback_id in ids),
+            using=using,
+        )
+    return ids
@@ -0,0 +1,22 @@
+from django.core.checks import Error, Tags, register
+
+from .search import FTS_TABLE, missing_sync_triggers
+
+
+@register(Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """Report FTS sync triggers dropped by a rebuild of their table"""
+    errors = []
+    for alias in databases or []:
+        missing = missing_sync_triggers(alias)
+        if missing:
+            errors.append(Error(
+                f'{FTS_TABLE} is missing its sync triggers on database {alias!r}: {", ".join(missing)}.',
+                hint=(
+                    'A migration rebuilt the table they were attached to. Re-create them '
+                    'in that migration (see feedback/migrations/0004_feedback_search_fts.py) '
+                    'and reindex the affected rows.'
+                ),
+                id='feedback.E001',
+            ))
+    return errors
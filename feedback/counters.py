@@ -0,0 +1,174 @@
+"""
+Denormalized feedback status counters.
+
+``FeedbackStatusCounter`` holds one row per (owner, role, status, category)
+so dashboards can read their totals with a single indexed lookup instead of
+running a COUNT(*) per status. Every feedback is counted three times: for its
+student, for its assigned admin and in the global ``all`` scope (owner NULL).
+
+``Feedback.save()`` and the ``post_delete`` receiver in ``feedback.models``
+apply deltas inside the same transaction as the write. Code that bypasses
+them (``QuerySet.update()``, ``bulk_create()``) must call ``apply_deltas``
+itself, or run ``manage.py rebuild_feedback_counters`` afterwards.
+"""
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+
+from .models import AdminLoad, Feedback, FeedbackStatusCounter
+
+# Keys per UPDATE ... CASE, within SQLite's bound parameter limit
+UPDATE_BATCH_SIZE = 100
+
+
+def counter_state(feedback):
+    """Snapshot of the counted fields of a feedback instance"""
+    return tuple(getattr(feedback, field) for field in Feedback.COUNTED_FIELDS)
+
+
+def stored_state(feedback, using=None):
+    """Counted fields as currently stored in the database, or None"""
+    if feedback.pk is None:
+        return None
+    return (
+        Feedback.objects.using(using or feedback._state.db or 'default')
+        .filter(pk=feedback.pk)
+        .values_list(*Feedback.COUNTED_FIELDS)
+        .first()
+    )
+
+
+def counter_keys(state):
+    """Counter rows a feedback with the given state contributes to"""
+    if state is None:
+        return []
+    student_id, admin_id, status, category = state
+    keys = [(None, FeedbackStatusCounter.ROLE_ALL, status, category)]
+    if student_id is not None:
+        keys.append((student_id, FeedbackStatusCounter.ROLE_STUDENT, status, category))
+    if admin_id is not None:
+        keys.append((admin_id, FeedbackStatusCounter.ROLE_ADMIN, status, category))
+    return keys
+
+
+def transition_deltas(old_state, new_state):
+    """Counter deltas for moving one feedback from old_state to new_state"""
+    deltas = Counter()
+    for key in counter_keys(old_state):
+        deltas[key] -= 1
+    for key in counter_keys(new_state):
+        deltas[key] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def record_transition(old_state, new_state, using='default'):
+    apply_deltas(transition_deltas(old_state, new_state), using=using)
+
+
+def apply_deltas(deltas, using='default'):
+    """
+    Add each delta to its counter row, creating missing rows.
+
+    All rows move in one ``UPDATE ... SET count = count + CASE ... END`` so
+    concurrent writers never lose updates, and a batch costs the same few
+    statements as a single feedback. Changes to an admin's pending counters
+    are mirrored onto their ``AdminLoad`` row.
+    """
+    if not deltas:
+        return
+    loads = Counter()
+    for (owner_id, role, status, category), delta in deltas.items():
+        if role == FeedbackStatusCounter.ROLE_ADMIN and status == Feedback.PENDING:
+            loads[owner_id] += delta
+    with transaction.atomic(using=using):
+        increment_rows(FeedbackStatusCounter, ('owner_id', 'role', 'status', 'category'), deltas, using=using)
+        increment_rows(AdminLoad, ('admin_id',), {(admin_id,): delta for admin_id, delta in loads.items()},
+                       field='open_count', using=using)
+
+
+def increment_rows(model, fields, deltas, field='count', using='default'):
+    """
+    Add ``{key: delta}`` to ``field`` on the row whose ``fields`` equal each
+    key, creating missing rows: one INSERT and one UPDATE per
+    ``UPDATE_BATCH_SIZE`` keys. Callers are expected to hold a transaction.
+    """
+    rows = model.objects.using(using)
+    keys = [key for key, delta in deltas.items() if delta]
+    for start in range(0, len(keys), UPDATE_BATCH_SIZE):
+        chunk = keys[start:start + UPDATE_BATCH_SIZE]
+        lookups = [dict(zip(fields, key)) for key in chunk]
+        # Rows that already exist, or another writer creates first, are skipped
+        rows.bulk_create([model(**lookup) for lookup in lookups], ignore_conflicts=True)
+        conditions = [Q(**lookup) for lookup in lookups]
+        rows.filter(reduce(or_, conditions)).update(**{field: F(field) + Case(
+            *(When(condition, then=Value(deltas[key])) for condition, key in zip(conditions, chunk)),
+            default=Value(0),
+        )})
+
+
+def status_counts(owner=None, role=FeedbackStatusCounter.ROLE_ALL):
+    """
+    Return ``{status: count}`` for one owner and role, plus a ``total`` key,
+    from a single indexed read of the counters table.
+    """
+    owner_id = getattr(owner, 'pk', owner)
+    rows = FeedbackStatusCounter.objects.filter(owner_id=owner_id, role=role)
+    counts = defaultdict(int)
+    for status, count in rows.values_list('status', 'count'):
+        counts[status] += count
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def expected_counters(using='default'):
+    """Recompute every counter row from the feedback table"""
+    expected = Counter()
+    rows = (
+        Feedback.objects.using(using)
+        .values(*Feedback.COUNTED_FIELDS)
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        state = tuple(row[field] for field in Feedback.COUNTED_FIELDS)
+        for key in counter_keys(state):
+            expected[key] += row['n']
+    return expected
+
+
+def stored_counters(using='default'):
+    return Counter({
+        (owner_id, role, status, category): count
+        for owner_id, role, status, category, count in
+        FeedbackStatusCounter.objects.using(using)
+        .exclude(count=0)
+        .values_list('owner_id', 'role', 'status', 'category', 'count')
+    })
+
+
+def verify_counters(using='default'):
+    """Return ``{key: (stored, expected)}`` for every counter that is wrong"""
+    expected = expected_counters(using)
+    stored = stored_counters(using)
+    return {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in set(expected) | set(stored)
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+
+
+def rebuild_counters(using='default'):
+    """Replace the counters table with freshly computed totals"""
+    expected = expected_counters(using)
+    with transaction.atomic(using=using):
+        FeedbackStatusCounter.objects.using(using).all().delete()
+        FeedbackStatusCounter.objects.using(using).bulk_create([
+            FeedbackStatusCounter(
+                owner_id=owner_id, role=role, status=status, category=category, count=count
+            )
+            for (owner_id, role, status, category), count in expected.items()
+        ], batch_size=500)
+    return len(expected)
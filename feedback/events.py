@@ -0,0 +1,249 @@
+"""
+Server-Sent Events for live notification updates.
+
+Every open stream subscribes to ``broadcaster``, the per-process fan-out. A
+single poller thread per process reads new ``Notification`` rows for the
+users with open streams, in id order, and hands each row to their streams.
+That is one indexed range read per process per poll interval, however many
+tabs are open. Because the rows come from the shared database, notifications
+written by any worker process reach streams held by every other process.
+Delivery in this process wakes the poller early, so local events are not held
+back until the next interval.
+
+Notification ids are the SSE event ids. A reconnecting client sends
+``Last-Event-ID`` and first gets what it missed from the table.
+
+Every open stream holds a worker thread for up to ``MAX_STREAM_SECONDS``, so
+a process serves at most ``NOTIFICATION_STREAM_LIMIT`` streams and answers
+503 beyond that. Run the app with more threads than that limit, e.g.
+``gunicorn --threads``, so ordinary requests always find a free one.
+
+EventSource cannot send an Authorization header, so streams are opened with
+a ticket from ``issue_stream_ticket`` in the query string. A ticket is signed,
+opens a single stream and expires after ``STREAM_TICKET_SECONDS``, so one
+that ends up in an access log is of no use; API tokens never go in URLs.
+Spent tickets are recorded in the ``UsedStreamTicket`` table, so a ticket
+used in one worker process can't be replayed in another.
+"""
+import json
+import queue
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import BaseRenderer
+
+from college_feedback_system.utils.logging import logger
+
+from .models import Notification, UsedStreamTicket
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_SECONDS = 15
+# Streams end after this long, so a WSGI worker is never held indefinitely;
+# EventSource reconnects with Last-Event-ID after RETRY_MILLISECONDS
+MAX_STREAM_SECONDS = 5 * 60
+RETRY_MILLISECONDS = 3000
+# A client further behind than this is told to refetch instead
+REPLAY_LIMIT = 100
+POLL_BATCH_SIZE = 500
+# Default for settings.NOTIFICATION_STREAM_LIMIT
+STREAM_LIMIT = 50
+
+STREAM_TICKET_SECONDS = 60
+STREAM_TICKET_SALT = 'feedback.events.stream-ticket'
+
+EVENT_FIELDS = ('id', 'feedback_id', 'notification_type', 'message', 'created_at')
+
+
+class Broadcaster:
+    """Fans new notifications out to the streams open in this process"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.cursor = None
+        self.thread = None
+        self.wakeup = threading.Event()
+
+    def subscribe(self, user_id):
+        subscription = queue.SimpleQueue()
+        with self.lock:
+            if self.cursor is None or not self.subscribers:
+                # Start from now; streams replay anything older themselves.
+                # While nobody listened the cursor did not move.
+                self.cursor = Notification.objects.aggregate(latest=Max('id'))['latest'] or 0
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+        self.start()
+        return subscription
+
+    def has_capacity(self):
+        """Whether this process may open another stream"""
+        limit = getattr(settings, 'NOTIFICATION_STREAM_LIMIT', STREAM_LIMIT)
+        with self.lock:
+            return sum(len(streams) for streams in self.subscribers.values()) < limit
+
+    def unsubscribe(self, user_id, subscription):
+        with self.lock:
+            streams = self.subscribers.get(user_id, set())
+            streams.discard(subscription)
+            if not streams:
+                self.subscribers.pop(user_id, None)
+
+    def publish(self, events):
+        with self.lock:
+            for event in events:
+                for subscription in self.subscribers.get(event['user_id'], ()):
+                    subscription.put(event)
+
+    def wake(self):
+        self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='notification-broadcaster', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(POLL_INTERVAL)
+            self.wakeup.clear()
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("notification_poll_failed")
+            finally:
+                close_old_connections()
+
+    def poll(self):
+        """
+        Publish notifications written since the last poll. Every new row is
+        read, not only subscribers' rows, so the cursor passes everyone's:
+        a user subscribing later must not get their older rows as live.
+        """
+        with self.lock:
+            if not self.subscribers:
+                return
+        while True:
+            events = list(
+                Notification.objects.filter(id__gt=self.cursor)
+                .order_by('id')
+                .values('user_id', *EVENT_FIELDS)[:POLL_BATCH_SIZE]
+            )
+            if not events:
+                return
+            self.cursor = events[-1]['id']
+            self.publish(events)
+            if len(events) < POLL_BATCH_SIZE:
+                return
+
+
+broadcaster = Broadcaster()
+
+
+def format_event(event):
+    data = {field: event[field] for field in EVENT_FIELDS}
+    data['created_at'] = data['created_at'].isoformat()
+    return f"id: {event['id']}\nevent: {event['notification_type']}\ndata: {json.dumps(data)}\n\n"
+
+
+def parse_last_event_id(value):
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def event_stream(user_id, last_event_id=None):
+    """
+    Yield SSE frames for one user: anything after ``last_event_id``, then
+    live notifications and heartbeats until the stream's time is up.
+    """
+    subscription = broadcaster.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        last = last_event_id
+        if last is not None:
+            missed = list(
+                Notification.objects.filter(user_id=user_id, id__gt=last)
+                .order_by('id')
+                .values('user_id', *EVENT_FIELDS)[:REPLAY_LIMIT + 1]
+            )
+            if len(missed) > REPLAY_LIMIT:
+                last = Notification.objects.filter(user_id=user_id).aggregate(latest=Max('id'))['latest']
+                yield f"id: {last}\nevent: resync\ndata: {{}}\n\n"
+            else:
+                for event in missed:
+                    yield format_event(event)
+                    last = event['id']
+        if not connection.in_atomic_block:
+            # Nothing else is read; don't hold a connection for the stream
+            connection.close()
+
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = subscription.get(timeout=min(HEARTBEAT_SECONDS, remaining))
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            if last is not None and event['id'] <= last:
+                # Already replayed
+                continue
+            last = event['id']
+            yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(user_id, subscription)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate text/event-stream; errors are rendered as JSON"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+def issue_stream_ticket(user):
+    """A signed ticket that opens one notification stream for ``user``"""
+    return signing.dumps({'user': user.pk, 'nonce': secrets.token_urlsafe(12)}, salt=STREAM_TICKET_SALT)
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """
+    Auth from a ``?ticket=`` made by ``issue_stream_ticket``. Only used by
+    the stream endpoint.
+    """
+    def authenticate(self, request):
+        ticket = request.query_params.get('ticket')
+        if not ticket:
+            return None
+        try:
+            payload = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=STREAM_TICKET_SECONDS)
+        except signing.BadSignature:
+            raise AuthenticationFailed('Invalid or expired stream ticket.')
+        try:
+            with transaction.atomic():
+                UsedStreamTicket.objects.create(nonce=payload['nonce'])
+        except IntegrityError:
+            raise AuthenticationFailed('Stream ticket already used.')
+        # Nonces older than any valid ticket can't be replayed anyway
+        expired = timezone.now() - timedelta(seconds=STREAM_TICKET_SECONDS)
+        UsedStreamTicket.objects.filter(used_at__lt=expired).delete()
+        user = get_user_model().objects.filter(pk=payload['user'], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return user, None
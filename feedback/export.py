@@ -0,0 +1,162 @@
+"""
+Streaming feedback export.
+
+``export_feedback`` turns a feedback queryset into CSV or NDJSON bytes,
+optionally gzipped, as a generator. Output is flat: each feedback row is
+followed by rows for its responses, comments and history, told apart by the
+``record`` column and tied together by ``feedback_id``.
+
+CSV cells starting with ``=``, ``+``, ``-``, ``@``, tab or CR get a leading ``'`` so
+spreadsheets show user-written text instead of running it as a formula.
+NDJSON is left as written.
+
+Feedback is read with ``iterator(chunk_size=...)`` and the related rows are
+fetched one chunk at a time, so memory stays flat however many rows are
+exported: one chunk of feedback with its related rows, plus one output
+buffer. Everything is read with ``values()``, no model instances are built.
+"""
+import csv
+import json
+import zlib
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+CHUNK_SIZE = 500
+# Output is yielded in pieces of about this size
+BUFFER_SIZE = 64 * 1024
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = {
+    CSV: 'text/csv',
+    NDJSON: 'application/x-ndjson',
+}
+
+COLUMNS = (
+    'record', 'feedback_id', 'id', 'created_at', 'title', 'category', 'status', 'student',
+    'assigned_admin', 'resolved_at', 'author', 'content', 'is_internal', 'attachment',
+    'old_status', 'new_status', 'old_assigned_to', 'new_assigned_to', 'notes',
+)
+# Leading characters that make spreadsheets evaluate a cell
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+FEEDBACK_FIELDS = {
+    'id': 'id', 'created_at': 'created_at', 'title': 'title', 'category': 'category',
+    'status': 'status', 'student': 'student__email', 'assigned_admin': 'assigned_admin__email',
+    'resolved_at': 'resolved_at', 'content': 'description', 'attachment': 'photo',
+}
+# record: (related name, {column: field})
+RELATED = {
+    'response': ('responses', {
+        'id': 'id', 'created_at': 'created_at', 'author': 'responder__email', 'content': 'content',
+        'is_internal': 'is_internal', 'attachment': 'attachment',
+    }),
+    'comment': ('comments', {
+        'id': 'id', 'created_at': 'created_at', 'author': 'user__email', 'content': 'comment',
+    }),
+    'history': ('history', {
+        'id': 'id', 'created_at': 'timestamp', 'author': 'changed_by__email',
+        'old_status': 'old_status', 'new_status': 'new_status',
+        'old_assigned_to': 'old_assigned_to__email', 'new_assigned_to': 'new_assigned_to__email',
+        'notes': 'notes',
+    }),
+}
+
+
+def select(queryset, fields, chunk_size=None):
+    """
+    Rows of ``queryset`` as {column: value} for a {column: field} mapping,
+    streamed from the database when ``chunk_size`` is given.
+    """
+    rows = queryset.values(*fields.values())
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+    return ({column: row[field] for column, field in fields.items()} for row in rows)
+
+
+def related_records(feedback_ids, using='default'):
+    """{feedback_id: [record, ...]} for every related row of these feedback"""
+    from .models import Feedback
+
+    records = {feedback_id: [] for feedback_id in feedback_ids}
+    for record, (related_name, fields) in RELATED.items():
+        field = Feedback._meta.get_field(related_name)
+        queryset = field.related_model.objects.using(using).filter(feedback_id__in=feedback_ids).order_by('id')
+        for row in select(queryset, {**fields, 'feedback_id': 'feedback_id'}):
+            records[row['feedback_id']].append({'record': record, **row})
+    return records
+
+
+def export_records(queryset, chunk_size=CHUNK_SIZE):
+    """Flat records for the feedback in ``queryset``, in id order"""
+    rows = select(queryset.order_by('id'), FEEDBACK_FIELDS, chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        related = related_records([row['id'] for row in chunk], queryset.db)
+        for row in chunk:
+            yield {'record': 'feedback', 'feedback_id': row['id'], **row}
+            yield from related[row['id']]
+
+
+class Echo:
+    """A file-like object csv.writer can write to that hands back each line"""
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_csv(records):
+    writer = csv.DictWriter(Echo(), fieldnames=COLUMNS, restval='', extrasaction='ignore')
+    yield writer.writerow(dict(zip(COLUMNS, COLUMNS)))
+    for record in records:
+        yield writer.writerow({
+            column: csv_cell(value) for column, value in record.items() if value is not None
+        })
+
+
+def encode_ndjson(records):
+    for record in records:
+        yield json.dumps({column: record.get(column) for column in COLUMNS}, cls=DjangoJSONEncoder) + '\n'
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    """Join text lines into UTF-8 pieces of about ``size`` bytes"""
+    pending, length = [], 0
+    for line in lines:
+        pending.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(pending).encode('utf-8')
+            pending, length = [], 0
+    if pending:
+        yield ''.join(pending).encode('utf-8')
+
+
+def gzipped(pieces):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_feedback(queryset, output=CSV, gzip=False, chunk_size=CHUNK_SIZE):
+    """Generator of the export of ``queryset`` as bytes"""
+    encode = encode_csv if output == CSV else encode_ndjson
+    pieces = buffered(encode(export_records(queryset, chunk_size)))
+    return gzipped(pieces) if gzip else pieces
+
+
+def export_filename(output, gzip=False):
+    return f"feedback-export.{output}{'.gz' if gzip else ''}"
@@ -0,0 +1,199 @@
+"""
+Derived image renditions for feedback photos and response attachments.
+
+Every uploaded image gets a small thumbnail for list pages and a medium
+preview for detail pages. They are stored next to the original as
+``<name>.thumbnail.jpg`` and ``<name>.medium.jpg``. Renditions are
+re-encoded from decoded pixels after applying the EXIF orientation, so no
+EXIF (camera, GPS) data survives into them.
+
+Saves schedule generation after commit on a small thread pool. Requests
+therefore never pay for decoding a 10 MB photo. Until the renditions of a
+content exist, ``StoredContent.renditions_ready`` is false and serializers
+give the original's URL in their place, so clients never get a 404.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, models, transaction
+from PIL import Image, ImageOps
+
+from college_feedback_system.utils.caching import bump_generation
+from college_feedback_system.utils.logging import logger
+
+from .storage import CONTENT_ROOT, digest_of
+
+# name: (max width, max height); aspect ratio is kept
+RENDITIONS = {
+    'thumbnail': (200, 200),
+    'medium': (800, 800),
+}
+JPEG_QUALITY = 82
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_name(name, rendition):
+    return f'{name}.{rendition}.jpg'
+
+
+def rendition_urls(file, request=None, ready=True):
+    """
+    {rendition: url} for a FieldFile, or None when there is no file. Every
+    rendition points at the original until they are ``ready``.
+    """
+    if not file:
+        return None
+    urls = {}
+    for rendition in RENDITIONS:
+        url = file.storage.url(rendition_name(file.name, rendition) if ready else file.name)
+        urls[rendition] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def ready_renditions(names):
+    """The stored image names among ``names`` whose renditions exist, read with one query"""
+    from .models import StoredContent
+
+    digests = [digest_of(name) for name in names if name and name.startswith(CONTENT_ROOT + '/')]
+    if not digests:
+        return set()
+    return set(
+        StoredContent.objects.filter(pk__in=digests, renditions_ready=True).values_list('name', flat=True)
+    )
+
+
+def mark_renditions_ready(name):
+    """Let serializers link to the renditions of ``name``, refreshing cached responses"""
+    from .models import CACHE_SCOPE, StoredContent
+
+    if StoredContent.objects.filter(pk=digest_of(name), renditions_ready=False).update(renditions_ready=True):
+        bump_generation(CACHE_SCOPE)
+
+
+def flatten(image):
+    """RGB pixels with any transparency composited onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_renditions(name, storage=None, force=False):
+    """
+    Write every rendition of the stored image ``name`` and return their
+    names. Existing renditions are kept unless ``force``: content-addressed
+    originals never change, so a duplicate upload reuses them.
+    """
+    storage = storage or default_storage
+    if not force and all(storage.exists(rendition_name(name, rendition)) for rendition in RENDITIONS):
+        mark_renditions_ready(name)
+        return []
+    with storage.open(name, 'rb') as original:
+        with Image.open(original) as image:
+            # Animated GIFs use their first frame
+            image.seek(0)
+            image = flatten(ImageOps.exif_transpose(image))
+
+    written = []
+    for rendition, size in RENDITIONS.items():
+        copy = image.copy()
+        copy.thumbnail(size, Image.LANCZOS)
+        buffer = BytesIO()
+        # No exif= argument: nothing from the original's metadata is kept
+        copy.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        target = rendition_name(name, rendition)
+        if storage.exists(target):
+            storage.delete(target)
+        written.append(storage.save(target, ContentFile(buffer.getvalue())))
+    mark_renditions_ready(name)
+    return written
+
+
+def _generate(name, storage):
+    try:
+        generate_renditions(name, storage)
+    except Exception:
+        logger.exception("image_rendition_failed", name=name)
+
+
+def _generate_in_worker(name, storage):
+    try:
+        _generate(name, storage)
+    finally:
+        # Pool threads outlive requests, so nothing else closes their connections
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+                thread_name_prefix='image-renditions'
+            )
+    return _executor
+
+
+def schedule_renditions(file, using='default'):
+    """Generate renditions of a FieldFile once the current transaction commits"""
+    name, storage = file.name, file.storage
+
+    def submit():
+        if getattr(settings, 'IMAGE_RENDITIONS_ASYNC', True):
+            get_executor().submit(_generate_in_worker, name, storage)
+        else:
+            _generate(name, storage)
+    transaction.on_commit(submit, using=using)
+
+
+@lru_cache(maxsize=None)
+def model_image_fields(model):
+    return tuple(field.name for field in model._meta.concrete_fields if isinstance(field, models.ImageField))
+
+
+def image_fields(instance):
+    return list(model_image_fields(type(instance)))
+
+
+def uploaded_image_fields(instance):
+    """Image fields holding a file that this save will write to storage"""
+    names = []
+    for field_name in image_fields(instance):
+        file = getattr(instance, field_name)
+        if file and not file._committed:
+            names.append(field_name)
+    return names
+
+
+def stored_image_names(instance, field_names, using='default'):
+    """
+    {field: name} of the files these fields hold in the database, as loaded
+    or last saved; the row is only read for fields not known yet
+    """
+    known = getattr(instance, '_stored_images', {})
+    names = {name: known[name] for name in field_names if name in known}
+    missing = [name for name in field_names if name not in known]
+    if missing:
+        row = type(instance)._base_manager.using(using).filter(pk=instance.pk).values_list(*missing).first()
+        names.update(zip(missing, row or ()))
+    return names
+
+
+def remember_stored_images(instance):
+    """Record the image names just saved, for the next save to compare with"""
+    deferred = instance.get_deferred_fields()
+    stored = getattr(instance, '_stored_images', {})
+    for field_name in image_fields(instance):
+        if field_name not in deferred:
+            stored[field_name] = getattr(instance, field_name).name or ''
+    instance._stored_images = stored
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from feedback.rollups import backfill_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild the hourly and daily feedback trend rollups from the feedback table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild buckets from this date on (YYYY-MM-DD, UTC)',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to use',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        rows = backfill_rollups(since=since, using=options['database'])
+        scope = f"from {options['since']}" if since else 'for all feedback'
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} rollup row(s) {scope}"))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from feedback.notifications import BATCH_SIZE, drain_events
+
+class Command(BaseCommand):
+    help = 'Deliver pending notification events, such as those left by a process that stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Events claimed per batch',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for events instead of exiting once none are left',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = drain_events(batch_size=options['batch_size'])
+            if delivered or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} event(s)"))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,83 @@
+import codecs
+
+from django.core.management.base import BaseCommand, CommandError
+from feedback.export import CHUNK_SIZE, FORMATS, export_feedback
+from feedback.models import Feedback
+from feedback.serializers import ExportQuerySerializer
+
+class Command(BaseCommand):
+    help = 'Stream feedback, with responses, comments and history, as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=list(FORMATS),
+            default='csv',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Gzip the output',
+        )
+        parser.add_argument(
+            '--file',
+            help='Write to this path instead of standard output',
+        )
+        parser.add_argument('--status', help='Only feedback with this status')
+        parser.add_argument('--category', help='Only feedback in this category')
+        parser.add_argument('--created-after', help='Only feedback created at or after this ISO date/time')
+        parser.add_argument('--created-before', help='Only feedback created before this ISO date/time')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Feedback read per query',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to use',
+        )
+
+    def handle(self, *args, **options):
+        query = {
+            key: options[key] for key in ('status', 'category', 'created_after', 'created_before')
+            if options[key] is not None
+        }
+        serializer = ExportQuerySerializer(data={**query, 'output': options['format'], 'gzip': options['gzip']})
+        if not serializer.is_valid():
+            raise CommandError('; '.join(
+                f"{field}: {' '.join(str(error) for error in errors)}"
+                for field, errors in serializer.errors.items()
+            ))
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        # The command's stdout may be a text stream without a binary buffer
+        binary = None if options['file'] else getattr(self.stdout, 'buffer', None)
+        if options['gzip'] and not options['file'] and binary is None:
+            raise CommandError('--gzip needs a binary standard output; use --file')
+
+        queryset = serializer.filter_queryset(Feedback.objects.using(options['database']))
+        pieces = export_feedback(queryset, options['format'], options['gzip'], options['chunk_size'])
+
+        if binary is not None:
+            self.stdout.flush()
+            for piece in pieces:
+                binary.write(piece)
+            binary.flush()
+            return
+        if not options['file']:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            for piece in pieces:
+                self.stdout.write(decoder.decode(piece), ending='')
+            self.stdout.write(decoder.decode(b'', final=True), ending='')
+            return
+
+        written = 0
+        with open(options['file'], 'wb') as destination:
+            for piece in pieces:
+                destination.write(piece)
+                written += len(piece)
+        self.stdout.write(self.style.SUCCESS(f"Exported {written} byte(s) to {options['file']}"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from feedback.images import generate_renditions
+from feedback.models import Feedback, FeedbackResponse
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and previews for uploaded feedback photos and response attachments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate renditions that already exist',
+        )
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        sources = [
+            Feedback.objects.exclude(photo='').exclude(photo__isnull=True).values_list('photo', flat=True).distinct(),
+            FeedbackResponse.objects.exclude(attachment='').exclude(attachment__isnull=True)
+            .values_list('attachment', flat=True).distinct(),
+        ]
+        storage = Feedback._meta.get_field('photo').storage
+        for names in sources:
+            for name in names.iterator(chunk_size=500):
+                try:
+                    written = generate_renditions(name, storage, force=options['force'])
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f"{name}: {e}"))
+                else:
+                    generated += bool(written)
+        self.stdout.write(self.style.SUCCESS(f"Generated renditions for {generated} image(s), {failed} failed"))
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from feedback.synthetic import BATCH_SIZE, DEFAULT_END, DEFAULT_PASSWORD, SyntheticDataGenerator, email_domain
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Generate a large, realistically skewed dataset, the same for the same seed, for performance work'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; also names the generated users')
+        parser.add_argument('--students', type=int, default=1000, help='Number of students')
+        parser.add_argument('--admins', type=int, default=20, help='Number of admins')
+        parser.add_argument('--feedback', type=int, default=10000, help='Number of feedback')
+        parser.add_argument(
+            '--responses',
+            type=float,
+            default=0.8,
+            help='Mean responses per feedback',
+        )
+        parser.add_argument(
+            '--comments',
+            type=float,
+            default=1.5,
+            help='Mean comments per feedback',
+        )
+        parser.add_argument('--days', type=int, default=730, help='Days of history to spread feedback over')
+        parser.add_argument(
+            '--end',
+            default=DEFAULT_END.strftime('%Y-%m-%d'),
+            help='Last day of the dataset (YYYY-MM-DD, UTC)',
+        )
+        parser.add_argument(
+            '--password',
+            default=DEFAULT_PASSWORD,
+            help='Password of every generated user',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per insert batch')
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to use',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            end = datetime.strptime(options['end'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise CommandError('--end must be a date in YYYY-MM-DD format')
+        if options['students'] < 1 or options['admins'] < 1:
+            raise CommandError('At least one student and one admin are needed')
+        if options['feedback'] < 0 or options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--feedback, --days and --batch-size must be positive')
+        if options['responses'] < 0 or options['comments'] < 0:
+            raise CommandError('--responses and --comments must not be negative')
+
+        domain = email_domain(options['seed'])
+        if User.objects.using(options['database']).filter(email__endswith=f'@{domain}').exists():
+            raise CommandError(f"Seed {options['seed']} was already generated here (users @{domain})")
+
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            students=options['students'],
+            admins=options['admins'],
+            feedback=options['feedback'],
+            responses=options['responses'],
+            comments=options['comments'],
+            days=options['days'],
+            end=end,
+            password=options['password'],
+            batch_size=options['batch_size'],
+            using=options['database'],
+            log=self.stdout.write,
+        )
+        written = generator.run()
+        self.stdout.write(self.style.SUCCESS('Wrote ' + ', '.join(
+            f'{rows} {model}' for model, rows in written.items()
+        )))
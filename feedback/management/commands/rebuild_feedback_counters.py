@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from feedback.counters import verify_counters, rebuild_counters
+from feedback.assignment import rebuild_admin_loads
+
+class Command(BaseCommand):
+    help = 'Verify the denormalized feedback status counters and rebuild them, and the admin loads, from the feedback table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Report mismatched counters without changing them (exits non-zero on drift)',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to use',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        mismatches = verify_counters(using)
+
+        for (owner_id, role, status, category), (stored, expected) in sorted(
+            mismatches.items(), key=lambda item: str(item[0])
+        ):
+            self.stdout.write(self.style.WARNING(
+                f"{role}/{owner_id or 'all'}/{status}/{category}: stored {stored}, expected {expected}"
+            ))
+
+        if options['verify_only']:
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counter(s) out of date")
+            self.stdout.write(self.style.SUCCESS('All feedback counters are correct'))
+            return
+
+        rows = rebuild_counters(using)
+        loads = rebuild_admin_loads(using)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} counter row(s) and {loads} admin load(s), fixed {len(mismatches)} mismatch(es)"
+        ))
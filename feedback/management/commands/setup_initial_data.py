@@ -46,9 +46,6 @@ class Command(BaseCommand):
                 'first_name': 'John',
                 'last_name': 'Doe',
                 'user_type': 'student',
-                'department': 'Computer Science',
-                'student_id': 'CS123456',
-                'year_of_study': 3,
             },
             {
                 'email': 'admin@example.com',
@@ -56,7 +53,6 @@ class Command(BaseCommand):
                 'first_name': 'Jane',
                 'last_name': 'Smith',
                 'user_type': 'admin',
-                'department': 'Computer Science',
                 'is_staff': True,
             },
         ]
@@ -75,23 +71,24 @@ class Command(BaseCommand):
         # Create sample feedback if none exists
         if Feedback.objects.count() == 0:
             student = User.objects.get(email='student@example.com')
-            academic = FeedbackCategory.objects.get(name='Academic')
-            infra = FeedbackCategory.objects.get(name='Infrastructure')
+            admin = User.objects.get(email='admin@example.com')
             
             feedbacks = [
                 {
                     'title': 'Need more programming practice sessions',
-                    'content': 'The programming course needs more practical sessions. Theory alone is not enough to learn programming effectively.',
-                    'category': academic,
-                    'submitter': student,
-                    'status': 'pending',
+                    'description': 'The programming course needs more practical sessions. Theory alone is not enough to learn programming effectively.',
+                    'category': Feedback.ACADEMIC,
+                    'student': student,
+                    'assigned_admin': admin,
+                    'status': Feedback.PENDING,
                 },
                 {
                     'title': 'Computer lab needs better internet',
-                    'content': 'The internet in the computer lab is too slow for development work. Please upgrade the connection.',
-                    'category': infra,
-                    'submitter': student,
-                    'status': 'in_progress',
+                    'description': 'The internet in the computer lab is too slow for development work. Please upgrade the connection.',
+                    'category': Feedback.INFRASTRUCTURE,
+                    'student': student,
+                    'assigned_admin': admin,
+                    'status': Feedback.PENDING,
                 },
             ]
             
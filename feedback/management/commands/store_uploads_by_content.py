@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from college_feedback_system.utils.caching import bump_generation
+from feedback.images import RENDITIONS, generate_renditions, rendition_name
+from feedback.models import CACHE_SCOPE, Feedback, FeedbackResponse
+from feedback.storage import CONTENT_ROOT
+
+class Command(BaseCommand):
+    help = 'Move images uploaded before content-addressed storage into it, merging duplicates'
+
+    def handle(self, *args, **kwargs):
+        moved = missing = 0
+        for model, field_name in ((Feedback, 'photo'), (FeedbackResponse, 'attachment')):
+            storage = model._meta.get_field(field_name).storage
+            rows = (
+                model.objects.exclude(**{field_name: ''})
+                .exclude(**{f'{field_name}__isnull': True})
+                .exclude(**{f'{field_name}__startswith': CONTENT_ROOT + '/'})
+                .values_list('pk', field_name)
+            )
+            for pk, name in rows.iterator(chunk_size=500):
+                if not storage.exists(name):
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f"{model.__name__} {pk}: {name} is missing"))
+                    continue
+                with storage.open(name, 'rb') as original:
+                    stored = storage.save(name, original)
+                # update() skips signals, so the new reference is not released again
+                model.objects.filter(pk=pk, **{field_name: name}).update(**{field_name: stored})
+                # Names from before were unique to their row
+                for old in [name] + [rendition_name(name, rendition) for rendition in RENDITIONS]:
+                    if storage.exists(old):
+                        storage.delete(old)
+                generate_renditions(stored, storage)
+                moved += 1
+        if moved:
+            bump_generation(CACHE_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} file(s), {missing} missing"))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0002_alter_feedbackcomment_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['student', '-created_at', '-id'], name='feedback_fe_student_5a007a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['student', 'status', '-created_at'], name='feedback_fe_student_4d6212_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['assigned_admin', '-created_at', '-id'], name='feedback_fe_assigne_f02352_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['assigned_admin', 'status', '-created_at'], name='feedback_fe_assigne_ed70a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackresponse',
+            index=models.Index(fields=['feedback', 'is_internal'], name='feedback_fe_feedbac_ed1b47_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackresponse',
+            index=models.Index(fields=['responder', 'created_at'], name='feedback_fe_respond_9e0810_idx'),
+        ),
+    ]
@@ -0,0 +1,136 @@
+from django.db import migrations
+
+# One FTS5 row per feedback, keyed by the feedback id. Comments and public
+# (non-internal) responses are folded into a single column each and
+# re-aggregated by triggers whenever a child row changes.
+FTS_TABLE = 'feedback_feedback_fts'
+
+COMMENTS_SQL = (
+    "coalesce((SELECT group_concat(comment, ' ') FROM feedback_feedbackcomment "
+    "WHERE feedback_id = {id}), '')"
+)
+RESPONSES_SQL = (
+    "coalesce((SELECT group_concat(content, ' ') FROM feedback_feedbackresponse "
+    "WHERE feedback_id = {id} AND NOT is_internal), '')"
+)
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, comments, responses,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_insert AFTER INSERT ON feedback_feedback BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, comments, responses)
+        VALUES (new.id, new.title, coalesce(new.description, ''), '', '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_update AFTER UPDATE OF title, description ON feedback_feedback
+    WHEN new.title IS NOT old.title OR new.description IS NOT old.description BEGIN
+        UPDATE {FTS_TABLE} SET title = new.title, description = coalesce(new.description, '')
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_delete AFTER DELETE ON feedback_feedback BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_comment_insert AFTER INSERT ON feedback_feedbackcomment BEGIN
+        UPDATE {FTS_TABLE} SET comments = {COMMENTS_SQL.format(id='new.feedback_id')}
+        WHERE rowid = new.feedback_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_comment_update AFTER UPDATE OF comment, feedback_id ON feedback_feedbackcomment BEGIN
+        UPDATE {FTS_TABLE} SET comments = {COMMENTS_SQL.format(id='old.feedback_id')}
+        WHERE rowid = old.feedback_id;
+        UPDATE {FTS_TABLE} SET comments = {COMMENTS_SQL.format(id='new.feedback_id')}
+        WHERE rowid = new.feedback_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_comment_delete AFTER DELETE ON feedback_feedbackcomment BEGIN
+        UPDATE {FTS_TABLE} SET comments = {COMMENTS_SQL.format(id='old.feedback_id')}
+        WHERE rowid = old.feedback_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_response_insert AFTER INSERT ON feedback_feedbackresponse BEGIN
+        UPDATE {FTS_TABLE} SET responses = {RESPONSES_SQL.format(id='new.feedback_id')}
+        WHERE rowid = new.feedback_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_response_update
+    AFTER UPDATE OF content, is_internal, feedback_id ON feedback_feedbackresponse BEGIN
+        UPDATE {FTS_TABLE} SET responses = {RESPONSES_SQL.format(id='old.feedback_id')}
+        WHERE rowid = old.feedback_id;
+        UPDATE {FTS_TABLE} SET responses = {RESPONSES_SQL.format(id='new.feedback_id')}
+        WHERE rowid = new.feedback_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feedback_fts_response_delete AFTER DELETE ON feedback_feedbackresponse BEGIN
+        UPDATE {FTS_TABLE} SET responses = {RESPONSES_SQL.format(id='old.feedback_id')}
+        WHERE rowid = old.feedback_id;
+    END
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, comments, responses)
+    SELECT f.id, f.title, coalesce(f.description, ''),
+           {COMMENTS_SQL.format(id='f.id')}, {RESPONSES_SQL.format(id='f.id')}
+    FROM feedback_feedback f
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS feedback_fts_insert",
+    "DROP TRIGGER IF EXISTS feedback_fts_update",
+    "DROP TRIGGER IF EXISTS feedback_fts_delete",
+    "DROP TRIGGER IF EXISTS feedback_fts_comment_insert",
+    "DROP TRIGGER IF EXISTS feedback_fts_comment_update",
+    "DROP TRIGGER IF EXISTS feedback_fts_comment_delete",
+    "DROP TRIGGER IF EXISTS feedback_fts_response_insert",
+    "DROP TRIGGER IF EXISTS feedback_fts_response_update",
+    "DROP TRIGGER IF EXISTS feedback_fts_response_delete",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts5_available(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any('ENABLE_FTS5' in row[0] for row in cursor.fetchall())
+
+
+def create_search_index(apps, schema_editor):
+    # Other backends use the icontains fallback in feedback.search
+    if not fts5_available(schema_editor):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0003_feedback_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import Counter
+
+
+def backfill_counters(apps, schema_editor):
+    """Seed the counters from existing feedback (same rules as feedback.counters)"""
+    Feedback = apps.get_model('feedback', 'Feedback')
+    FeedbackStatusCounter = apps.get_model('feedback', 'FeedbackStatusCounter')
+    db = schema_editor.connection.alias
+
+    totals = Counter()
+    rows = (
+        Feedback.objects.using(db)
+        .values('student_id', 'assigned_admin_id', 'status', 'category')
+        .annotate(n=models.Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        totals[(None, 'all', row['status'], row['category'])] += row['n']
+        if row['student_id'] is not None:
+            totals[(row['student_id'], 'student', row['status'], row['category'])] += row['n']
+        if row['assigned_admin_id'] is not None:
+            totals[(row['assigned_admin_id'], 'admin', row['status'], row['category'])] += row['n']
+
+    FeedbackStatusCounter.objects.using(db).bulk_create([
+        FeedbackStatusCounter(owner_id=owner_id, role=role, status=status, category=category, count=count)
+        for (owner_id, role, status, category), count in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('feedback', '0004_feedback_search_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('student', 'Submitted by student'), ('admin', 'Assigned to admin'), ('all', 'All feedback')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('resolved', 'Resolved')], max_length=20)),
+                ('category', models.CharField(choices=[('academic', 'Academic'), ('infrastructure', 'Infrastructure'), ('administrative', 'Administrative')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(blank=True, help_text='Student or admin the counts belong to; empty for the global scope', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feedback_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Feedback Status Counter',
+                'verbose_name_plural': 'Feedback Status Counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedbackstatuscounter',
+            constraint=models.UniqueConstraint(fields=('owner', 'role', 'status', 'category'), name='feedback_counter_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedbackstatuscounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('owner__isnull', True)), fields=('role', 'status', 'category'), name='feedback_counter_global_unique'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
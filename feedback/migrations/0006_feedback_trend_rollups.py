@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0005_feedback_status_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackTrendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=10)),
+                ('event', models.CharField(choices=[('created', 'Feedback created'), ('status_changed', 'Status changed')], max_length=20)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or day (UTC)')),
+                ('category', models.CharField(choices=[('academic', 'Academic'), ('infrastructure', 'Infrastructure'), ('administrative', 'Administrative')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('resolved', 'Resolved')], help_text='Status the feedback was created with or moved to', max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Feedback Trend Rollup',
+                'verbose_name_plural': 'Feedback Trend Rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedbacktrendrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'event', 'bucket', 'category', 'status'), name='feedback_rollup_unique'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_admin_loads(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Feedback = apps.get_model('feedback', 'Feedback')
+    AdminLoad = apps.get_model('feedback', 'AdminLoad')
+    using = schema_editor.connection.alias
+
+    open_counts = dict(
+        Feedback.objects.using(using)
+        .filter(status='pending', assigned_admin__isnull=False)
+        .values('assigned_admin')
+        .annotate(n=models.Count('id'))
+        .values_list('assigned_admin', 'n')
+    )
+    AdminLoad.objects.using(using).bulk_create([
+        AdminLoad(admin_id=pk, is_active=is_active, open_count=open_counts.get(pk, 0))
+        for pk, is_active in
+        User.objects.using(using).filter(user_type='admin').values_list('pk', 'is_active')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_options_remove_user_department_and_more'),
+        ('feedback', '0006_feedback_trend_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminLoad',
+            fields=[
+                ('admin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='assignment_load', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('is_active', models.BooleanField(default=False, help_text='Whether the admin can receive new feedback')),
+                ('open_count', models.IntegerField(default=0)),
+                ('last_assigned_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Breaks ties so equally loaded admins take turns')),
+            ],
+            options={
+                'verbose_name': 'Admin Load',
+                'verbose_name_plural': 'Admin Loads',
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['open_count', 'last_assigned_at', 'admin'], name='feedback_adminload_pick_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_admin_loads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0007_feedback_admin_load'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at'], name='feedback_no_user_id_06954f_idx'),
+        ),
+    ]
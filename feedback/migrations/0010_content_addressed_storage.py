@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:31
+
+from django.db import migrations, models
+import feedback.models
+import feedback.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0009_notification_inbox_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredContent',
+            fields=[
+                ('content_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # Storage is not a database property, but SQLite would rebuild the
+        # table for AlterField and drop the full-text search triggers
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='feedback',
+                    name='photo',
+                    field=models.ImageField(blank=True, help_text='Optional photo related to the feedback', null=True, storage=feedback.storage.ContentAddressedStorage(), upload_to='feedback_photos/', validators=[feedback.models.validate_image_file]),
+                ),
+                migrations.AlterField(
+                    model_name='feedbackresponse',
+                    name='attachment',
+                    field=models.ImageField(blank=True, null=True, storage=feedback.storage.ContentAddressedStorage(), upload_to='response_attachments/', validators=[feedback.models.validate_image_file]),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:09
+
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+
+# As in feedback.images at the time of this migration
+RENDITIONS = ('thumbnail', 'medium')
+
+
+def rendition_name(name, rendition):
+    return f'{name}.{rendition}.jpg'
+
+
+def mark_existing_renditions(apps, schema_editor):
+    # Stored content lives under MEDIA_ROOT
+    storage = FileSystemStorage()
+    StoredContent = apps.get_model('feedback', 'StoredContent')
+    using = schema_editor.connection.alias
+    ready = [
+        digest for digest, name in StoredContent.objects.using(using).values_list('content_hash', 'name')
+        if all(storage.exists(rendition_name(name, rendition)) for rendition in RENDITIONS)
+    ]
+    for start in range(0, len(ready), 500):
+        StoredContent.objects.using(using).filter(pk__in=ready[start:start + 500]).update(renditions_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0010_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedcontent',
+            name='renditions_ready',
+            field=models.BooleanField(default=False, help_text='Whether the thumbnail and preview have been generated'),
+        ),
+        migrations.RunPython(mark_existing_renditions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:34
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0012_stored_content_renditions_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsedStreamTicket',
+            fields=[
+                ('nonce', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0013_used_stream_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('feedback_id', models.IntegerField()),
+                ('actor_id', models.IntegerField(blank=True, null=True)),
+                ('target_id', models.IntegerField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(blank=True, max_length=32)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_attempt_at', 'id'], name='feedback_pe_next_at_230082_idx')],
+            },
+        ),
+    ]
@@ -1,15 +1,20 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import FileExtensionValidator, MinValueValidator, MaxValueValidator, MinLengthValidator
 from django.core.exceptions import ValidationError
 import os
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_delete, post_save, pre_save
 from django.dispatch import receiver
+from college_feedback_system.utils.caching import bump_generation
+from .storage import content_storage
 
 User = get_user_model()
 
+# Response cache generation bumped whenever feedback or responses change
+CACHE_SCOPE = 'feedback'
+
 def validate_file_type(value):
     """Validate that the uploaded file is of an allowed type"""
     ext = os.path.splitext(value.name)[1][1:].lower()
@@ -80,7 +85,20 @@ class FeedbackTag(models.Model):
     def __str__(self):
         return self.name
 
-class Feedback(models.Model):
+class StoredImagesMixin:
+    """
+    Remembers the image names a row was loaded with, so a save can tell
+    which stored files it stops referencing without reading the row again
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .images import model_image_fields
+        instance = super().from_db(db, field_names, values)
+        fields = model_image_fields(cls)
+        instance._stored_images = {name: value for name, value in zip(field_names, values) if name in fields}
+        return instance
+
+class Feedback(StoredImagesMixin, models.Model):
     """
     Model for student feedback
     """
@@ -104,6 +122,10 @@ class Feedback(models.Model):
         (RESOLVED, 'Resolved'),
     ]
     
+    # Fields whose change moves a feedback between FeedbackStatusCounter and
+    # FeedbackTrendRollup rows; feedback.counters snapshots them in this order
+    COUNTED_FIELDS = ('student_id', 'assigned_admin_id', 'status', 'category')
+    
     # Basic fields
     title = models.CharField(
         max_length=200, 
@@ -122,6 +144,7 @@ class Feedback(models.Model):
     )
     photo = models.ImageField(
         upload_to='feedback_photos/', 
+        storage=content_storage,
         null=True, 
         blank=True,
         validators=[validate_image_file],
@@ -171,37 +194,86 @@ class Feedback(models.Model):
         verbose_name = 'Feedback'
         verbose_name_plural = 'Feedbacks'
         ordering = ['-created_at']
+        # Every dashboard and API listing is scoped to one student or admin,
+        # optionally narrowed by status, and walked newest first
+        indexes = [
+            models.Index(fields=['student', '-created_at', '-id']),
+            models.Index(fields=['student', 'status', '-created_at']),
+            models.Index(fields=['assigned_admin', '-created_at', '-id']),
+            models.Index(fields=['assigned_admin', 'status', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_category_display()}) - {self.get_status_display()}"
     
+    def save(self, *args, changed_by=None, **kwargs):
+        """
+        Save and update the status counters and trend rollups atomically.
+        ``changed_by`` is who made the change, so they aren't notified of it;
+        new feedback defaults to its student.
+        """
+        from .counters import counter_state, stored_state, record_transition
+        from .notifications import publish, transition_events
+        from .rollups import record_events
+        
+        using = kwargs.get('using') or 'default'
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not any(
+            self._meta.get_field(name).attname in self.COUNTED_FIELDS for name in update_fields
+        ):
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic(using=using):
+            previous = stored_state(self, using) if not self._state.adding else None
+            super().save(*args, **kwargs)
+            current = counter_state(self)
+            record_transition(previous, current, using=using)
+            record_events(self, previous, current, using=using)
+            if changed_by is not None:
+                actor_id = changed_by.pk
+            else:
+                actor_id = self.student_id if previous is None else None
+            publish(transition_events(self.pk, previous, current, actor_id), using=using)
+    
     def mark_as_resolved(self, admin):
         """Mark feedback as resolved"""
         self.status = self.RESOLVED
         self.assigned_admin = admin
         self.resolved_at = timezone.now()
-        self.save()
+        self.save(changed_by=admin)
     
     def get_admin_type_for_category(self):
         """Return the admin type needed for this feedback category"""
         return 'admin'  # Since we only have one admin type now
 
-class FeedbackResponse(models.Model):
+class FeedbackResponse(StoredImagesMixin, models.Model):
     feedback = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='responses')
     responder = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_internal = models.BooleanField(default=False)
-    attachment = models.ImageField(upload_to='response_attachments/', null=True, blank=True, validators=[validate_image_file])
+    attachment = models.ImageField(
+        upload_to='response_attachments/', storage=content_storage, null=True, blank=True,
+        validators=[validate_image_file]
+    )
 
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Feedback Response'
         verbose_name_plural = 'Feedback Responses'
+        indexes = [
+            models.Index(fields=['feedback', 'is_internal']),
+            models.Index(fields=['responder', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Response to {self.feedback.title} by {self.responder.email}"
+    
+    def save(self, *args, **kwargs):
+        """Save atomically, so stored content taken for the attachment is released if the write fails"""
+        with transaction.atomic(using=kwargs.get('using') or 'default'):
+            super().save(*args, **kwargs)
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
@@ -223,12 +295,48 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['created_at']),
+            # Inbox pages are keyset range reads per user
+            models.Index(fields=['user', 'created_at']),
         ]
         ordering = ['-created_at']
 
     def __str__(self):
         return f"{self.get_notification_type_display()} - {self.feedback.title}"
 
+class PendingNotification(models.Model):
+    """
+    A published notification event waiting to be delivered, written in the
+    transaction that caused it; see feedback.notifications
+    """
+    kind = models.CharField(max_length=50)
+    # Not a foreign key: feedback deleted before delivery are skipped
+    feedback_id = models.IntegerField()
+    actor_id = models.IntegerField(null=True, blank=True)
+    target_id = models.IntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20, blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Worker currently holding the row; its lease ends at next_attempt_at
+    claimed_by = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} on {self.feedback_id}"
+
+class UsedStreamTicket(models.Model):
+    """
+    Nonce of a notification stream ticket that has opened its stream. Kept
+    in the database so every worker process sees it; see feedback.events
+    """
+    nonce = models.CharField(max_length=32, primary_key=True)
+    used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.nonce
+
 class FeedbackComment(models.Model):
     """
     Model for comments on feedback
@@ -293,6 +401,238 @@ class FeedbackHistory(models.Model):
     def __str__(self):
         return f"Status change on {self.feedback.title} by {self.changed_by.email}"
 
+class FeedbackStatusCounter(models.Model):
+    """
+    Denormalized feedback count per owner, role, status and category.
+    Kept in step with Feedback by feedback.counters.
+    """
+    ROLE_STUDENT = 'student'
+    ROLE_ADMIN = 'admin'
+    ROLE_ALL = 'all'
+    
+    ROLE_CHOICES = [
+        (ROLE_STUDENT, 'Submitted by student'),
+        (ROLE_ADMIN, 'Assigned to admin'),
+        (ROLE_ALL, 'All feedback'),
+    ]
+    
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feedback_counters',
+        null=True,
+        blank=True,
+        help_text="Student or admin the counts belong to; empty for the global scope"
+    )
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    status = models.CharField(max_length=20, choices=Feedback.STATUS_CHOICES)
+    category = models.CharField(max_length=20, choices=Feedback.CATEGORY_CHOICES)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Feedback Status Counter'
+        verbose_name_plural = 'Feedback Status Counters'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'role', 'status', 'category'],
+                name='feedback_counter_unique'
+            ),
+            # NULL owners are distinct in a plain unique index
+            models.UniqueConstraint(
+                fields=['role', 'status', 'category'],
+                condition=models.Q(owner__isnull=True),
+                name='feedback_counter_global_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.owner_id or 'all'}/{self.role}/{self.status}/{self.category}: {self.count}"
+
+class FeedbackTrendRollup(models.Model):
+    """
+    Number of feedback events per time bucket, category and status.
+    Maintained incrementally by feedback.rollups.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    
+    GRANULARITY_CHOICES = [
+        (HOUR, 'Hourly'),
+        (DAY, 'Daily'),
+    ]
+    
+    CREATED = 'created'
+    STATUS_CHANGED = 'status_changed'
+    
+    EVENT_CHOICES = [
+        (CREATED, 'Feedback created'),
+        (STATUS_CHANGED, 'Status changed'),
+    ]
+    
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour or day (UTC)")
+    category = models.CharField(max_length=20, choices=Feedback.CATEGORY_CHOICES)
+    status = models.CharField(
+        max_length=20,
+        choices=Feedback.STATUS_CHOICES,
+        help_text="Status the feedback was created with or moved to"
+    )
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Feedback Trend Rollup'
+        verbose_name_plural = 'Feedback Trend Rollups'
+        constraints = [
+            # Also the index behind every trend range read
+            models.UniqueConstraint(
+                fields=['granularity', 'event', 'bucket', 'category', 'status'],
+                name='feedback_rollup_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.granularity} {self.bucket:%Y-%m-%d %H:00} {self.event}/{self.category}/{self.status}: {self.count}"
+
+class StoredContent(models.Model):
+    """
+    One stored file per distinct upload content, shared by every image field
+    holding it; see feedback.storage
+    """
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    renditions_ready = models.BooleanField(
+        default=False,
+        help_text="Whether the thumbnail and preview have been generated"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+class AdminLoad(models.Model):
+    """
+    Open (pending) feedback currently assigned to each admin, used by
+    feedback.assignment to pick the least-loaded admin from an index.
+    """
+    admin = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='assignment_load'
+    )
+    is_active = models.BooleanField(
+        default=False,
+        help_text="Whether the admin can receive new feedback"
+    )
+    open_count = models.IntegerField(default=0)
+    last_assigned_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Breaks ties so equally loaded admins take turns"
+    )
+    
+    class Meta:
+        verbose_name = 'Admin Load'
+        verbose_name_plural = 'Admin Loads'
+        indexes = [
+            # Only active admins are ever picked, so the index covers just them
+            models.Index(
+                fields=['open_count', 'last_assigned_at', 'admin'],
+                condition=models.Q(is_active=True),
+                name='feedback_adminload_pick_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.admin_id}: {self.open_count} open"
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_admin_load(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the assignment pool in step with admin accounts"""
+    if raw or (update_fields is not None and not {'user_type', 'is_active'} & set(update_fields)):
+        return
+    eligible = instance.user_type == 'admin' and instance.is_active
+    if eligible:
+        AdminLoad.objects.update_or_create(admin=instance, defaults={'is_active': True})
+    elif not created:
+        AdminLoad.objects.filter(admin=instance).update(is_active=False)
+
+@receiver(post_delete, sender=Feedback)
+def decrement_status_counters(sender, instance, using, **kwargs):
+    """
+    Remove deleted feedback from its counters. Runs for cascades and
+    queryset deletes too, inside the deletion transaction.
+    """
+    from .counters import counter_state, record_transition
+    record_transition(counter_state(instance), None, using=using)
+
+@receiver([post_save, post_delete], sender=Feedback)
+@receiver([post_save, post_delete], sender=FeedbackResponse)
+def invalidate_feedback_cache(sender, **kwargs):
+    """Drop every cached response that reads feedback or responses"""
+    bump_generation(CACHE_SCOPE)
+
+@receiver(post_save, sender=FeedbackComment)
+@receiver(post_save, sender=FeedbackResponse)
+def notify_comment(sender, instance, created, raw=False, **kwargs):
+    """Tell the other side of the feedback about new comments and public responses"""
+    if not created or raw or getattr(instance, 'is_internal', False):
+        return
+    from .notifications import COMMENTED, NotificationEvent, publish
+    actor_id = instance.user_id if sender is FeedbackComment else instance.responder_id
+    publish([NotificationEvent(COMMENTED, instance.feedback_id, actor_id)], using=kwargs.get('using') or 'default')
+
+@receiver(pre_save, sender=Feedback)
+@receiver(pre_save, sender=FeedbackResponse)
+def note_uploaded_images(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Remember which image fields get a new file, before saving commits it,
+    and which stored files the save stops referencing: replaced, cleared or
+    pointed elsewhere
+    """
+    if raw:
+        return
+    from .images import image_fields, stored_image_names, uploaded_image_fields
+    instance._uploaded_images = uploaded_image_fields(instance)
+    instance._replaced_images = []
+    if instance._state.adding:
+        return
+    deferred = instance.get_deferred_fields()
+    written = [
+        name for name in image_fields(instance)
+        if name not in deferred and (update_fields is None or name in update_fields)
+    ]
+    previous = stored_image_names(instance, written, using or 'default')
+    instance._replaced_images = [
+        name for field_name, name in previous.items() if name and name != getattr(instance, field_name).name
+    ]
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_save, sender=FeedbackResponse)
+def schedule_image_renditions(sender, instance, raw=False, using=None, **kwargs):
+    """Generate thumbnails and previews for new uploads and release the files no longer used"""
+    from .images import remember_stored_images, schedule_renditions
+    using = using or 'default'
+    for field_name in getattr(instance, '_uploaded_images', ()):
+        schedule_renditions(getattr(instance, field_name), using=using)
+    for name in getattr(instance, '_replaced_images', ()):
+        content_storage.release(name)
+    instance._uploaded_images = instance._replaced_images = []
+    if not raw:
+        remember_stored_images(instance)
+
+@receiver(post_delete, sender=Feedback)
+@receiver(post_delete, sender=FeedbackResponse)
+def release_stored_images(sender, instance, using=None, **kwargs):
+    """Drop the deleted row's references to its stored images with the delete"""
+    from .images import image_fields
+    for field_name in image_fields(instance):
+        file = getattr(instance, field_name)
+        if file and hasattr(file.storage, 'release'):
+            file.storage.release(file.name)
+
 @receiver(post_migrate)
 def create_default_categories(sender, **kwargs):
     """
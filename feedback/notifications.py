@@ -0,0 +1,272 @@
+"""
+Notification fan-out.
+
+Writers describe what happened with lightweight ``NotificationEvent`` tuples
+and ``publish`` them. That costs one ``bulk_create`` of ``PendingNotification``
+rows in the writer's transaction, so an event exists exactly when the change
+that caused it commits, and survives a restart or crash. Once the transaction
+commits, ``dispatcher`` is woken. It is a background thread that waits briefly
+for more events, then claims pending rows and turns the whole batch into
+``Notification`` rows with one feedback lookup and one ``bulk_create``.
+
+Rows are claimed with a lease, as in the email outbox
+(``authentication.outbox``). Rows left by a process that stopped, or held by
+one that died until its lease runs out, go with the next batch any process
+delivers; ``manage.py deliver_notifications`` delivers them when nothing else
+is being published.
+
+Within a batch, repeats of the same notification are dropped. Bursts of the
+same kind for one user, such as a bulk resolve, become a single summary
+notification.
+
+Unread badges are counted from the table on the (user, is_read) index, so
+they are right in every process the moment a write commits.
+"""
+import atexit
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from college_feedback_system.utils.logging import logger
+
+CREATED = 'feedback_created'
+ASSIGNED = 'feedback_assigned'
+STATUS_CHANGED = 'feedback_status_changed'
+COMMENTED = 'feedback_comment'
+
+# kind: one of the constants above; actor_id: who caused it, never notified;
+# target_id: the user an assignment went to; status: the new status
+NotificationEvent = namedtuple(
+    'NotificationEvent', 'kind feedback_id actor_id target_id status',
+    defaults=(None, None, None)
+)
+
+# More notifications than this of one kind for one user in a batch are
+# collapsed into a summary
+COALESCE_THRESHOLD = 5
+BATCH_SIZE = 500
+# How long the dispatcher waits for more events before writing a batch
+LINGER_SECONDS = 0.05
+LEASE_SECONDS = 5 * 60
+
+
+def transition_events(feedback_id, previous, current, actor_id=None):
+    """Events for one feedback moving between ``counter_state`` tuples"""
+    _, admin_id, status, _ = current
+    if previous is None:
+        return [NotificationEvent(CREATED, feedback_id, actor_id)]
+    events = []
+    if admin_id is not None and admin_id != previous[1]:
+        events.append(NotificationEvent(ASSIGNED, feedback_id, actor_id, target_id=admin_id))
+    if status != previous[2]:
+        events.append(NotificationEvent(STATUS_CHANGED, feedback_id, actor_id, status=status))
+    return events
+
+
+def publish(events, using='default'):
+    """Store events in the current transaction; they are delivered once it commits"""
+    from .models import PendingNotification
+
+    pending = [
+        PendingNotification(
+            kind=event.kind, feedback_id=event.feedback_id, actor_id=event.actor_id,
+            target_id=event.target_id, status=event.status or ''
+        )
+        for event in events
+    ]
+    if pending:
+        PendingNotification.objects.using(using).bulk_create(pending, batch_size=BATCH_SIZE)
+        transaction.on_commit(dispatcher.wake, using=using)
+
+
+def build_notifications(events, feedbacks):
+    """
+    Turn events into unsaved Notification rows. ``feedbacks`` maps feedback
+    id to ``{'title', 'student_id', 'assigned_admin_id'}``.
+    """
+    from .models import Notification
+
+    wanted = OrderedDict()
+    for event in events:
+        feedback = feedbacks.get(event.feedback_id)
+        if feedback is None:
+            # Deleted before delivery
+            continue
+        for user_id, message in recipients(event, feedback):
+            if user_id is not None and user_id != event.actor_id:
+                # Later events replace earlier ones for the same notification
+                wanted.pop((user_id, event.kind, event.feedback_id), None)
+                wanted[(user_id, event.kind, event.feedback_id)] = message
+
+    grouped = defaultdict(list)
+    for (user_id, kind, feedback_id), message in wanted.items():
+        grouped[(user_id, kind)].append((feedback_id, message))
+
+    notifications = []
+    for (user_id, kind), items in grouped.items():
+        if len(items) > COALESCE_THRESHOLD:
+            feedback_id = items[-1][0]
+            items = [(feedback_id, summary(kind, len(items)))]
+        notifications.extend(
+            Notification(user_id=user_id, feedback_id=feedback_id, notification_type=kind, message=message)
+            for feedback_id, message in items
+        )
+    return notifications
+
+
+def recipients(event, feedback):
+    """(user id, message) pairs an event should reach"""
+    from .models import Feedback
+
+    title = feedback['title']
+    if event.kind == CREATED:
+        return [(feedback['assigned_admin_id'], f'New feedback submitted: "{title}"')]
+    if event.kind == ASSIGNED:
+        return [(event.target_id, f'Feedback assigned to you: "{title}"')]
+    if event.kind == STATUS_CHANGED:
+        label = dict(Feedback.STATUS_CHOICES).get(event.status, event.status).lower()
+        return [(feedback['student_id'], f'Your feedback "{title}" is now {label}')]
+    if event.kind == COMMENTED:
+        message = f'New comment on "{title}"'
+        return [(feedback['student_id'], message), (feedback['assigned_admin_id'], message)]
+    return []
+
+
+def summary(kind, count):
+    return {
+        CREATED: f'{count} new feedback submitted',
+        ASSIGNED: f'{count} feedback assigned to you',
+        STATUS_CHANGED: f'{count} of your feedback changed status',
+        COMMENTED: f'{count} feedback have new comments',
+    }[kind]
+
+
+def deliver(events):
+    """Write the notifications for a batch of events: two queries"""
+    from .models import Feedback, Notification
+
+    ids = {event.feedback_id for event in events}
+    feedbacks = {
+        row['id']: row for row in
+        Feedback.objects.filter(id__in=ids).values('id', 'title', 'student_id', 'assigned_admin_id')
+    }
+    notifications = build_notifications(events, feedbacks)
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    if notifications:
+        from .events import broadcaster
+        broadcaster.wake()
+    return notifications
+
+
+def claim_events(batch_size=BATCH_SIZE):
+    """Lease up to ``batch_size`` due pending events to this worker; returns (token, events)"""
+    from .models import PendingNotification
+
+    now = timezone.now()
+    due = PendingNotification.objects.filter(next_attempt_at__lte=now)
+    ids = list(due.order_by('id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return None, []
+    token = uuid.uuid4().hex
+    # Rows another worker claimed in the meantime no longer match
+    due.filter(id__in=ids).update(claimed_by=token, next_attempt_at=now + timedelta(seconds=LEASE_SECONDS))
+    rows = PendingNotification.objects.filter(claimed_by=token).order_by('id')
+    return token, [
+        NotificationEvent(row.kind, row.feedback_id, row.actor_id, row.target_id, row.status or None)
+        for row in rows
+    ]
+
+
+def drain_events(batch_size=BATCH_SIZE):
+    """Deliver every due pending event, batch by batch. Returns how many were delivered."""
+    from .models import PendingNotification
+
+    delivered = 0
+    while True:
+        token, events = claim_events(batch_size)
+        if not events:
+            return delivered
+        # Notifications and the removal of their events commit together
+        with transaction.atomic():
+            deliver(events)
+            PendingNotification.objects.filter(claimed_by=token).delete()
+        delivered += len(events)
+
+
+def unread_count(user_id):
+    """Unread notifications for a user: one COUNT over the (user, is_read) index"""
+    from .models import Notification
+
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def mark_read(user, ids=None, up_to=None):
+    """
+    Mark a user's unread notifications read with one UPDATE: all of them,
+    those with ``id <= up_to``, or those in ``ids``. Returns how many changed.
+    """
+    from .models import Notification
+
+    queryset = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    if up_to is not None:
+        queryset = queryset.filter(id__lte=up_to)
+    return queryset.update(is_read=True)
+
+
+class NotificationDispatcher:
+    """
+    Delivers pending events from a daemon thread, so requests never wait on
+    notification writes. With ``NOTIFICATIONS_ASYNC = False`` events are
+    delivered inline instead, which is what tests and scripts want.
+    """
+    def __init__(self):
+        self.wakeup = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def wake(self):
+        if not getattr(settings, 'NOTIFICATIONS_ASYNC', True):
+            drain_events()
+            return
+        self.start()
+        self.idle.clear()
+        self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='notification-dispatcher', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+            # Let events from concurrent commits join this batch
+            time.sleep(LINGER_SECONDS)
+            self.wakeup.clear()
+            try:
+                drain_events()
+            except Exception:
+                logger.exception("notification_delivery_failed")
+            finally:
+                close_old_connections()
+            if not self.wakeup.is_set():
+                self.idle.set()
+
+    def flush(self, timeout=5):
+        """Wait until every event this process woke the dispatcher for has been delivered"""
+        self.idle.wait(timeout)
+
+
+dispatcher = NotificationDispatcher()
+atexit.register(dispatcher.flush)
@@ -0,0 +1,157 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class FeedbackCursorPagination(BasePagination):
+    """
+    Keyset pagination over (created_at, id), newest first, or over
+    (search_rank, id) when the queryset carries a full-text search rank.
+
+    Cursors are opaque tokens holding the position of the boundary row and
+    the direction of travel, so every page is a single range read on the
+    index and no COUNT(*) or OFFSET is ever issued.
+    """
+    ordering = ('-created_at', '-id')
+    search_ordering = ('search_rank', 'id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.active_ordering = self.get_ordering(queryset)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            reverse = False
+        else:
+            position, pk, reverse = self.cursor
+            queryset = queryset.filter(self.get_position_filter(position, pk, reverse))
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+
+        # Fetch one extra row to learn whether another page exists
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, queryset):
+        """Ranked search results are walked by relevance instead of date"""
+        if 'search_rank' in queryset.query.annotations:
+            return self.search_ordering
+        return self.ordering
+
+    def get_order_by(self, reverse):
+        if not reverse:
+            return self.active_ordering
+        return [field[1:] if field.startswith('-') else '-' + field for field in self.active_ordering]
+
+    def get_position_filter(self, position, pk, reverse):
+        """Rows strictly after (position, pk) in the direction of travel"""
+        field = self.active_ordering[0].lstrip('-')
+        descending = self.active_ordering[0].startswith('-')
+        lookup = 'lt' if descending != reverse else 'gt'
+        return (
+            Q(**{f'{field}__{lookup}': position}) |
+            Q(**{field: position, f'id__{lookup}': pk})
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """Turn the opaque cursor query parameter back into a position"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = self.decode_position(data['p'])
+            pk = int(data['i'])
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, pk, reverse
+
+    def decode_position(self, value):
+        if self.active_ordering[0].lstrip('-') == 'created_at':
+            return parse_datetime(value)
+        return float(value)
+
+    def encode_position(self, obj):
+        value = getattr(obj, self.active_ordering[0].lstrip('-'))
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, obj, reverse=False):
+        data = {'p': self.encode_position(obj), 'i': obj.pk}
+        if reverse:
+            data['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # An empty backwards page: restart from the newest rows
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,187 @@
+"""
+Time-bucketed feedback rollups for trend charts.
+
+``FeedbackTrendRollup`` stores hourly and daily event counts per category and
+status. ``Feedback.save()`` bumps the matching buckets in the same
+transaction as the write, so a trend over any range is one indexed range read
+of at most one row per bucket and dimension. Weekly and monthly series are
+grouped from the daily rows in the same query.
+
+Writes that bypass ``save()`` must call ``record_event_counts`` themselves, or
+run ``manage.py backfill_feedback_rollups`` afterwards.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from college_feedback_system.utils.caching import bump_generation
+
+from .counters import increment_rows
+from .models import CACHE_SCOPE, Feedback, FeedbackTrendRollup
+
+HOUR = 'hour'
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+GRANULARITIES = (HOUR, DAY, WEEK, MONTH)
+
+# Rollup table each requested granularity is read from
+SOURCE_GRANULARITY = {
+    HOUR: FeedbackTrendRollup.HOUR,
+    DAY: FeedbackTrendRollup.DAY,
+    WEEK: FeedbackTrendRollup.DAY,
+    MONTH: FeedbackTrendRollup.DAY,
+}
+
+
+def floor_bucket(moment, granularity):
+    """Start of the UTC bucket that contains ``moment``"""
+    moment = moment.astimezone(dt_timezone.utc)
+    if granularity == HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == WEEK:
+        return moment - timedelta(days=moment.weekday())
+    if granularity == MONTH:
+        return moment.replace(day=1)
+    return moment
+
+
+def next_bucket(bucket, granularity):
+    if granularity == HOUR:
+        return bucket + timedelta(hours=1)
+    if granularity == DAY:
+        return bucket + timedelta(days=1)
+    if granularity == WEEK:
+        return bucket + timedelta(weeks=1)
+    if bucket.month == 12:
+        return bucket.replace(year=bucket.year + 1, month=1)
+    return bucket.replace(month=bucket.month + 1)
+
+
+def record_events(feedback, previous, current, using='default'):
+    """
+    Count the creation or status change of one feedback.
+
+    ``previous`` and ``current`` are ``feedback.counters.counter_state``
+    tuples; ``previous`` is None for a new feedback.
+    """
+    status, category = current[2], current[3]
+    if previous is None:
+        event, moment = FeedbackTrendRollup.CREATED, feedback.created_at
+    elif previous[2] != status:
+        event = FeedbackTrendRollup.STATUS_CHANGED
+        moment = feedback.resolved_at if status == Feedback.RESOLVED and feedback.resolved_at else timezone.now()
+    else:
+        return
+    record_event_counts(Counter({(event, moment, category, status): 1}), using=using)
+
+
+def record_event_counts(events, using='default'):
+    """
+    Add ``{(event, moment, category, status): n}`` to the hourly and daily
+    buckets. Bulk writers pass all their events at once.
+    """
+    deltas = Counter()
+    for (event, moment, category, status), n in events.items():
+        for granularity in (FeedbackTrendRollup.HOUR, FeedbackTrendRollup.DAY):
+            deltas[(granularity, event, floor_bucket(moment, granularity), category, status)] += n
+
+    with transaction.atomic(using=using):
+        increment_rows(FeedbackTrendRollup, ('granularity', 'event', 'bucket', 'category', 'status'), deltas,
+                       using=using)
+
+
+def feedback_trends(start, end, granularity=DAY, event=FeedbackTrendRollup.CREATED,
+                    category=None, status=None):
+    """
+    Return ``[{'period': datetime, 'count': int}, ...]`` for every bucket
+    between ``start`` and ``end``, including empty ones.
+    """
+    first = floor_bucket(start, granularity)
+    rows = FeedbackTrendRollup.objects.filter(
+        granularity=SOURCE_GRANULARITY[granularity],
+        event=event,
+        bucket__gte=first,
+        bucket__lte=end,
+    )
+    if category:
+        rows = rows.filter(category=category)
+    if status:
+        rows = rows.filter(status=status)
+
+    if granularity == WEEK:
+        rows = rows.annotate(period=TruncWeek('bucket', tzinfo=dt_timezone.utc))
+    elif granularity == MONTH:
+        rows = rows.annotate(period=TruncMonth('bucket', tzinfo=dt_timezone.utc))
+    else:
+        rows = rows.annotate(period=F('bucket'))
+
+    totals = {
+        row['period']: row['total']
+        for row in rows.values('period').annotate(total=Sum('count')).order_by()
+    }
+
+    trends = []
+    bucket = first
+    while bucket <= end:
+        trends.append({'period': bucket, 'count': totals.get(bucket, 0)})
+        bucket = next_bucket(bucket, granularity)
+    return trends
+
+
+def backfill_rollups(since=None, using='default'):
+    """
+    Rebuild the rollups from the feedback table, optionally only for buckets
+    starting at ``since``, counting what ``Feedback.save()`` would have.
+    Status changes are taken from ``resolved_at`` when it is later than
+    ``created_at``; such feedback was created pending. Any other feedback is
+    counted as created in its current status.
+    """
+    feedbacks = Feedback.objects.using(using)
+    rollups = FeedbackTrendRollup.objects.using(using)
+    resolved_later = Q(resolved_at__gt=F('created_at'))
+    sources = [
+        (FeedbackTrendRollup.CREATED, 'created_at', Q(),
+         Case(When(resolved_later, then=Value(Feedback.PENDING)), default=F('status'))),
+        (FeedbackTrendRollup.STATUS_CHANGED, 'resolved_at', resolved_later, Value(Feedback.RESOLVED)),
+    ]
+    truncs = [
+        (FeedbackTrendRollup.HOUR, TruncHour),
+        (FeedbackTrendRollup.DAY, TruncDay),
+    ]
+
+    new_rows = []
+    for event, field, condition, status in sources:
+        matching = feedbacks.filter(condition, **{f'{field}__isnull': False})
+        if since is not None:
+            matching = matching.filter(**{f'{field}__gte': floor_bucket(since, DAY)})
+        for granularity, trunc in truncs:
+            grouped = (
+                matching
+                .annotate(bucket=trunc(field, tzinfo=dt_timezone.utc), event_status=status)
+                .values('bucket', 'category', 'event_status')
+                .annotate(n=Count('id'))
+                .order_by()
+            )
+            new_rows.extend(
+                FeedbackTrendRollup(
+                    granularity=granularity, event=event, bucket=row['bucket'],
+                    category=row['category'], status=row['event_status'], count=row['n']
+                )
+                for row in grouped
+            )
+
+    with transaction.atomic(using=using):
+        stale = rollups.all()
+        if since is not None:
+            stale = stale.filter(bucket__gte=floor_bucket(since, DAY))
+        stale.delete()
+        rollups.bulk_create(new_rows, batch_size=500)
+        # Cached trend responses were built from the old rows
+        bump_generation(CACHE_SCOPE)
+    return len(new_rows)
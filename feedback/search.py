@@ -0,0 +1,209 @@
+"""
+Full-text search over feedback.
+
+On SQLite the ``feedback_feedback_fts`` FTS5 table (see migration 0004) holds
+one row per feedback with its title, description, comments and public
+responses, kept in sync by triggers. Other backends fall back to
+``icontains`` lookups across the same fields.
+
+SQLite drops a table's triggers when a migration rebuilds it, so a rebuilt
+``feedback_feedback`` silently stops updating the index; the
+``feedback.E001`` check reports any that are missing.
+"""
+import re
+import weakref
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'feedback_feedback_fts'
+
+# Created alongside the index in migration 0004
+SYNC_TRIGGERS = (
+    'feedback_fts_insert',
+    'feedback_fts_update',
+    'feedback_fts_delete',
+    'feedback_fts_comment_insert',
+    'feedback_fts_comment_update',
+    'feedback_fts_comment_delete',
+    'feedback_fts_response_insert',
+    'feedback_fts_response_update',
+    'feedback_fts_response_delete',
+)
+
+# bm25() weights for the title, description, comments and responses columns
+RANK_WEIGHTS = (10.0, 4.0, 1.0, 1.0)
+
+# snippet() wraps hits in these control characters; they are swapped for
+# <mark> tags only after the surrounding text has been HTML-escaped
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 16
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# Whether each open connection has the index, looked up once per connection
+_fts_state = weakref.WeakKeyDictionary()
+
+
+def fts_enabled(using='default'):
+    """Return True if the FTS5 index exists on this database"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    enabled = _fts_state.get(connection)
+    if enabled is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE]
+            )
+            enabled = _fts_state[connection] = cursor.fetchone() is not None
+    return enabled
+
+
+def forget_fts_state(sender, connection=None, using=None, **kwargs):
+    # A new connection may point at a different (e.g. test) database, and a
+    # migration may have created or dropped the index
+    _fts_state.pop(connection or connections[using], None)
+
+
+connection_created.connect(forget_fts_state)
+post_migrate.connect(forget_fts_state)
+
+
+def missing_sync_triggers(using='default'):
+    """Return the names of the index's sync triggers absent from the database"""
+    if not fts_enabled(using):
+        return []
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        present = {name for name, in cursor.fetchall()}
+    return [name for name in SYNC_TRIGGERS if name not in present]
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 query.
+
+    Every word is quoted so user input can never be parsed as FTS syntax,
+    and each one is matched as a prefix so partial words still hit.
+    """
+    terms = TERM_RE.findall(text or '')
+    if not terms:
+        return None
+    return ' '.join('"%s"*' % term for term in terms)
+
+
+def search_filter(text, using='default'):
+    """Return a Q object matching feedback for the given search text"""
+    match = build_match_query(text)
+    if match is None:
+        return Q()
+
+    if fts_enabled(using):
+        return _fts_filter(match)
+
+    query = Q()
+    for term in TERM_RE.findall(text):
+        query &= (
+            Q(title__icontains=term) |
+            Q(description__icontains=term) |
+            Q(comments__comment__icontains=term) |
+            Q(responses__content__icontains=term, responses__is_internal=False)
+        )
+    return query
+
+
+def search_feedback(queryset, text):
+    """
+    Filter a Feedback queryset down to matches for ``text``.
+
+    With FTS5 the result is annotated with ``search_rank`` (lower is more
+    relevant) and ordered by it; otherwise the default ordering is kept.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return queryset
+
+    if not fts_enabled(queryset.db):
+        return queryset.filter(search_filter(text, queryset.db)).distinct()
+
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    rank = RawSQL(
+        f'SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = "feedback_feedback"."id"',
+        [match],
+        output_field=FloatField()
+    )
+    return (
+        queryset
+        .filter(_fts_filter(match))
+        .annotate(search_rank=rank)
+        .order_by('search_rank', 'id')
+    )
+
+
+def _fts_filter(match):
+    return Q(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match]
+    ))
+
+
+def attach_snippets(feedbacks, text):
+    """
+    Set ``search_snippet`` on each feedback to an HTML-safe excerpt with the
+    matched terms wrapped in <mark>. Snippets are only built for the rows
+    being displayed, in one query.
+    """
+    feedbacks = list(feedbacks)
+    match = build_match_query(text)
+    if match is None or not feedbacks:
+        return feedbacks
+
+    using = feedbacks[0]._state.db or 'default'
+    if fts_enabled(using):
+        ids = [feedback.id for feedback in feedbacks]
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+                [HIGHLIGHT_START, HIGHLIGHT_END, match, *ids]
+            )
+            snippets = dict(cursor.fetchall())
+    else:
+        terms = TERM_RE.findall(text)
+        snippets = {
+            feedback.id: _plain_snippet(feedback, terms) for feedback in feedbacks
+        }
+
+    for feedback in feedbacks:
+        feedback.search_snippet = render_snippet(snippets.get(feedback.id, ''))
+    return feedbacks
+
+
+def render_snippet(raw):
+    """Escape a raw snippet and turn the highlight markers into <mark> tags"""
+    html = escape(raw)
+    html = html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+def _plain_snippet(feedback, terms):
+    """Backend-agnostic snippet taken from the title or description"""
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    for source in (feedback.title or '', feedback.description or ''):
+        hit = pattern.search(source)
+        if hit is None:
+            continue
+        words = source[max(0, hit.start() - 60):hit.end() + 60]
+        return pattern.sub(lambda m: HIGHLIGHT_START + m.group(0) + HIGHLIGHT_END, words)
+    return ''
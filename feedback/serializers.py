@@ -1,5 +1,10 @@
-from rest_framework import serializers
-from .models import Feedback, FeedbackResponse
+from django.db import transaction
+from rest_framework import permissions, serializers
+from .models import Feedback, FeedbackResponse, Notification
+from .assignment import pick_admin
+from .bulk import MAX_BATCH_SIZE
+from .images import ready_renditions, rendition_urls
+from .export import CSV, FORMATS as EXPORT_FORMATS
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -9,51 +14,227 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'user_type']
 
-class FeedbackSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Trims the serializer to ``?fields=a,b`` and nests related users for
+    ``?expand=relation``. ``sparse_columns`` turns the same parameters into
+    the columns a view should load with ``only()``.
+    
+    ``expandable_fields`` maps a relation to the serializer it expands into;
+    ``field_columns`` lists the model columns a computed field reads.
+    """
+    expandable_fields = {}
+    field_columns = {}
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = self.requested_fields(self.context.get('request'))
+        for name in expand:
+            self.fields[name] = self.expandable_fields[name](read_only=True)
+        if fields is not None:
+            for name in set(self.fields) - fields - expand:
+                self.fields.pop(name)
+    
+    @classmethod
+    def requested_fields(cls, request):
+        """
+        Return (field names or None for all, relations to expand). Writes
+        always use every field, so ?fields= can't drop one from validation.
+        """
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None, set()
+        params = request.query_params
+        expand = set(cls.split_param(params.get('expand'))) & set(cls.expandable_fields)
+        if 'fields' not in params:
+            return None, expand
+        fields = set(cls.split_param(params['fields'])) & set(cls.Meta.fields)
+        # The id is always sent so clients can key their rows
+        return fields | {'id'}, expand
+    
+    @staticmethod
+    def split_param(value):
+        return [name.strip() for name in (value or '').split(',') if name.strip()]
+    
+    @classmethod
+    def sparse_columns(cls, request):
+        """
+        Return (columns for only() or None to load everything, relations to
+        select_related) for the fields the request asked for.
+        """
+        fields, expand = cls.requested_fields(request)
+        related = set()
+        columns = set()
+        for name in (fields if fields is not None else set(cls.Meta.fields)) | expand:
+            if name in expand:
+                serializer = cls.expandable_fields[name]
+                names = [f'{name}__{field}' for field in serializer.Meta.fields]
+            else:
+                names = cls.field_columns.get(name, (name,))
+            for column in names:
+                if '__' in column:
+                    related.add(column.split('__')[0])
+                columns.add(column)
+        if fields is None:
+            return None, related
+        return sorted(columns), related
+
+class RenditionUrlsMixin:
+    """
+    Rendition URLs for an image field, pointing at the original until the
+    renditions exist. Readiness of every row being serialized is read with
+    one query.
+    """
+    def rendition_urls(self, file):
+        if not file:
+            return None
+        ready = getattr(self, '_ready_renditions', None)
+        if ready is None:
+            many = isinstance(self.parent, serializers.ListSerializer)
+            rows = self.parent.instance if many else [self.instance]
+            field_name = file.field.name
+            ready = self._ready_renditions = ready_renditions(
+                [getattr(row, field_name).name for row in rows or () if getattr(row, field_name)]
+            )
+        return rendition_urls(file, self.context.get('request'), ready=file.name in ready)
+
+class FeedbackSerializer(SparseFieldsetMixin, RenditionUrlsMixin, serializers.ModelSerializer):
     student_name = serializers.SerializerMethodField()
+    photo_renditions = serializers.SerializerMethodField()
+    
+    expandable_fields = {'student': UserSerializer, 'assigned_admin': UserSerializer}
+    field_columns = {
+        'student_name': ('student__first_name', 'student__last_name', 'student__email'),
+        'photo_renditions': ('photo',),
+    }
     
     class Meta:
         model = Feedback
         fields = [
-            'id', 'title', 'description', 'category', 'photo', 
+            'id', 'title', 'description', 'category', 'photo', 'photo_renditions',
             'status', 'student', 'student_name', 'assigned_admin',
             'created_at', 'updated_at', 'resolved_at'
         ]
         read_only_fields = ['student', 'assigned_admin', 'status', 'resolved_at']
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Present only on search results, see feedback.search.attach_snippets
+        if hasattr(instance, 'search_snippet'):
+            data['search_snippet'] = instance.search_snippet
+        return data
+    
     def get_student_name(self, obj):
         return f"{obj.student.first_name} {obj.student.last_name}" if obj.student.first_name or obj.student.last_name else obj.student.email
     
+    def get_photo_renditions(self, obj):
+        """Thumbnail and preview URLs, see feedback.images"""
+        return self.rendition_urls(obj.photo)
+    
     def create(self, validated_data):
         # Set the student to the current user
         validated_data['student'] = self.context['request'].user
         
-        # Assign an admin based on the feedback category
-        category = validated_data.get('category')
-        admin_users = User.objects.filter(user_type='admin')
-        
-        if admin_users.exists():
-            # Simple round-robin assignment - in a real app, you'd have more complex logic
-            admin_index = Feedback.objects.count() % admin_users.count()
-            validated_data['assigned_admin'] = admin_users[admin_index]
-        
-        return super().create(validated_data)
+        # The admin claim only holds if the feedback is saved in the same
+        # transaction, see feedback.assignment
+        with transaction.atomic():
+            validated_data['assigned_admin_id'] = pick_admin()
+            return super().create(validated_data)
 
-class FeedbackResponseSerializer(serializers.ModelSerializer):
+class FeedbackResponseSerializer(SparseFieldsetMixin, RenditionUrlsMixin, serializers.ModelSerializer):
     responder_name = serializers.SerializerMethodField()
+    attachment_renditions = serializers.SerializerMethodField()
+    
+    expandable_fields = {'responder': UserSerializer}
+    field_columns = {
+        'responder_name': ('responder__first_name', 'responder__last_name', 'responder__email'),
+        'attachment_renditions': ('attachment',),
+    }
     
     class Meta:
         model = FeedbackResponse
         fields = [
             'id', 'feedback', 'responder', 'responder_name', 
-            'content', 'created_at', 'is_internal', 'attachment'
+            'content', 'created_at', 'is_internal', 'attachment', 'attachment_renditions'
         ]
         read_only_fields = ['responder', 'created_at']
     
     def get_responder_name(self, obj):
         return f"{obj.responder.first_name} {obj.responder.last_name}" if obj.responder.first_name or obj.responder.last_name else obj.responder.email
     
+    def get_attachment_renditions(self, obj):
+        """Thumbnail and preview URLs, see feedback.images"""
+        return self.rendition_urls(obj.attachment)
+    
     def create(self, validated_data):
         # Set the responder to the current user
         validated_data['responder'] = self.context['request'].user
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data) 
+
+class BulkStatusFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Feedback.STATUS_CHOICES, required=False)
+    category = serializers.ChoiceField(choices=Feedback.CATEGORY_CHOICES, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    
+    @staticmethod
+    def apply(queryset, selection):
+        lookups = {
+            'status': selection.get('status'),
+            'category': selection.get('category'),
+            'created_at__gte': selection.get('created_after'),
+            'created_at__lt': selection.get('created_before'),
+        }
+        return queryset.filter(**{key: value for key, value in lookups.items() if value is not None})
+
+class BulkStatusSerializer(serializers.Serializer):
+    """Target status plus either an id list or a filter selecting the feedback"""
+    status = serializers.ChoiceField(choices=Feedback.STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+    filter = BulkStatusFilterSerializer(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        return data
+    
+    def filter_queryset(self, queryset):
+        if 'ids' in self.validated_data:
+            return queryset.filter(id__in=self.validated_data['ids'])
+        return BulkStatusFilterSerializer.apply(queryset, self.validated_data['filter'])
+
+class ExportQuerySerializer(BulkStatusFilterSerializer):
+    """Query parameters of a feedback export"""
+    output = serializers.ChoiceField(choices=list(EXPORT_FORMATS), default=CSV)
+    gzip = serializers.BooleanField(default=False)
+    
+    def filter_queryset(self, queryset):
+        return self.apply(queryset, self.validated_data)
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'feedback', 'notification_type', 'message', 'is_read', 'created_at']
+        read_only_fields = fields
+
+class MarkReadSerializer(serializers.Serializer):
+    """Exactly one of all, up_to or ids"""
+    all = serializers.BooleanField(required=False)
+    up_to = serializers.IntegerField(min_value=1, required=False)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+    
+    def validate(self, data):
+        chosen = [name for name in ('all', 'up_to', 'ids') if data.get(name)]
+        if len(chosen) != 1:
+            raise serializers.ValidationError("Provide exactly one of all, up_to or ids.")
+        return data
@@ -0,0 +1,150 @@
+"""
+Content-addressed storage for uploaded images.
+
+Files are named by the SHA-256 of their content and sharded two levels deep,
+e.g. ``content/3f/a9/3fa9...e1.jpg``, so no directory grows past a few
+hundred entries. Uploading content that is already stored writes nothing;
+the existing file is shared, and ``StoredContent`` counts how many model
+fields reference it.
+
+References are taken and dropped under a lock on the ``StoredContent`` row,
+in the transaction that saves or deletes the referencing row, so they roll
+back with it. A file and its derived renditions are only deleted after the
+last reference to them is committed, and only if no upload took the content
+again in the meantime.
+
+Uploads arrive with the hash the streaming upload handler computed while
+receiving them; other content is hashed here.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+CONTENT_ROOT = 'content'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_name(digest, extension):
+    return f'{CONTENT_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def digest_of(name):
+    """The content hash a content-addressed name (or a derivative of it) starts with"""
+    return os.path.basename(name).split('.', 1)[0]
+
+
+def hash_content(content):
+    hasher = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct content once under its hash. Names already under
+    ``CONTENT_ROOT``, i.e. derivatives such as thumbnails, are written as
+    given.
+    """
+    def get_available_name(self, name, max_length=None):
+        # Names are decided in _save and may legitimately exist already
+        return name
+
+    def _save(self, name, content):
+        if name.startswith(CONTENT_ROOT + '/'):
+            self._write(name, content)
+            return name
+
+        digest = getattr(content, 'content_hash', None) or hash_content(content)
+        name = self.acquire(digest, content_name(digest, os.path.splitext(name)[1].lower()), content.size)
+        if not self.exists(name):
+            self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        """Write via a temporary sibling and an atomic rename, so readers never see a partial file"""
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temp_path = f'{full_path}.{uuid.uuid4().hex}.part'
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                file_move_safe(content.temporary_file_path(), temp_path)
+            else:
+                with open(temp_path, 'wb') as destination:
+                    for chunk in content.chunks():
+                        destination.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def acquire(self, digest, name, size):
+        """
+        Add a reference to ``digest`` in the current transaction and return
+        the name it is stored under
+        """
+        from .models import StoredContent
+
+        for _ in range(2):
+            with transaction.atomic():
+                row = StoredContent.objects.select_for_update().filter(pk=digest).first()
+                if row is not None:
+                    # Also revives content released but not yet purged
+                    StoredContent.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1)
+                    return row.name
+                try:
+                    with transaction.atomic():
+                        StoredContent.objects.create(content_hash=digest, name=name, size=size, ref_count=1)
+                    return name
+                except IntegrityError:
+                    # Stored concurrently; take a reference to that row instead
+                    continue
+        raise IntegrityError(f'Could not reference stored content {digest}')
+
+    def release(self, name):
+        """
+        Drop one reference to ``name`` in the current transaction. Once the
+        last one is committed, the file and its derivatives are purged.
+        """
+        from .models import StoredContent
+
+        if not name or not name.startswith(CONTENT_ROOT + '/'):
+            # Stored before content addressing; left alone
+            return
+        digest = digest_of(name)
+        with transaction.atomic():
+            row = StoredContent.objects.select_for_update().filter(pk=digest).first()
+            if row is None or not row.ref_count:
+                return
+            StoredContent.objects.filter(pk=digest).update(ref_count=F('ref_count') - 1)
+            if row.ref_count == 1:
+                transaction.on_commit(lambda: self.purge(digest))
+
+    def purge(self, digest):
+        """Delete unreferenced content and its derivatives, holding the row lock meanwhile"""
+        from .models import StoredContent
+
+        with transaction.atomic():
+            row = StoredContent.objects.select_for_update().filter(pk=digest, ref_count=0).first()
+            if row is None:
+                # Referenced again since it was released
+                return
+            directory = os.path.dirname(row.name)
+            prefix = os.path.basename(row.name)
+            _, files = self.listdir(directory)
+            for file_name in files:
+                if file_name == prefix or file_name.startswith(prefix + '.'):
+                    self.delete(f'{directory}/{file_name}')
+            row.delete()
+
+
+content_storage = ContentAddressedStorage()
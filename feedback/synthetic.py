@@ -0,0 +1,361 @@
+"""
+Synthetic load data.
+
+``SyntheticDataGenerator`` writes users, feedback, responses, comments,
+history and notifications shaped like a real college's, for performance
+work. The same seed and settings always produce the same rows, so runs
+against different commits start from the same baseline.
+
+The data is skewed the way production data is:
+
+- a few admins handle most feedback, and some students submit far more
+  than others (Zipf-like weights);
+- submissions follow the academic calendar, with rushes at the start and
+  end of each semester, quiet breaks and weekends, and daytime peaks;
+- older feedback is more likely resolved, and older notifications read.
+
+Rows are written with ``bulk_create`` one batch at a time, so memory stays
+flat at any size. Every user shares one password hash, computed once.
+``bulk_create`` skips ``save()`` and signals, so the status counters, admin
+loads and trend rollups are rebuilt at the end. The full-text index is kept
+in sync by its database triggers.
+"""
+import math
+import random
+import threading
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from college_feedback_system.utils.caching import bump_generation
+
+from .assignment import rebuild_admin_loads
+from .counters import rebuild_counters
+from .models import (
+    CACHE_SCOPE, AdminLoad, Feedback, FeedbackComment, FeedbackHistory, FeedbackResponse, Notification
+)
+from .notifications import COMMENTED, CREATED, STATUS_CHANGED, NotificationEvent, recipients
+from .rollups import backfill_rollups
+
+User = get_user_model()
+
+# A fixed end date, not now(), so a seed always gives the same timestamps
+DEFAULT_END = datetime(2025, 6, 30, tzinfo=dt_timezone.utc)
+DEFAULT_PASSWORD = 'synthetic-password'
+BATCH_SIZE = 5000
+
+# (month, day, length in days) of each semester
+SEMESTERS = ((1, 15, 120), (8, 20, 115))
+# Relative submissions per hour of day (UTC)
+HOUR_WEIGHTS = (
+    1, 1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 15,
+    14, 14, 15, 14, 12, 10, 8, 8, 9, 8, 5, 2,
+)
+CATEGORY_WEIGHTS = {
+    Feedback.ACADEMIC: 5,
+    Feedback.INFRASTRUCTURE: 3,
+    Feedback.ADMINISTRATIVE: 2,
+}
+ADMIN_SKEW = 1.2
+STUDENT_SKEW = 0.8
+# Half of feedback is resolved after about this long
+RESOLUTION_HOURS = 36
+INTERNAL_RESPONSE_RATE = 0.15
+
+FIRST_NAMES = ('Aisha', 'Ben', 'Chen', 'Diego', 'Elena', 'Farah', 'Gabriel', 'Hana', 'Ivan', 'Jamal')
+LAST_NAMES = ('Okafor', 'Smith', 'Wang', 'Garcia', 'Rossi', 'Khan', 'Silva', 'Sato', 'Petrov', 'Brown')
+SUBJECTS = {
+    Feedback.ACADEMIC: ('calculus', 'programming', 'chemistry', 'history', 'statistics', 'physics'),
+    Feedback.INFRASTRUCTURE: ('library', 'computer lab', 'hostel', 'cafeteria', 'wifi', 'parking'),
+    Feedback.ADMINISTRATIVE: ('fee payment', 'transcript', 'scholarship', 'timetable', 'ID card', 'exam form'),
+}
+TITLES = {
+    Feedback.ACADEMIC: ('Need more {} practice sessions', '{} lectures are hard to follow', '{} exam schedule clash'),
+    Feedback.INFRASTRUCTURE: ('The {} needs repairs', '{} is too crowded', 'Extend {} opening hours'),
+    Feedback.ADMINISTRATIVE: ('Delay in {} processing', 'Problem with {}', 'Clarify the {} policy'),
+}
+SENTENCES = (
+    'This has been a problem for several weeks now.',
+    'Many students in my year have the same issue.',
+    'It affects our preparation for the final exams.',
+    'Could someone look into this soon?',
+    'I raised this with the department but heard nothing back.',
+    'A short update on the plan would already help.',
+)
+REPLIES = (
+    'Thanks for reporting this, we are looking into it.',
+    'This has been forwarded to the responsible department.',
+    'Could you share more details about when this happens?',
+    'A fix is scheduled for next week.',
+)
+INTERNAL_NOTES = (
+    'Vendor contacted, waiting on a quote.',
+    'Duplicate of an earlier report.',
+    'Needs sign-off from the dean.',
+)
+
+
+def zipf_weights(count, exponent):
+    """Cumulative weights where the n-th item is picked about 1/n**exponent as often"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def semester_day(day):
+    """(days since the semester started, semester length) for a date in term, else None"""
+    for month, start_day, length in SEMESTERS:
+        for year in (day.year - 1, day.year):
+            offset = (day - date(year, month, start_day)).days
+            if 0 <= offset < length:
+                return offset, length
+    return None
+
+
+def semester_weight(day):
+    """Relative submissions on a date: rushes at semester start and end, quiet breaks"""
+    term = semester_day(day)
+    if term is None:
+        weight = 0.15
+    else:
+        offset, length = term
+        weight = (
+            1
+            + 2.0 * math.exp(-((offset - 14) / 7) ** 2)
+            + 1.5 * math.exp(-((offset - length + 14) / 7) ** 2)
+        )
+    return weight * (0.4 if day.weekday() >= 5 else 1)
+
+
+# Serializes generators in one process around the shared field flags
+_timestamps_lock = threading.Lock()
+
+
+@contextmanager
+def historic_timestamps(model):
+    """
+    Let the ``auto_now``/``auto_now_add`` fields of ``model`` keep the values
+    set on instances. The flags live on the shared field objects, so they
+    are only switched off around a single insert, and always restored.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    with _timestamps_lock:
+        try:
+            for field in fields:
+                field.auto_now = field.auto_now_add = False
+            yield
+        finally:
+            for field, auto_now, auto_now_add in saved:
+                field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def email_domain(seed):
+    return f'seed{seed}.example.edu'
+
+
+class SyntheticDataGenerator:
+    """
+    Generates ``feedback`` feedback from ``students`` students, handled by
+    ``admins`` admins, over the ``days`` days before ``end``. ``responses``
+    and ``comments`` are the mean number per feedback.
+    """
+    def __init__(self, seed=0, students=1000, admins=20, feedback=10000, responses=0.8, comments=1.5,
+                 days=730, end=DEFAULT_END, password=DEFAULT_PASSWORD, batch_size=BATCH_SIZE,
+                 using='default', log=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.students = students
+        self.admins = admins
+        self.feedback = feedback
+        self.responses = responses
+        self.comments = comments
+        self.end = end
+        self.start = end - timedelta(days=days)
+        self.password = password
+        self.batch_size = batch_size
+        self.using = using
+        self.log = log or (lambda message: None)
+        self.written = {}
+
+    def run(self):
+        """Write everything and return {model name: rows written}"""
+        student_ids, admin_ids = self.create_users()
+        self.student_weights = zipf_weights(len(student_ids), STUDENT_SKEW)
+        self.admin_weights = zipf_weights(len(admin_ids), ADMIN_SKEW)
+        self.student_ids, self.admin_ids = student_ids, admin_ids
+
+        feedbacks = self.generate_feedback()
+        while True:
+            batch = list(islice(feedbacks, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic(using=self.using):
+                self.insert(Feedback, batch)
+                self.create_activity(batch)
+            self.log(f"{self.written[Feedback.__name__]} feedback written")
+
+        rebuild_counters(self.using)
+        rebuild_admin_loads(self.using)
+        backfill_rollups(using=self.using)
+        bump_generation(CACHE_SCOPE)
+        return self.written
+
+    def insert(self, model, rows):
+        with historic_timestamps(model):
+            model.objects.using(self.using).bulk_create(rows, batch_size=self.batch_size)
+        self.written[model.__name__] = self.written.get(model.__name__, 0) + len(rows)
+
+    def create_users(self):
+        """Students and admins sharing one pre-computed password hash; returns their ids"""
+        password = make_password(self.password, salt=f'synthetic{self.seed}')
+        domain = email_domain(self.seed)
+        ids = {}
+        for user_type, count in ((User.ADMIN, self.admins), (User.STUDENT, self.students)):
+            created = []
+            for start in range(0, count, self.batch_size):
+                users = [
+                    User(
+                        email=f'{user_type}{number}@{domain}',
+                        username=f'{user_type}{number}',
+                        first_name=self.random.choice(FIRST_NAMES),
+                        last_name=self.random.choice(LAST_NAMES),
+                        user_type=user_type,
+                        is_staff=user_type == User.ADMIN,
+                        password=password,
+                        date_joined=self.start - timedelta(days=self.random.randint(0, 365)),
+                    )
+                    for number in range(start, min(start + self.batch_size, count))
+                ]
+                with transaction.atomic(using=self.using):
+                    self.insert(User, users)
+                created.extend(user.pk for user in users)
+            ids[user_type] = created
+        # bulk_create skips the receiver that gives each admin a load row
+        self.insert(AdminLoad, [AdminLoad(admin_id=admin_id, is_active=True) for admin_id in ids[User.ADMIN]])
+        return ids[User.STUDENT], ids[User.ADMIN]
+
+    def generate_feedback(self):
+        """Unsaved feedback in created_at order, spread over the calendar"""
+        days = [self.start.date() + timedelta(days=offset) for offset in range((self.end - self.start).days)]
+        day_weights = list(accumulate(semester_weight(day) for day in days))
+        hour_weights = list(accumulate(HOUR_WEIGHTS))
+        categories = list(CATEGORY_WEIGHTS)
+        category_weights = list(accumulate(CATEGORY_WEIGHTS.values()))
+
+        made = 0
+        for day, cumulative in zip(days, day_weights):
+            # Each day gets its rounded share of the total, so counts sum exactly
+            due = round(self.feedback * cumulative / day_weights[-1])
+            moments = sorted(
+                datetime.combine(day, time(bisect(hour_weights, self.random.random() * hour_weights[-1])),
+                                 tzinfo=dt_timezone.utc)
+                + timedelta(seconds=self.random.randrange(3600))
+                for _ in range(due - made)
+            )
+            made = due
+            for created_at in moments:
+                yield self.make_feedback(created_at, self.random.choices(categories, cum_weights=category_weights)[0])
+
+    def make_feedback(self, created_at, category):
+        title = self.random.choice(TITLES[category]).format(self.random.choice(SUBJECTS[category]))
+        feedback = Feedback(
+            title=title[0].upper() + title[1:],
+            description=' '.join(self.random.sample(SENTENCES, self.random.randint(1, 3))),
+            category=category,
+            student_id=self.random.choices(self.student_ids, cum_weights=self.student_weights)[0],
+            assigned_admin_id=self.random.choices(self.admin_ids, cum_weights=self.admin_weights)[0],
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        # Feedback open for longer is more likely to have been resolved
+        age_days = (self.end - created_at).total_seconds() / 86400
+        if self.random.random() < 0.9 * (1 - math.exp(-age_days / 10)):
+            resolved_at = created_at + timedelta(
+                hours=self.random.lognormvariate(math.log(RESOLUTION_HOURS), 1.0)
+            )
+            if resolved_at < self.end:
+                feedback.status = Feedback.RESOLVED
+                feedback.resolved_at = feedback.updated_at = resolved_at
+        return feedback
+
+    def count(self, mean):
+        """A geometrically distributed count with the given mean"""
+        count = 0
+        while self.random.random() < mean / (1 + mean):
+            count += 1
+        return count
+
+    def later(self, moment, mean_hours):
+        """A time after ``moment``, capped at the end of the dataset"""
+        return min(moment + timedelta(hours=self.random.expovariate(1 / mean_hours)), self.end)
+
+    def create_activity(self, feedbacks):
+        """Responses, comments, history and notifications for saved feedback"""
+        responses, comments, history, notifications = [], [], [], []
+        for feedback in feedbacks:
+            row = {'title': feedback.title, 'student_id': feedback.student_id,
+                   'assigned_admin_id': feedback.assigned_admin_id}
+            events = [(NotificationEvent(CREATED, feedback.pk, feedback.student_id), feedback.created_at)]
+
+            moment = feedback.created_at
+            for _ in range(self.count(self.responses)):
+                moment = self.later(moment, 24)
+                internal = self.random.random() < INTERNAL_RESPONSE_RATE
+                responses.append(FeedbackResponse(
+                    feedback_id=feedback.pk,
+                    responder_id=feedback.assigned_admin_id,
+                    content=self.random.choice(INTERNAL_NOTES if internal else REPLIES),
+                    is_internal=internal,
+                    created_at=moment,
+                    updated_at=moment,
+                ))
+                if not internal:
+                    events.append((NotificationEvent(COMMENTED, feedback.pk, feedback.assigned_admin_id), moment))
+
+            moment = feedback.created_at
+            for number in range(self.count(self.comments)):
+                moment = self.later(moment, 12)
+                author_id = feedback.student_id if number % 2 == 0 else feedback.assigned_admin_id
+                comments.append(FeedbackComment(
+                    feedback_id=feedback.pk, user_id=author_id,
+                    comment=self.random.choice(SENTENCES), created_at=moment,
+                ))
+                events.append((NotificationEvent(COMMENTED, feedback.pk, author_id), moment))
+
+            if feedback.status == Feedback.RESOLVED:
+                history.append(FeedbackHistory(
+                    feedback_id=feedback.pk,
+                    changed_by_id=feedback.assigned_admin_id,
+                    old_status=Feedback.PENDING,
+                    new_status=Feedback.RESOLVED,
+                    old_assigned_to_id=feedback.assigned_admin_id,
+                    new_assigned_to_id=feedback.assigned_admin_id,
+                    notes='',
+                    timestamp=feedback.resolved_at,
+                ))
+                events.append((
+                    NotificationEvent(STATUS_CHANGED, feedback.pk, feedback.assigned_admin_id, status=Feedback.RESOLVED),
+                    feedback.resolved_at
+                ))
+
+            for event, moment in events:
+                for user_id, message in recipients(event, row):
+                    if user_id is None or user_id == event.actor_id:
+                        continue
+                    # Notifications older than a few days have mostly been read
+                    read_rate = 0.95 if self.end - moment > timedelta(days=3) else 0.4
+                    notifications.append(Notification(
+                        user_id=user_id, feedback_id=feedback.pk, notification_type=event.kind,
+                        message=message, is_read=self.random.random() < read_rate, created_at=moment,
+                    ))
+
+        for model, rows in ((FeedbackResponse, responses), (FeedbackComment, comments),
+                            (FeedbackHistory, history), (Notification, notifications)):
+            self.insert(model, rows)
@@ -0,0 +1,1587 @@
+import csv
+from datetime import timedelta
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO, TextIOWrapper
+from unittest import mock
+from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.checks import Tags, run_checks
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from .models import (
+    CACHE_SCOPE, AdminLoad, Feedback, FeedbackResponse, FeedbackComment, FeedbackHistory, FeedbackStatusCounter,
+    FeedbackTrendRollup, Notification, PendingNotification, StoredContent, UsedStreamTicket
+)
+from .counters import status_counts, verify_counters
+from .assignment import pick_admin
+from .notifications import CREATED, NotificationEvent, deliver, dispatcher
+from .events import Broadcaster, broadcaster
+from .images import rendition_name
+from .storage import content_storage
+from .bulk import change_status
+from .search import fts_enabled, missing_sync_triggers
+from .synthetic import SyntheticDataGenerator, email_domain
+from college_feedback_system.utils.uploads import StreamingUploadHandler, UploadRejected
+from rest_framework.authtoken.models import Token
+from college_feedback_system.utils.caching import GENERATION_KEY
+
+User = get_user_model()
+
+
+def create_admin(email='admin@example.com'):
+    return User.objects.create_user(email=email, password='adminpass123', user_type='admin')
+
+
+class FeedbackTestCase(TestCase):
+    """A student, an admin and an API client, created before each test"""
+
+    def setUp(self, **student_fields):
+        self.client = APIClient()
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            password='testpass123',
+            user_type='student',
+            **student_fields
+        )
+        self.admin = create_admin()
+
+    def use_media_root(self, **settings):
+        """Store uploads in a temporary MEDIA_ROOT for this test"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, **settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return media_root
+
+
+class FeedbackPaginationTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            Feedback.objects.create(
+                title=f'Feedback {i}',
+                category=Feedback.ACADEMIC,
+                student=self.student,
+                assigned_admin=self.admin
+            )
+        # Share one timestamp across several rows so ties are broken on id
+        Feedback.objects.filter(title__in=['Feedback 10', 'Feedback 11', 'Feedback 12']).update(
+            created_at=Feedback.objects.get(title='Feedback 10').created_at
+        )
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_student_pages_cover_all_rows_in_order(self):
+        self.client.force_authenticate(user=self.student)
+        ids = self._walk('/api/feedbacks/student/?page_size=10')
+        expected = list(
+            Feedback.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_admin_previous_cursor_returns_prior_page(self):
+        self.client.force_authenticate(user=self.admin)
+        first = self.client.get('/api/feedbacks/admin/?page_size=10')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+
+    def test_list_does_not_count(self):
+        self.client.force_authenticate(user=self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/feedbacks/?page_size=5')
+        self.assertEqual(len(response.data['results']), 5)
+        for query in ctx.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/feedbacks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class FeedbackQueryCountTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def _add_feedback(self, count):
+        for i in range(count):
+            student = User.objects.create_user(
+                email=f'student{User.objects.count()}@example.com',
+                password='testpass123',
+                first_name='Student',
+                user_type='student'
+            )
+            feedback = Feedback.objects.create(
+                title=f'Feedback {i}',
+                category=Feedback.ACADEMIC,
+                student=student,
+                assigned_admin=self.admin
+            )
+            FeedbackResponse.objects.create(
+                feedback=feedback,
+                responder=student,
+                content='Thanks'
+            )
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_independent_of_result_size(self):
+        self.client.force_authenticate(user=self.admin)
+        urls = ['/api/feedbacks/', '/api/feedbacks/admin/', '/api/responses/']
+
+        self._add_feedback(2)
+        small = [self._count_queries(url) for url in urls]
+
+        self._add_feedback(10)
+        large = [self._count_queries(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+class FeedbackIndexUsageTests(FeedbackTestCase):
+    """EXPLAIN every feedback query a view issues and reject full table scans"""
+
+    def setUp(self):
+        super().setUp()
+        feedback = Feedback.objects.create(
+            title='Projector broken',
+            category=Feedback.INFRASTRUCTURE,
+            student=self.student,
+            assigned_admin=self.admin
+        )
+        FeedbackResponse.objects.create(feedback=feedback, responder=self.admin, content='On it')
+
+    def _plans(self, user, url):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'feedback_feedback' not in sql:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        self.assertTrue(plans, url)
+        return plans
+
+    def assertNoTableScan(self, user, url):
+        for sql, plan in self._plans(user, url):
+            for step in plan:
+                if step.startswith('SCAN feedback_'):
+                    self.assertIn('USING', step, f'{url}: {sql}\n{plan}')
+
+    def test_api_lists_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan format is SQLite specific')
+        self.assertNoTableScan(self.student, '/api/feedbacks/')
+        self.assertNoTableScan(self.student, '/api/feedbacks/student/')
+        self.assertNoTableScan(self.student, '/api/responses/')
+        self.assertNoTableScan(self.admin, '/api/feedbacks/')
+        self.assertNoTableScan(self.admin, '/api/feedbacks/admin/')
+        self.assertNoTableScan(self.admin, '/api/responses/')
+
+    def test_html_views_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan format is SQLite specific')
+        self.assertNoTableScan(self.student, '/')
+        self.assertNoTableScan(self.student, '/auth/dashboard/student/')
+        self.assertNoTableScan(self.admin, '/auth/dashboard/admin/')
+
+class FeedbackSearchTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.projector = Feedback.objects.create(
+            title='Projector broken in room 12',
+            description='The projector flickers during lectures',
+            category=Feedback.INFRASTRUCTURE,
+            student=self.student,
+            assigned_admin=self.admin
+        )
+        self.wifi = Feedback.objects.create(
+            title='Slow wifi',
+            description='Library wifi drops every evening',
+            category=Feedback.INFRASTRUCTURE,
+            student=self.student,
+            assigned_admin=self.admin
+        )
+        self.exam = Feedback.objects.create(
+            title='Exam schedule clash',
+            description='Two exams on the same morning',
+            category=Feedback.ACADEMIC,
+            student=self.student,
+            assigned_admin=self.admin
+        )
+
+    def _search(self, user, term):
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/api/feedbacks/', {'search': term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_ranks_title_hits_above_description_hits(self):
+        self.wifi.description = 'Wifi is fine but the projector cable is missing'
+        self.wifi.save()
+        results = self._search(self.student, 'projector')
+        self.assertEqual([r['id'] for r in results], [self.projector.id, self.wifi.id])
+
+    def test_ranked_results_page_with_cursors(self):
+        for i in range(5):
+            Feedback.objects.create(
+                title=f'Broken chair {i}',
+                category=Feedback.INFRASTRUCTURE,
+                student=self.student,
+                assigned_admin=self.admin
+            )
+        self.client.force_authenticate(user=self.student)
+        url, ids = '/api/feedbacks/?search=broken&page_size=2', []
+        while url:
+            response = self.client.get(url)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(len(set(ids)), 6)
+
+    def test_matches_comments_and_public_responses_only(self):
+        FeedbackComment.objects.create(feedback=self.exam, user=self.student, comment='Timetable overlap again')
+        FeedbackResponse.objects.create(feedback=self.wifi, responder=self.admin, content='Router replaced')
+        FeedbackResponse.objects.create(
+            feedback=self.projector, responder=self.admin, content='Vendor invoice', is_internal=True
+        )
+        self.assertEqual([r['id'] for r in self._search(self.student, 'timetable')], [self.exam.id])
+        self.assertEqual([r['id'] for r in self._search(self.student, 'router')], [self.wifi.id])
+        self.assertEqual(self._search(self.student, 'invoice'), [])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        self.exam.description = 'Two <b>papers</b> on the same morning'
+        self.exam.save()
+        results = self._search(self.student, 'morning')
+        self.assertEqual(len(results), 1)
+        self.assertIn('<mark>morning</mark>', results[0]['search_snippet'])
+        self.assertIn('&lt;b&gt;', results[0]['search_snippet'])
+
+    def test_search_syntax_is_not_interpreted(self):
+        self.assertEqual(self._search(self.student, '"wifi*('), self._search(self.student, 'wifi'))
+
+    def test_deleted_feedback_leaves_index(self):
+        self.wifi.delete()
+        self.assertEqual(self._search(self.student, 'wifi'), [])
+
+    def test_html_list_search(self):
+        self.client.force_login(self.student)
+        response = self.client.get('/', {'search': 'flickers'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, '<mark>flickers</mark>')
+        self.assertNotContains(response, 'Slow wifi')
+
+    def test_index_lookup_is_made_once_per_connection(self):
+        fts_enabled()
+        with self.assertNumQueries(0):
+            self.assertTrue(fts_enabled())
+
+    def test_sync_triggers_survive_migrations(self):
+        self.assertEqual(missing_sync_triggers(), [])
+        self.assertEqual(run_checks(databases=['default'], tags=[Tags.database]), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER feedback_fts_update')
+        errors = run_checks(databases=['default'], tags=[Tags.database])
+        self.assertEqual([error.id for error in errors], ['feedback.E001'])
+
+class FeedbackStatusCounterTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_admin = create_admin('admin2@example.com')
+        self.feedback = Feedback.objects.create(
+            title='Lab chairs',
+            category=Feedback.INFRASTRUCTURE,
+            student=self.student,
+            assigned_admin=self.admin
+        )
+
+    def test_create_counts_every_scope(self):
+        self.assertEqual(status_counts(self.student, FeedbackStatusCounter.ROLE_STUDENT)['pending'], 1)
+        self.assertEqual(status_counts(self.admin, FeedbackStatusCounter.ROLE_ADMIN)['pending'], 1)
+        self.assertEqual(status_counts()['total'], 1)
+
+    def test_status_change_and_reassignment_move_counts(self):
+        self.feedback.mark_as_resolved(self.other_admin)
+        admin_counts = status_counts(self.admin, FeedbackStatusCounter.ROLE_ADMIN)
+        other_counts = status_counts(self.other_admin, FeedbackStatusCounter.ROLE_ADMIN)
+        self.assertEqual(admin_counts['total'], 0)
+        self.assertEqual(other_counts['resolved'], 1)
+        self.assertEqual(status_counts(self.student, FeedbackStatusCounter.ROLE_STUDENT)['resolved'], 1)
+        self.assertEqual(verify_counters(), {})
+
+    def test_delete_decrements(self):
+        self.feedback.delete()
+        self.assertEqual(status_counts()['total'], 0)
+        self.assertEqual(verify_counters(), {})
+
+    def test_rebuild_command_repairs_drift(self):
+        # QuerySet.update() bypasses save(), so the counters drift
+        Feedback.objects.update(status=Feedback.RESOLVED)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_feedback_counters', '--verify-only', stdout=StringIO())
+        call_command('rebuild_feedback_counters', stdout=StringIO())
+        self.assertEqual(verify_counters(), {})
+        self.assertEqual(status_counts()['resolved'], 1)
+
+    def test_negative_counters_are_drift(self):
+        FeedbackStatusCounter.objects.create(
+            role=FeedbackStatusCounter.ROLE_ALL, status=Feedback.RESOLVED, category=Feedback.ACADEMIC, count=-1
+        )
+        self.assertNotEqual(verify_counters(), {})
+        call_command('rebuild_feedback_counters', stdout=StringIO())
+        self.assertEqual(verify_counters(), {})
+
+    def test_admin_dashboard_reads_counts_in_one_query(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/auth/dashboard/admin/')
+        self.assertEqual(response.context['pending_count'], 1)
+        counter_queries = [q for q in ctx.captured_queries if 'feedbackstatuscounter' in q['sql']]
+        self.assertEqual(len(counter_queries), 1)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+class FeedbackTrendRollupTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.feedbacks = [
+            Feedback.objects.create(
+                title=f'Feedback {i}',
+                category=Feedback.ACADEMIC if i % 2 else Feedback.INFRASTRUCTURE,
+                student=self.student,
+                assigned_admin=self.admin
+            )
+            for i in range(4)
+        ]
+        self.feedbacks[0].mark_as_resolved(self.admin)
+
+    def _trends(self, **params):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/feedbacks/trends/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_incremental_rollups(self):
+        trends = self._trends(days=3)
+        self.assertEqual(len(trends), 4)
+        self.assertEqual(trends[-1]['count'], 4)
+        self.assertEqual(self._trends(days=3, category=Feedback.ACADEMIC)[-1]['count'], 2)
+        self.assertEqual(self._trends(days=1, event='status_changed')[-1]['count'], 1)
+        self.assertEqual(self._trends(days=1, granularity='hour')[-1]['count'], 4)
+        self.assertEqual(self._trends(days=40, granularity='week')[-1]['count'], 4)
+        self.assertEqual(self._trends(days=400, granularity='month')[-1]['count'], 4)
+
+    def test_any_range_is_one_rollup_read(self):
+        self.client.force_authenticate(user=self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/feedbacks/trends/', {'days': 365})
+        self.assertEqual(len(response.data), 366)
+        rollup_queries = [q for q in ctx.captured_queries if 'feedbacktrendrollup' in q['sql']]
+        self.assertEqual(len(rollup_queries), 1)
+        self.assertFalse(any('feedback_feedback"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_backfill_matches_incremental(self):
+        before = self._trends(days=2, granularity='hour')
+        FeedbackTrendRollup.objects.all().delete()
+        call_command('backfill_feedback_rollups', stdout=StringIO())
+        self.assertEqual(self._trends(days=2, granularity='hour'), before)
+
+    def test_backfill_recomputes_every_row_as_saves_wrote_it(self):
+        # Created already resolved: no status change was ever recorded
+        Feedback.objects.create(
+            title='Closed on arrival', student=self.student, assigned_admin=self.admin,
+            status=Feedback.RESOLVED, resolved_at=timezone.now()
+        )
+        rows = lambda: sorted(
+            FeedbackTrendRollup.objects.exclude(count=0)
+            .values_list('granularity', 'event', 'bucket', 'category', 'status', 'count')
+        )
+        before = rows()
+        call_command('backfill_feedback_rollups', stdout=StringIO())
+        self.assertEqual(rows(), before)
+        self.assertEqual(verify_counters(), {})
+
+    def test_rejects_bad_parameters(self):
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(
+            self.client.get('/api/feedbacks/trends/', {'granularity': 'year'}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.client.get('/api/feedbacks/trends/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FeedbackAssignmentTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_admin = create_admin('admin2@example.com')
+
+    def submit(self, title='Broken projector'):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post('/api/feedbacks/', {
+            'title': title,
+            'description': 'Room 101',
+            'category': Feedback.INFRASTRUCTURE
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['assigned_admin']
+
+    def test_equal_loads_take_turns(self):
+        assigned = [self.submit(f'Issue {i}') for i in range(4)]
+        self.assertEqual(sorted(assigned), sorted([self.admin.id, self.other_admin.id] * 2))
+        self.assertNotEqual(assigned[0], assigned[1])
+
+    def test_least_loaded_admin_is_picked(self):
+        for i in range(2):
+            Feedback.objects.create(title=f'Old {i}', student=self.student, assigned_admin=self.admin)
+        self.assertEqual(self.submit(), self.other_admin.id)
+        self.assertEqual(AdminLoad.objects.get(admin=self.other_admin).open_count, 1)
+
+    def test_resolving_frees_capacity(self):
+        feedbacks = [
+            Feedback.objects.create(title=f'Old {i}', student=self.student, assigned_admin=self.admin)
+            for i in range(2)
+        ]
+        Feedback.objects.create(title='Other', student=self.student, assigned_admin=self.other_admin)
+        for feedback in feedbacks:
+            feedback.mark_as_resolved(self.admin)
+        self.assertEqual(AdminLoad.objects.get(admin=self.admin).open_count, 0)
+        self.assertEqual(self.submit(), self.admin.id)
+
+    def test_inactive_admins_are_skipped(self):
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertEqual({self.submit(f'Issue {i}') for i in range(3)}, {self.other_admin.id})
+
+    def test_web_submission_uses_engine(self):
+        Feedback.objects.create(title='Old', student=self.student, assigned_admin=self.admin)
+        self.client.force_login(self.student)
+        response = self.client.post('/submit/', {
+            'title': 'Leaking tap',
+            'description': 'Second floor',
+            'category': Feedback.INFRASTRUCTURE
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Feedback.objects.get(title='Leaking tap').assigned_admin, self.other_admin)
+
+    def test_pick_is_an_index_read(self):
+        with CaptureQueriesContext(connection) as ctx:
+            pick_admin()
+        self.assertEqual(len(ctx.captured_queries), 2)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + ctx.captured_queries[0]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('USING', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_rebuild_command_repairs_loads(self):
+        Feedback.objects.create(title='Old', student=self.student, assigned_admin=self.admin)
+        AdminLoad.objects.update(open_count=7)
+        call_command('rebuild_feedback_counters', stdout=StringIO())
+        self.assertEqual(AdminLoad.objects.get(admin=self.admin).open_count, 1)
+        self.assertEqual(AdminLoad.objects.get(admin=self.other_admin).open_count, 0)
+
+
+class FeedbackBulkIngestionTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_admin = create_admin('admin2@example.com')
+
+    def items(self, count):
+        return [
+            {'title': f'Projector {i}', 'description': 'Flickering', 'category': Feedback.INFRASTRUCTURE}
+            for i in range(count)
+        ]
+
+    def post_batch(self, user, items):
+        self.client.force_authenticate(user=user)
+        return self.client.post('/api/feedbacks/bulk/', items, format='json')
+
+    def test_json_array_creates_and_counts(self):
+        response = self.post_batch(self.student, self.items(6))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 6)
+        self.assertEqual(Feedback.objects.filter(student=self.student).count(), 6)
+        self.assertEqual(verify_counters(), {})
+        self.assertEqual(AdminLoad.objects.get(admin=self.admin).open_count, 3)
+        self.assertEqual(AdminLoad.objects.get(admin=self.other_admin).open_count, 3)
+        created = FeedbackTrendRollup.objects.get(
+            granularity=FeedbackTrendRollup.DAY, event=FeedbackTrendRollup.CREATED
+        )
+        self.assertEqual(created.count, 6)
+
+    def test_bulk_rows_are_searchable(self):
+        self.post_batch(self.student, self.items(2))
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/feedbacks/?search=flicker')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_ndjson_import_reports_each_item(self):
+        body = '\n'.join([
+            '{"title": "Wifi", "category": "infrastructure", "student_email": "student@example.com"}',
+            '',
+            '{"title": "Wifi", "category": "nonsense", "student_email": "student@example.com"}',
+            '{"title": "Wifi", "category": "academic", "student_email": "nobody@example.com"}',
+        ])
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/feedbacks/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertIn('id', results[0])
+        self.assertIn('category', results[1]['errors'])
+        self.assertIn('student_email', results[2]['errors'])
+        self.assertEqual(Feedback.objects.get().student, self.student)
+
+    def test_malformed_ndjson_is_rejected(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post('/api/feedbacks/bulk/', '{"title": "ok"}\n{oops', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', response.data['detail'])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        # The first batch also creates the counter and rollup rows
+        self.post_batch(self.student, self.items(2))
+        with CaptureQueriesContext(connection) as small:
+            self.post_batch(self.student, self.items(5))
+        with CaptureQueriesContext(connection) as large:
+            self.post_batch(self.student, self.items(200))
+        # Only the multi-row INSERTs are split, by the backend's parameter limit
+        def others(ctx):
+            return [
+                q for q in ctx.captured_queries
+                if not q['sql'].startswith(('INSERT INTO "feedback_feedback"', 'INSERT INTO "feedback_pendingnotification"'))
+            ]
+        self.assertEqual(len(others(large)), len(others(small)))
+
+
+class FeedbackBulkStatusTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_admin = create_admin('admin2@example.com')
+        self.feedbacks = [
+            Feedback.objects.create(
+                title=f'Issue {i}',
+                category=Feedback.ACADEMIC if i % 2 else Feedback.INFRASTRUCTURE,
+                student=self.student,
+                assigned_admin=self.admin
+            )
+            for i in range(6)
+        ]
+        self.foreign = Feedback.objects.create(
+            title='Not mine', student=self.student, assigned_admin=self.other_admin
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_resolve_by_ids(self):
+        ids = [feedback.id for feedback in self.feedbacks[:3]] + [self.foreign.id]
+        # Counters, admin loads and rollups: one INSERT and one UPDATE each;
+        # notification events: one INSERT
+        with self.assertNumQueries(16):
+            response = self.client.post('/api/feedbacks/bulk-status/', {
+                'status': Feedback.RESOLVED, 'ids': ids, 'notes': 'End of semester'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['ids']), ids[:3])
+        self.assertEqual(Feedback.objects.filter(status=Feedback.RESOLVED).count(), 3)
+        self.assertFalse(Feedback.objects.filter(resolved_at__isnull=True, status=Feedback.RESOLVED).exists())
+        history = FeedbackHistory.objects.filter(feedback_id__in=ids)
+        self.assertEqual(history.count(), 3)
+        self.assertTrue(all(h.old_status == 'pending' and h.notes == 'End of semester' for h in history))
+        self.assertEqual(verify_counters(), {})
+        self.assertEqual(AdminLoad.objects.get(admin=self.admin).open_count, 3)
+
+    def test_resolve_by_filter_is_batched(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/feedbacks/bulk-status/', {
+                'status': Feedback.RESOLVED, 'filter': {'category': Feedback.ACADEMIC}
+            }, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertFalse(response.data['has_more'])
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "feedback_feedback"')]
+        history_inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "feedback_feedbackhistory"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(len(history_inserts), 1)
+
+    def test_query_count_does_not_grow_with_owners(self):
+        for i in range(5):
+            student = User.objects.create_user(
+                email=f'student{i}@example.com', password='testpass123', user_type='student'
+            )
+            Feedback.objects.create(title='Lab', student=student, assigned_admin=self.admin)
+        ids = list(Feedback.objects.filter(assigned_admin=self.admin).values_list('id', flat=True))
+        with self.assertNumQueries(16):
+            response = self.client.post('/api/feedbacks/bulk-status/', {
+                'status': Feedback.RESOLVED, 'ids': ids
+            }, format='json')
+        self.assertEqual(response.data['updated'], 11)
+        self.assertEqual(verify_counters(), {})
+        self.assertEqual(AdminLoad.objects.get(admin=self.admin).open_count, 0)
+
+    def test_unchanged_rows_write_no_history(self):
+        self.feedbacks[0].mark_as_resolved(self.admin)
+        response = self.client.post('/api/feedbacks/bulk-status/', {
+            'status': Feedback.RESOLVED, 'ids': [self.feedbacks[0].id]
+        }, format='json')
+        self.assertEqual(response.data['updated'], 0)
+        self.assertFalse(FeedbackHistory.objects.exists())
+
+    def test_requires_ids_or_filter(self):
+        response = self.client.post('/api/feedbacks/bulk-status/', {'status': Feedback.RESOLVED}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_students_are_forbidden(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post('/api/feedbacks/bulk-status/', {
+            'status': Feedback.RESOLVED, 'ids': [self.feedbacks[0].id]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_single_resolve_records_history(self):
+        response = self.client.put(f'/api/feedbacks/{self.feedbacks[0].id}/resolve/')
+        self.assertEqual(response.data['status'], Feedback.RESOLVED)
+        self.assertEqual(self.feedbacks[0].history.get().new_status, Feedback.RESOLVED)
+
+
+class FeedbackSparseFieldsetTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp(first_name='Sam')
+        for i in range(3):
+            feedback = Feedback.objects.create(
+                title=f'Issue {i}',
+                description='A long description',
+                student=self.student,
+                assigned_admin=self.admin
+            )
+            FeedbackResponse.objects.create(feedback=feedback, responder=self.admin, content='On it')
+        self.client.force_authenticate(user=self.student)
+
+    def feedback_select(self, ctx):
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT "feedback_feedback"."id"')]
+
+    def test_fields_trim_payload_and_sql(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/feedbacks/student/?fields=title,status,created_at')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'status', 'created_at'})
+        sql = self.feedback_select(ctx)[0]
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"photo"', sql)
+        self.assertNotIn('accounts_user', sql)
+
+    def test_computed_field_joins_its_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/feedbacks/?fields=student_name')
+        self.assertEqual(response.data['results'][0]['student_name'], 'Sam ')
+        self.assertEqual(len(self.feedback_select(ctx)), 1)
+        self.assertIn('INNER JOIN "accounts_user"', self.feedback_select(ctx)[0])
+
+    def test_expand_nests_users_without_extra_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/feedbacks/?fields=title&expand=assigned_admin')
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'title', 'assigned_admin'})
+        self.assertEqual(row['assigned_admin']['email'], 'admin@example.com')
+        self.assertEqual(len([q for q in ctx.captured_queries if 'accounts_user' in q['sql']]), 1)
+
+    def test_default_payload_is_unchanged(self):
+        response = self.client.get('/api/feedbacks/')
+        self.assertIn('description', response.data['results'][0])
+        self.assertIn('student_name', response.data['results'][0])
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post('/api/feedbacks/?fields=id', {'category': Feedback.ACADEMIC}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('title', response.data)
+        response = self.client.post('/api/feedbacks/?fields=id', {
+            'title': 'Projector', 'description': 'Broken', 'category': Feedback.ACADEMIC
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['title'], 'Projector')
+        self.assertEqual(Feedback.objects.get(pk=response.data['id']).description, 'Broken')
+
+    def test_response_fields(self):
+        response = self.client.get('/api/responses/?fields=content&expand=responder')
+        self.assertEqual(set(response.data[0]), {'id', 'content', 'responder'})
+        self.assertEqual(response.data[0]['responder']['user_type'], 'admin')
+
+
+class FeedbackConditionalGetTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.feedback = Feedback.objects.create(
+            title='Broken chair', student=self.student, assigned_admin=self.admin
+        )
+        self.client.force_authenticate(user=self.student)
+
+    def test_unchanged_list_is_not_modified(self):
+        first = self.client.get('/api/feedbacks/student/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', first)
+        # Only the validators are read: max(updated_at) and the counter total
+        with self.assertNumQueries(2):
+            second = self.client.get('/api/feedbacks/student/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+
+    def test_if_modified_since_is_answered(self):
+        url = f'/api/feedbacks/{self.feedback.id}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Feedback.objects.filter(pk=self.feedback.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_changes_invalidate_the_etag(self):
+        etag = self.client.get('/api/feedbacks/student/')['ETag']
+        Feedback.objects.create(title='Another', student=self.student, assigned_admin=self.admin)
+        response = self.client.get('/api/feedbacks/student/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_query_string_is_part_of_the_etag(self):
+        etag = self.client.get('/api/feedbacks/')['ETag']
+        response = self.client.get('/api/feedbacks/?fields=title', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_is_not_modified_until_changed(self):
+        url = f'/api/feedbacks/{self.feedback.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.feedback.mark_as_resolved(self.admin)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data['status'], Feedback.RESOLVED)
+
+    def test_deleting_a_row_invalidates_the_list(self):
+        Feedback.objects.create(title='Another', student=self.student, assigned_admin=self.admin)
+        etag = self.client.get('/api/feedbacks/student/')['ETag']
+        self.feedback.delete()
+        response = self.client.get('/api/feedbacks/student/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_missing_detail_is_404(self):
+        response = self.client.get('/api/feedbacks/999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_non_numeric_detail_is_404(self):
+        response = self.client.get('/api/feedbacks/abc/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ResponseCacheTests(FeedbackTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.feedback = Feedback.objects.create(
+            title='Broken chair', student=self.student, assigned_admin=self.admin
+        )
+        FeedbackResponse.objects.create(feedback=self.feedback, responder=self.admin, content='On it')
+
+    def test_hit_serves_rendered_bytes_without_queries(self):
+        self.client.force_authenticate(user=self.admin)
+        first = self.client.get('/api/feedbacks/trends/?days=2')
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get('/api/feedbacks/trends/?days=2')
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertFalse([q for q in ctx.captured_queries if 'feedbacktrendrollup' in q['sql']])
+
+    def test_query_string_and_user_are_part_of_the_key(self):
+        self.client.force_authenticate(user=self.admin)
+        week = self.client.get('/api/feedbacks/trends/?days=7')
+        day = self.client.get('/api/feedbacks/trends/?days=1')
+        self.assertNotEqual(len(week.data), len(day.data))
+
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/feedbacks/trends/?days=7')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_accept_header_is_part_of_the_key(self):
+        self.client.force_authenticate(user=self.student)
+        self.client.get('/api/responses/', HTTP_ACCEPT='application/json')
+        browsable = self.client.get('/api/responses/', HTTP_ACCEPT='text/html')
+        self.assertTrue(browsable['Content-Type'].startswith('text/html'))
+
+    def test_writes_invalidate_immediately(self):
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(len(self.client.get('/api/responses/').data), 1)
+        FeedbackResponse.objects.create(feedback=self.feedback, responder=self.admin, content='Fixed')
+        self.assertEqual(len(self.client.get('/api/responses/').data), 2)
+
+        self.client.force_authenticate(user=self.admin)
+        before = self.client.get('/api/feedbacks/trends/?days=1&event=status_changed').data
+        self.client.post('/api/feedbacks/bulk-status/', {
+            'status': Feedback.RESOLVED, 'ids': [self.feedback.id]
+        }, format='json')
+        after = self.client.get('/api/feedbacks/trends/?days=1&event=status_changed').data
+        self.assertEqual(sum(row['count'] for row in after) - sum(row['count'] for row in before), 1)
+
+    def test_lost_generation_does_not_revive_old_entries(self):
+        generation = GENERATION_KEY.format(CACHE_SCOPE)
+        cache.delete(generation)
+        self.client.force_authenticate(user=self.student)
+        self.client.get('/api/responses/')
+        FeedbackResponse.objects.create(feedback=self.feedback, responder=self.admin, content='Fixed')
+        # Evicted or restarted: the generation must not start over where the first entry was cached
+        cache.delete(generation)
+        self.assertEqual(len(self.client.get('/api/responses/').data), 2)
+
+
+@override_settings(NOTIFICATIONS_ASYNC=False)
+class NotificationFanOutTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def discard_pending(self):
+        """Drop the events of the setup, so only those of the change under test are delivered"""
+        PendingNotification.objects.all().delete()
+
+    def notifications(self, user):
+        return list(
+            Notification.objects.filter(user=user).order_by('id').values_list('notification_type', 'message')
+        )
+
+    def test_create_notifies_admin_after_commit(self):
+        self.client.force_authenticate(user=self.student)
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/feedbacks/', {
+                'title': 'Broken projector', 'description': 'Room B2', 'category': Feedback.INFRASTRUCTURE
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # The request only stores the event, in its own transaction
+        self.assertFalse([q for q in ctx.captured_queries if 'feedback_notification' in q['sql']])
+        self.assertEqual(len([q for q in ctx.captured_queries if 'feedback_pendingnotification' in q['sql']]), 1)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(PendingNotification.objects.count(), 1)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.notifications(self.admin), [
+            ('feedback_created', 'New feedback submitted: "Broken projector"')
+        ])
+        self.assertEqual(self.notifications(self.student), [])
+        self.assertFalse(PendingNotification.objects.exists())
+
+    def test_events_outlive_the_process_that_published_them(self):
+        # Committed, but the process stopped before its dispatcher ran
+        Feedback.objects.create(title='Heating', student=self.student, assigned_admin=self.admin)
+        self.assertEqual(self.notifications(self.admin), [])
+        output = StringIO()
+        call_command('deliver_notifications', stdout=output)
+        self.assertIn('Delivered 1 event(s)', output.getvalue())
+        self.assertEqual(self.notifications(self.admin), [('feedback_created', 'New feedback submitted: "Heating"')])
+
+    def test_the_user_making_a_change_is_not_notified(self):
+        other_admin = create_admin('admin2@example.com')
+        feedback = Feedback.objects.create(title='Wifi', student=self.student, assigned_admin=self.admin)
+        self.discard_pending()
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.assigned_admin = other_admin
+            feedback.save(changed_by=other_admin)
+        self.assertEqual(self.notifications(other_admin), [])
+
+    def test_status_change_and_reassignment(self):
+        other_admin = create_admin('admin2@example.com')
+        feedback = Feedback.objects.create(title='Wifi', student=self.student, assigned_admin=self.admin)
+        self.discard_pending()
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.assigned_admin = other_admin
+            feedback.status = Feedback.RESOLVED
+            feedback.save()
+        self.assertEqual(self.notifications(other_admin), [('feedback_assigned', 'Feedback assigned to you: "Wifi"')])
+        self.assertEqual(self.notifications(self.student), [
+            ('feedback_status_changed', 'Your feedback "Wifi" is now resolved')
+        ])
+
+    def test_bulk_resolve_is_coalesced(self):
+        feedbacks = [
+            Feedback.objects.create(title=f'Issue {i}', student=self.student, assigned_admin=self.admin)
+            for i in range(8)
+        ]
+        self.discard_pending()
+        self.client.force_authenticate(user=self.admin)
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/feedbacks/bulk-status/', {
+                'status': Feedback.RESOLVED, 'ids': [feedback.id for feedback in feedbacks]
+            }, format='json')
+        notification_queries = [q for q in ctx.captured_queries if 'feedback_notification' in q['sql']]
+        self.assertEqual(len(notification_queries), 1)
+        self.assertEqual(self.notifications(self.student), [
+            ('feedback_status_changed', '8 of your feedback changed status')
+        ])
+        self.assertEqual(self.notifications(self.admin), [])
+
+    def test_comments_notify_the_other_side(self):
+        feedback = Feedback.objects.create(title='Library hours', student=self.student, assigned_admin=self.admin)
+        self.discard_pending()
+        with self.captureOnCommitCallbacks(execute=True):
+            FeedbackComment.objects.create(feedback=feedback, user=self.student, comment='Any update?')
+            FeedbackResponse.objects.create(feedback=feedback, responder=self.admin, content='Note', is_internal=True)
+        self.assertEqual(self.notifications(self.admin), [('feedback_comment', 'New comment on "Library hours"')])
+        self.assertEqual(self.notifications(self.student), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeedbackResponse.objects.create(feedback=feedback, responder=self.admin, content='Extended')
+        self.assertEqual(self.notifications(self.student), [('feedback_comment', 'New comment on "Library hours"')])
+
+    @override_settings(NOTIFICATIONS_ASYNC=True)
+    def test_dispatcher_batches_events_off_thread(self):
+        with mock.patch('feedback.notifications.drain_events') as drain_events:
+            dispatcher.wake()
+            dispatcher.wake()
+            dispatcher.flush()
+        self.assertEqual(drain_events.call_count, 1)
+
+
+class NotificationInboxTests(FeedbackTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.feedbacks = [
+            Feedback.objects.create(title=f'Issue {i}', student=self.student, assigned_admin=self.admin)
+            for i in range(4)
+        ]
+        self.notifications = Notification.objects.bulk_create([
+            Notification(user=self.student, feedback=feedback, notification_type='feedback_comment', message='Hi')
+            for feedback in self.feedbacks
+        ])
+        Notification.objects.create(
+            user=self.admin, feedback=self.feedbacks[0], notification_type='feedback_created', message='New'
+        )
+        self.client.force_authenticate(user=self.student)
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread']
+
+    def test_inbox_is_paginated_and_scoped(self):
+        response = self.client.get('/api/notifications/?page_size=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [notification.id for notification in self.notifications[::-1][:3]]
+        )
+        rest = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in rest.data['results']], [self.notifications[0].id])
+
+    def test_unread_count_is_one_count_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.unread(), 4)
+        counts = [q['sql'] for q in ctx.captured_queries if 'feedback_notification' in q['sql']]
+        self.assertEqual(len(counts), 1)
+        self.assertIn('COUNT(', counts[0].upper())
+
+        deliver([NotificationEvent('feedback_status_changed', self.feedbacks[1].id, status=Feedback.RESOLVED)])
+        self.assertEqual(self.unread(), 5)
+
+    def test_mark_read_variants_are_single_updates(self):
+        self.assertEqual(self.unread(), 4)
+        ids = [notification.id for notification in self.notifications]
+        cases = [
+            ({'ids': [ids[0], self.admin.notifications.get().id]}, 1, 3),
+            ({'up_to': ids[2]}, 2, 1),
+            ({'all': True}, 1, 0),
+        ]
+        for body, marked, unread in cases:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post('/api/notifications/mark-read/', body, format='json')
+            self.assertEqual((response.data['marked'], response.data['unread']), (marked, unread))
+            writes = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+            self.assertEqual(len(writes), 1)
+            self.assertEqual(self.unread(), unread)
+        self.assertEqual(Notification.objects.filter(user=self.student, is_read=False).count(), 0)
+        self.assertFalse(Notification.objects.get(user=self.admin).is_read)
+
+    def test_mark_read_needs_exactly_one_selector(self):
+        for body in ({}, {'all': True, 'up_to': 3}):
+            response = self.client.post('/api/notifications/mark-read/', body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@mock.patch.object(Broadcaster, 'start')
+class NotificationStreamTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.feedback = Feedback.objects.create(title='Heating', student=self.student, assigned_admin=self.admin)
+        self.notifications = [
+            Notification.objects.create(
+                user=user, feedback=self.feedback, notification_type='feedback_comment', message='Hi'
+            )
+            for user in (self.student, self.admin, self.student, self.student)
+        ]
+        cursor = mock.patch.object(broadcaster, 'cursor', None)
+        cursor.start()
+        self.addCleanup(cursor.stop)
+        self.client.force_authenticate(user=self.student)
+
+    def event_ids(self, content):
+        return [int(line[4:]) for line in content.decode().splitlines() if line.startswith('id: ')]
+
+    @mock.patch('feedback.events.MAX_STREAM_SECONDS', 0)
+    def test_last_event_id_replays_only_own_missed_events(self, start):
+        response = self.client.get(
+            '/api/notifications/stream/', HTTP_ACCEPT='text/event-stream',
+            HTTP_LAST_EVENT_ID=str(self.notifications[0].id)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'retry: '))
+        self.assertEqual(self.event_ids(content), [self.notifications[2].id, self.notifications[3].id])
+        self.assertIn(b'event: feedback_comment', content)
+
+    @mock.patch('feedback.events.HEARTBEAT_SECONDS', 0.01)
+    def test_live_events_and_heartbeats(self, start):
+        response = self.client.get('/api/notifications/stream/', HTTP_ACCEPT='text/event-stream')
+        frames = iter(response.streaming_content)
+        self.assertTrue(next(frames).startswith(b'retry: '))
+        self.assertEqual(next(frames), b': heartbeat\n\n')
+
+        notification = Notification.objects.create(
+            user=self.student, feedback=self.feedback, notification_type='feedback_status_changed', message='Done'
+        )
+        Notification.objects.create(
+            user=self.admin, feedback=self.feedback, notification_type='feedback_comment', message='Hi'
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            broadcaster.poll()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(self.event_ids(next(frames)), [notification.id])
+
+        response.close()
+        self.assertNotIn(self.student.pk, broadcaster.subscribers)
+
+    def test_later_subscriber_gets_no_old_rows_as_live(self, start):
+        other = broadcaster.subscribe(self.admin.pk)
+        self.addCleanup(broadcaster.unsubscribe, self.admin.pk, other)
+        Notification.objects.create(
+            user=self.student, feedback=self.feedback, notification_type='feedback_comment', message='Old'
+        )
+        broadcaster.poll()
+
+        subscription = broadcaster.subscribe(self.student.pk)
+        self.addCleanup(broadcaster.unsubscribe, self.student.pk, subscription)
+        broadcaster.poll()
+        self.assertTrue(subscription.empty())
+
+        new = Notification.objects.create(
+            user=self.student, feedback=self.feedback, notification_type='feedback_comment', message='New'
+        )
+        broadcaster.poll()
+        self.assertEqual(subscription.get_nowait()['id'], new.id)
+        self.assertTrue(subscription.empty())
+
+    @mock.patch('feedback.events.MAX_STREAM_SECONDS', 0)
+    def test_event_source_authenticates_with_a_single_use_ticket(self, start):
+        ticket = self.client.post('/api/notifications/stream-ticket/').data['ticket']
+        client = APIClient()
+        self.assertIn(
+            client.get('/api/notifications/stream/').status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+        )
+        token = Token.objects.create(user=self.student)
+        self.assertIn(
+            client.get(f'/api/notifications/stream/?token={token.key}').status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+        )
+        response = client.get(f'/api/notifications/stream/?ticket={ticket}', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        b''.join(response.streaming_content)
+        # Another worker process shares no cache with this one, only the database
+        cache.clear()
+        response = client.get(f'/api/notifications/stream/?ticket={ticket}', HTTP_ACCEPT='text/event-stream')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertTrue(UsedStreamTicket.objects.exists())
+
+    def test_expired_ticket_is_rejected(self, start):
+        ticket = self.client.post('/api/notifications/stream-ticket/').data['ticket']
+        with mock.patch('feedback.events.STREAM_TICKET_SECONDS', -1):
+            response = APIClient().get(f'/api/notifications/stream/?ticket={ticket}', HTTP_ACCEPT='text/event-stream')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    @override_settings(NOTIFICATION_STREAM_LIMIT=1)
+    def test_streams_beyond_the_limit_are_refused(self, start):
+        other = broadcaster.subscribe(self.admin.pk)
+        self.addCleanup(broadcaster.unsubscribe, self.admin.pk, other)
+        response = self.client.get('/api/notifications/stream/', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+
+
+@override_settings(IMAGE_RENDITIONS_ASYNC=False, NOTIFICATIONS_ASYNC=False)
+class ImageRenditionTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_media_root(IMAGE_RENDITIONS_ASYNC=False)
+        self.client.force_authenticate(user=self.student)
+
+    def photo(self):
+        # A landscape camera photo stored sideways, with GPS-style metadata
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display
+        exif[0x010F] = 'PhoneMaker'
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 1200), (200, 30, 30)).save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('board.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_generates_small_exif_free_renditions_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/feedbacks/', {
+                'title': 'Whiteboard', 'description': 'Cracked', 'category': Feedback.INFRASTRUCTURE,
+                'photo': self.photo(),
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        name = Feedback.objects.get().photo.name
+        self.assertFalse(default_storage.exists(rendition_name(name, 'thumbnail')))
+        # Until they exist, renditions point at the original
+        self.assertEqual(response.data['photo_renditions']['thumbnail'], response.data['photo'])
+
+        for callback in callbacks:
+            callback()
+        with default_storage.open(rendition_name(name, 'thumbnail')) as file, Image.open(file) as thumbnail:
+            # Orientation applied before scaling, then dropped with the rest of the EXIF
+            self.assertEqual(thumbnail.size, (150, 200))
+            self.assertEqual(len(thumbnail.getexif()), 0)
+        with default_storage.open(rendition_name(name, 'medium')) as file, Image.open(file) as medium:
+            self.assertEqual(medium.size, (600, 800))
+        self.assertLess(default_storage.size(rendition_name(name, 'thumbnail')), 10 * 1024)
+
+        response = self.client.get(f"/api/feedbacks/{response.data['id']}/")
+        self.assertTrue(response.data['photo_renditions']['thumbnail'].endswith('.thumbnail.jpg'))
+        self.assertTrue(response.data['photo_renditions']['medium'].startswith('http://testserver/'))
+
+    def test_failed_renditions_keep_pointing_at_the_original(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback = Feedback.objects.create(
+                title='Broken', student=self.student, photo=SimpleUploadedFile('broken.png', b'not an image')
+            )
+        self.assertFalse(StoredContent.objects.get().renditions_ready)
+        response = self.client.get('/api/feedbacks/?fields=photo,photo_renditions')
+        row = response.data['results'][0]
+        self.assertEqual(row['photo_renditions'], {'thumbnail': row['photo'], 'medium': row['photo']})
+        self.assertTrue(feedback.photo.name)
+
+    def test_list_renditions_load_only_the_photo_column(self):
+        Feedback.objects.create(title='No photo', student=self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/feedbacks/?fields=title,photo_renditions')
+        row = response.data['results'][0]
+        self.assertEqual(row, {'id': row['id'], 'title': 'No photo', 'photo_renditions': None})
+        select = [q['sql'] for q in ctx.captured_queries if 'ORDER BY' in q['sql']][0]
+        self.assertIn('"feedback_feedback"."photo"', select)
+        self.assertNotIn('"feedback_feedback"."description"', select)
+
+
+class StreamingUploadTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_media_root(IMAGE_RENDITIONS_ASYNC=False)
+        self.client.force_authenticate(user=self.student)
+        buffer = BytesIO()
+        # Noise compresses badly, so the file spans several chunks
+        Image.effect_noise((64, 64), 100).save(buffer, 'PNG')
+        self.png = buffer.getvalue()
+
+    def handler(self, name='photo.png'):
+        handler = StreamingUploadHandler()
+        handler.new_file('photo', name, 'image/png', None)
+        return handler
+
+    def post(self, name, content):
+        return self.client.post('/api/feedbacks/', {
+            'title': 'Upload', 'description': 'x', 'category': Feedback.ACADEMIC,
+            'photo': SimpleUploadedFile(name, content),
+        }, format='multipart')
+
+    def test_chunks_are_spooled_to_disk_and_hashed(self):
+        handler = self.handler()
+        for start in range(0, len(self.png), 16):
+            self.assertIsNone(handler.receive_data_chunk(self.png[start:start + 16], start))
+        upload = handler.file_complete(len(self.png))
+        self.assertTrue(os.path.exists(upload.temporary_file_path()))
+        self.assertEqual(upload.content_hash, hashlib.sha256(self.png).hexdigest())
+        self.assertEqual(upload.read(), self.png)
+        upload.close()
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload_is_rejected_mid_stream(self):
+        handler = self.handler()
+        handler.receive_data_chunk(self.png[:64], 0)
+        path = handler.file.temporary_file_path()
+        with self.assertRaises(UploadRejected):
+            handler.receive_data_chunk(self.png[64:128], 64)
+        self.assertFalse(os.path.exists(path))
+
+        response = self.post('photo.png', self.png)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('too large', str(response.data))
+        self.assertFalse(Feedback.objects.exists())
+
+    def test_wrong_magic_bytes_are_rejected_on_first_chunk(self):
+        handler = self.handler('notes.jpg')
+        with self.assertRaises(UploadRejected):
+            handler.receive_data_chunk(b'<?php echo "hi"; ?>', 0)
+
+        response = self.post('notes.jpg', b'%PDF-1.7 not an image at all')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Feedback.objects.exists())
+
+    def test_valid_upload_is_saved(self):
+        response = self.post('photo.png', self.png)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with Feedback.objects.get().photo.open('rb') as photo:
+            self.assertEqual(photo.read(), self.png)
+
+    def test_html_submit_streams_uploads(self):
+        self.client.force_login(self.student)
+        response = self.client.post('/submit/', {
+            'title': 'Upload', 'description': 'x', 'category': Feedback.ACADEMIC,
+            'photo': SimpleUploadedFile('notes.jpg', b'%PDF-1.7 not an image at all'),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Feedback.objects.exists())
+
+    def test_other_requests_keep_the_default_handlers(self):
+        request = RequestFactory().post('/', {'file': SimpleUploadedFile('notes.pdf', b'%PDF-1.7')})
+        self.assertFalse(any(isinstance(handler, StreamingUploadHandler) for handler in request.upload_handlers))
+
+
+@override_settings(IMAGE_RENDITIONS_ASYNC=False, NOTIFICATIONS_ASYNC=False)
+class ContentAddressedStorageTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = self.use_media_root()
+        buffer = BytesIO()
+        Image.new('RGB', (32, 32), (10, 120, 200)).save(buffer, 'PNG')
+        self.png = buffer.getvalue()
+        self.digest = hashlib.sha256(self.png).hexdigest()
+
+    def create(self, content=None, name='screenshot.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Feedback.objects.create(
+                title='Screenshot', student=self.student, photo=SimpleUploadedFile(name, content or self.png)
+            )
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_duplicates_are_stored_once_in_sharded_directories(self):
+        first = self.create()
+        second = self.create(name='same-again.PNG')
+        expected = f'content/{self.digest[:2]}/{self.digest[2:4]}/{self.digest}.png'
+        self.assertEqual(first.photo.name, expected)
+        self.assertEqual(second.photo.name, expected)
+        self.assertEqual(StoredContent.objects.get().ref_count, 2)
+        self.assertEqual(self.files(), sorted([
+            expected, rendition_name(expected, 'medium'), rendition_name(expected, 'thumbnail')
+        ]))
+
+    def test_file_is_deleted_with_its_last_reference(self):
+        first = self.create()
+        second = self.create()
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(StoredContent.objects.get().ref_count, 1)
+        self.assertTrue(content_storage.exists(second.photo.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(StoredContent.objects.exists())
+        self.assertEqual(self.files(), [])
+
+    def test_replacing_an_upload_releases_the_old_file(self):
+        feedback = self.create()
+        old_name = feedback.photo.name
+        buffer = BytesIO()
+        Image.new('RGB', (32, 32), (0, 0, 0)).save(buffer, 'PNG')
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.photo = SimpleUploadedFile('new.png', buffer.getvalue())
+            feedback.save()
+        self.assertFalse(content_storage.exists(old_name))
+        self.assertEqual(list(StoredContent.objects.values_list('name', flat=True)), [feedback.photo.name])
+
+    def test_clearing_an_image_releases_it(self):
+        feedback = Feedback.objects.get(pk=self.create().pk)
+        name = feedback.photo.name
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.photo = None
+            feedback.save()
+        self.assertFalse(StoredContent.objects.exists())
+        self.assertFalse(content_storage.exists(name))
+
+    def test_references_roll_back_with_the_save(self):
+        feedback = self.create()
+        name = feedback.photo.name
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                feedback.photo = None
+                feedback.save()
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(StoredContent.objects.get().ref_count, 1)
+        self.assertTrue(content_storage.exists(name))
+
+    def test_content_taken_again_before_purge_is_kept(self):
+        first = self.create()
+        with self.captureOnCommitCallbacks() as callbacks:
+            first.delete()
+        self.assertEqual(StoredContent.objects.get().ref_count, 0)
+        second = self.create()
+        for callback in callbacks:
+            callback()
+        self.assertEqual(StoredContent.objects.get().ref_count, 1)
+        self.assertTrue(content_storage.exists(second.photo.name))
+
+    def test_failed_insert_drops_its_reference(self):
+        feedback = Feedback.objects.create(title='Screenshot', student=self.student)
+        with mock.patch.object(FeedbackResponse, '_do_insert', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                FeedbackResponse.objects.create(
+                    feedback=feedback, responder=self.admin, content='See attached',
+                    attachment=SimpleUploadedFile('attached.png', self.png)
+                )
+        self.assertFalse(StoredContent.objects.filter(pk=self.digest).exists())
+
+    def test_legacy_uploads_are_moved_and_merged(self):
+        names = [default_storage.save(f'feedback_photos/old{i}.png', BytesIO(self.png)) for i in range(2)]
+        for name in names:
+            Feedback.objects.filter(pk=self.create().pk).update(photo=name)
+        # The two create() calls above left one stored file with two references
+        StoredContent.objects.update(ref_count=0)
+
+        call_command('store_uploads_by_content', stdout=StringIO())
+        stored = {feedback.photo.name for feedback in Feedback.objects.all()}
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(StoredContent.objects.get().ref_count, 2)
+        self.assertFalse([name for name in self.files() if name.startswith('feedback_photos/')])
+
+
+class FeedbackExportTests(FeedbackTestCase):
+    def setUp(self):
+        super().setUp()
+        other_admin = create_admin('admin2@example.com')
+        self.feedbacks = [
+            Feedback.objects.create(
+                title=f'Issue {i}', description='Line one\nline "two"',
+                student=self.student, assigned_admin=self.admin
+            )
+            for i in range(3)
+        ]
+        Feedback.objects.create(title='Not mine', student=self.student, assigned_admin=other_admin)
+        first = self.feedbacks[0]
+        FeedbackResponse.objects.create(feedback=first, responder=self.admin, content='On it', is_internal=True)
+        FeedbackComment.objects.create(feedback=first, user=self.student, comment='Thanks')
+        change_status(Feedback.objects.filter(pk=first.pk), Feedback.RESOLVED, self.admin, notes='Fixed')
+        self.client.force_authenticate(user=self.admin)
+
+    def read_csv(self, content):
+        return list(csv.DictReader(StringIO(content.decode('utf-8'))))
+
+    def test_csv_flattens_related_rows_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/feedbacks/export/')
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('feedback-export.csv', response['Content-Disposition'])
+        # The feedback, then one query each for responses, comments and history
+        self.assertEqual(len(queries), 4)
+
+        rows = self.read_csv(content)
+        self.assertEqual(
+            [(row['record'], row['feedback_id']) for row in rows],
+            [('feedback', str(self.feedbacks[0].id)), ('response', str(self.feedbacks[0].id)),
+             ('comment', str(self.feedbacks[0].id)), ('history', str(self.feedbacks[0].id)),
+             ('feedback', str(self.feedbacks[1].id)), ('feedback', str(self.feedbacks[2].id))]
+        )
+        self.assertEqual(rows[0]['content'], 'Line one\nline "two"')
+        self.assertEqual(rows[0]['student'], 'student@example.com')
+        self.assertEqual(rows[1]['is_internal'], 'True')
+        self.assertEqual(rows[3]['new_status'], Feedback.RESOLVED)
+        self.assertEqual(rows[3]['notes'], 'Fixed')
+
+    def test_csv_escapes_formulas_but_ndjson_does_not(self):
+        Feedback.objects.filter(pk=self.feedbacks[1].pk).update(
+            title='=HYPERLINK("http://example.com")', description='@SUM(A1)'
+        )
+        rows = self.read_csv(b''.join(self.client.get('/api/feedbacks/export/').streaming_content))
+        row = next(row for row in rows if row['id'] == str(self.feedbacks[1].id))
+        self.assertEqual(row['title'], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row['content'], "'@SUM(A1)")
+        self.assertEqual(row['status'], Feedback.PENDING)
+
+        response = self.client.get('/api/feedbacks/export/', {'output': 'ndjson'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        record = next(record for record in records if record['id'] == self.feedbacks[1].id)
+        self.assertEqual(record['title'], '=HYPERLINK("http://example.com")')
+
+    def test_filtered_gzipped_ndjson(self):
+        response = self.client.get('/api/feedbacks/export/', {
+            'output': 'ndjson', 'gzip': 'true', 'status': Feedback.PENDING
+        })
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [self.feedbacks[1].id, self.feedbacks[2].id]
+        )
+        self.assertIsNone(records[0]['resolved_at'])
+
+    def test_export_is_admin_only_and_validated(self):
+        response = self.client.get('/api/feedbacks/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/feedbacks/export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_exports_all_feedback_in_chunks(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'export.csv.gz')
+        with CaptureQueriesContext(connection) as queries:
+            call_command('export_feedback', '--gzip', '--file', path, '--chunk-size', '2', stdout=StringIO())
+        with open(path, 'rb') as exported:
+            rows = self.read_csv(gzip.decompress(exported.read()))
+        self.assertEqual(len([row for row in rows if row['record'] == 'feedback']), 4)
+        # One streamed feedback query; two chunks, each with three related queries
+        self.assertEqual(len(queries), 7)
+
+        with self.assertRaises(CommandError):
+            call_command('export_feedback', '--status', 'lost', stdout=StringIO())
+
+    def test_command_writes_through_its_stdout(self):
+        out = StringIO()
+        call_command('export_feedback', '--format', 'ndjson', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len([record for record in records if record['record'] == 'feedback']), 4)
+
+        with self.assertRaises(CommandError):
+            call_command('export_feedback', '--gzip', stdout=StringIO())
+
+        binary = BytesIO()
+        stdout = TextIOWrapper(binary, write_through=True)
+        call_command('export_feedback', '--gzip', stdout=stdout)
+        rows = self.read_csv(gzip.decompress(binary.getvalue()))
+        self.assertEqual(len([row for row in rows if row['record'] == 'feedback']), 4)
+
+
+class SyntheticDataTests(TestCase):
+    options = dict(seed=7, students=40, admins=5, feedback=300, days=200, batch_size=120)
+
+    def generate(self, **options):
+        return SyntheticDataGenerator(**{**self.options, **options}).run()
+
+    def fingerprint(self, seed=7):
+        domain = email_domain(seed)
+        return list(
+            Feedback.objects.filter(student__email__endswith=domain).order_by('id').values_list(
+                'title', 'category', 'status', 'created_at', 'resolved_at', 'student__email', 'assigned_admin__email'
+            )
+        ) + list(
+            Notification.objects.filter(user__email__endswith=domain).order_by('id').values_list('user__email', 'notification_type', 'is_read', 'created_at')
+        )
+
+    def test_same_seed_gives_the_same_data(self):
+        self.generate()
+        first = self.fingerprint()
+        Feedback.objects.all().delete()
+        User.objects.filter(email__endswith=email_domain(7)).delete()
+        self.generate()
+        self.assertEqual(self.fingerprint(), first)
+        self.generate(seed=8)
+        self.assertNotEqual(self.fingerprint(seed=8), first)
+
+    def test_dataset_is_skewed_and_consistent(self):
+        written = self.generate()
+        self.assertEqual(written['Feedback'], 300)
+        self.assertEqual(written['User'], 45)
+        self.assertEqual(FeedbackHistory.objects.count(), Feedback.objects.filter(status=Feedback.RESOLVED).count())
+        self.assertTrue(FeedbackResponse.objects.exists())
+        self.assertTrue(Notification.objects.filter(is_read=False).exists())
+
+        # Ids follow submission time, and timestamps were not replaced by now()
+        created = list(Feedback.objects.order_by('id').values_list('created_at', flat=True))
+        self.assertEqual(created, sorted(created))
+        self.assertLessEqual(created[-1].year, 2025)
+        # The busiest admin handles far more than an even share
+        busiest = AdminLoad.objects.order_by('-open_count').first()
+        per_admin = Feedback.objects.filter(assigned_admin=busiest.admin).count()
+        self.assertGreater(per_admin, 300 / 5)
+
+        self.assertEqual(verify_counters(), {})
+        self.assertEqual(AdminLoad.objects.filter(is_active=True).count(), 5)
+        self.assertTrue(FeedbackTrendRollup.objects.exists())
+
+        user = User.objects.filter(email__endswith=email_domain(7)).first()
+        self.assertTrue(user.check_password('synthetic-password'))
+
+    def test_timestamp_flags_are_only_off_during_inserts(self):
+        created_at = Feedback._meta.get_field('created_at')
+        generator = SyntheticDataGenerator(**self.options)
+
+        def fail(batch):
+            self.assertTrue(created_at.auto_now_add)
+            raise RuntimeError('interrupted')
+        with mock.patch.object(generator, 'create_activity', side_effect=fail):
+            with self.assertRaises(RuntimeError):
+                generator.run()
+        self.assertTrue(created_at.auto_now_add)
+        self.assertTrue(Feedback._meta.get_field('updated_at').auto_now)
+        feedback = Feedback.objects.create(title='Later', student=User.objects.filter(user_type='student').first())
+        self.assertIsNotNone(feedback.created_at)
+
+    def test_command_refuses_a_seed_already_generated(self):
+        call_command('generate_synthetic_data', '--seed', '3', '--students', '5', '--admins', '2',
+                     '--feedback', '20', stdout=StringIO())
+        self.assertEqual(Feedback.objects.count(), 20)
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', '--seed', '3', stdout=StringIO())
+
+    def test_setup_initial_data_creates_valid_feedback(self):
+        call_command('setup_initial_data', stdout=StringIO())
+        self.assertEqual(
+            sorted(Feedback.objects.values_list('category', 'student__email', 'assigned_admin__email')),
+            [(Feedback.ACADEMIC, 'student@example.com', 'admin@example.com'),
+             (Feedback.INFRASTRUCTURE, 'student@example.com', 'admin@example.com')]
+        )
@@ -7,8 +7,13 @@ from django.http import HttpResponseForbidden
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
-from .models import Feedback, FeedbackCategory, FeedbackComment
+from .models import Feedback, FeedbackCategory, FeedbackComment, FeedbackStatusCounter
 from .forms import FeedbackForm, CommentForm, FeedbackCommentForm
+from .search import search_feedback, attach_snippets
+from .counters import status_counts
+from .assignment import assign_admin
+from .bulk import change_status
+from college_feedback_system.utils.uploads import streaming_uploads
 
 User = get_user_model()
 
@@ -23,16 +28,12 @@ def dashboard(request):
     
     # For students, show only their own feedbacks
     if user.user_type == 'student':
-        feedbacks = Feedback.objects.filter(submitter=user)
-        pending_count = feedbacks.filter(status='pending').count()
-        in_progress_count = feedbacks.filter(status='in_progress').count()
-        resolved_count = feedbacks.filter(status='resolved').count()
+        feedbacks = Feedback.objects.filter(student=user)
+        counts = status_counts(user, FeedbackStatusCounter.ROLE_STUDENT)
     # For admins, show all feedbacks or those of their department
     else:
         feedbacks = Feedback.objects.all()
-        pending_count = feedbacks.filter(status='pending').count()
-        in_progress_count = feedbacks.filter(status='in_progress').count()
-        resolved_count = feedbacks.filter(status='resolved').count()
+        counts = status_counts(None, FeedbackStatusCounter.ROLE_ALL)
     
     # Paginate feedbacks
     paginator = Paginator(feedbacks, 10)
@@ -41,9 +42,9 @@ def dashboard(request):
     
     context = {
         'feedbacks': page_obj,
-        'pending_count': pending_count,
-        'in_progress_count': in_progress_count,
-        'resolved_count': resolved_count,
+        'pending_count': counts['pending'],
+        'in_progress_count': counts['in_progress'],
+        'resolved_count': counts['resolved'],
     }
     
     return render(request, 'feedback/dashboard.html', context)
@@ -68,15 +69,14 @@ def feedback_list(request):
     if category_filter:
         feedbacks = feedbacks.filter(category__name=category_filter)
     if search_query:
-        feedbacks = feedbacks.filter(
-            Q(title__icontains=search_query) | 
-            Q(content__icontains=search_query)
-        )
+        feedbacks = search_feedback(feedbacks, search_query)
     
     # Paginate feedbacks
     paginator = Paginator(feedbacks, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if search_query:
+        page_obj.object_list = attach_snippets(page_obj.object_list, search_query)
     
     # Get categories for filter dropdown
     categories = FeedbackCategory.objects.all()
@@ -126,6 +126,7 @@ def feedback_detail(request, feedback_id):
     
     return render(request, 'feedback/feedback_detail.html', context)
 
+@streaming_uploads
 @login_required
 def feedback_create(request):
     """View for creating a new feedback"""
@@ -158,8 +159,7 @@ def feedback_update_status(request, feedback_id):
     if request.method == 'POST':
         new_status = request.POST.get('status')
         if new_status in [s[0] for s in Feedback.STATUS_CHOICES]:
-            feedback.status = new_status
-            feedback.save()
+            change_status(Feedback.objects.filter(pk=feedback.pk), new_status, request.user)
             messages.success(request, f"Feedback status updated to {new_status}.")
         else:
             messages.error(request, "Invalid status provided.")
@@ -174,6 +174,7 @@ def list_feedbacks(request):
     View for listing all feedbacks
     """
     user = request.user
+    search_query = request.GET.get('search', '').strip()
     
     # Filter feedbacks based on user type
     if user.is_student():
@@ -183,15 +184,23 @@ def list_feedbacks(request):
         # Admins can see the feedbacks assigned to them
         feedbacks = Feedback.objects.filter(assigned_admin=user).order_by('-created_at')
     
+    # Ranked full-text search, best matches first
+    if search_query:
+        feedbacks = search_feedback(feedbacks, search_query)
+    
     # Pagination
     paginator = Paginator(feedbacks, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if search_query:
+        page_obj.object_list = attach_snippets(page_obj.object_list, search_query)
     
     return render(request, 'feedback/list_feedbacks.html', {
         'feedbacks': page_obj,
+        'search_query': search_query,
     })
 
+@streaming_uploads
 @login_required
 def submit_feedback(request):
     """
@@ -211,15 +220,8 @@ def submit_feedback(request):
             # Set the student
             feedback.student = request.user
             
-            # Find an admin to assign based on category
-            User = get_user_model()
-            
-            # Assign to any admin for now
-            admin = User.objects.filter(user_type='admin').first()
-            feedback.assigned_admin = admin
-            
-            # Save the feedback
-            feedback.save()
+            # Hand it to the least-loaded admin and save
+            assign_admin(feedback)
             
             messages.success(request, "Your feedback has been submitted successfully!")
             return redirect('view_feedback', feedback_id=feedback.id)
@@ -280,10 +282,8 @@ def resolve_feedback(request, feedback_id):
         messages.error(request, "You don't have permission to resolve this feedback.")
         return redirect('view_feedback', feedback_id=feedback.id)
     
-    # Mark the feedback as resolved
-    feedback.status = Feedback.RESOLVED
-    feedback.resolved_at = timezone.now()
-    feedback.save()
+    # Mark the feedback as resolved, recording the change in the feedback history
+    change_status(Feedback.objects.filter(pk=feedback.pk), Feedback.RESOLVED, request.user)
     
     messages.success(request, "Feedback has been marked as resolved.")
     return redirect('view_feedback', feedback_id=feedback.id)
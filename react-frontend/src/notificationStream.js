@@ -0,0 +1,63 @@
+import axios from 'axios';
+
+const API = 'http://localhost:8000/api/notifications';
+const RECONNECT_MS = 3000;
+
+// Opens the notification event stream and keeps it open. EventSource can't
+// send an Authorization header, so each connection uses a fresh single-use
+// ticket instead, and resumes after the last event it saw. Returns a
+// function that closes the stream.
+const openNotificationStream = (token, types, onEvent) => {
+  let source = null;
+  let timer = null;
+  let lastEventId = null;
+  let closed = false;
+
+  const connect = async () => {
+    try {
+      const response = await axios.post(`${API}/stream-ticket/`, {}, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (closed) {
+        return;
+      }
+      const params = new URLSearchParams({ ticket: response.data.ticket });
+      if (lastEventId) {
+        params.set('last_event_id', lastEventId);
+      }
+      source = new EventSource(`${API}/stream/?${params}`);
+      const handle = event => {
+        if (event.lastEventId) {
+          lastEventId = event.lastEventId;
+        }
+        onEvent(event);
+      };
+      [...types, 'resync'].forEach(type => source.addEventListener(type, handle));
+      // The ticket is spent, so reconnect with a new one instead of letting
+      // EventSource retry the same URL
+      source.onerror = () => {
+        source.close();
+        reconnect();
+      };
+    } catch (err) {
+      reconnect();
+    }
+  };
+
+  const reconnect = () => {
+    if (!closed) {
+      timer = setTimeout(connect, RECONNECT_MS);
+    }
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    if (source) {
+      source.close();
+    }
+  };
+};
+
+export default openNotificationStream;
@@ -1,11 +1,14 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import openNotificationStream from '../notificationStream';
 
 const AdminDashboard = () => {
   const [feedbacks, setFeedbacks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  // Bumped by live events to refetch the list
+  const [refreshKey, setRefreshKey] = useState(0);
   const navigate = useNavigate();
   
   // Get user from localStorage
@@ -22,11 +25,13 @@ const AdminDashboard = () => {
     const fetchFeedbacks = async () => {
       try {
         const response = await axios.get('http://localhost:8000/api/feedbacks/admin/', {
+          // Only the columns this table renders
+          params: { fields: 'title,category,description,student_name,status,created_at,resolved_at' },
           headers: {
             'Authorization': `Bearer ${user.token}`
           }
         });
-        setFeedbacks(response.data);
+        setFeedbacks(response.data.results);
         setLoading(false);
       } catch (err) {
         setError('Failed to load feedbacks. Please try again later.');
@@ -40,7 +45,16 @@ const AdminDashboard = () => {
     };
     
     fetchFeedbacks();
-  }, [navigate, user]);
+  }, [navigate, user, refreshKey]);
+  
+  useEffect(() => {
+    if (!user.token) {
+      return undefined;
+    }
+    // Server-Sent Events replace polling
+    const refresh = () => setRefreshKey(key => key + 1);
+    return openNotificationStream(user.token, ['feedback_created', 'feedback_assigned', 'feedback_comment'], refresh);
+  }, [user.token]);
   
   const handleResolveFeedback = async (feedbackId) => {
     try {
@@ -1,11 +1,14 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import openNotificationStream from '../notificationStream';
 
 const StudentDashboard = () => {
   const [feedbacks, setFeedbacks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  // Bumped by live events to refetch the list
+  const [refreshKey, setRefreshKey] = useState(0);
   const navigate = useNavigate();
   
   // Get user from localStorage
@@ -22,11 +25,13 @@ const StudentDashboard = () => {
     const fetchFeedbacks = async () => {
       try {
         const response = await axios.get('http://localhost:8000/api/feedbacks/student/', {
+          // Only the columns this table renders
+          params: { fields: 'title,category,description,photo,photo_renditions,status,created_at' },
           headers: {
             'Authorization': `Bearer ${user.token}`
           }
         });
-        setFeedbacks(response.data);
+        setFeedbacks(response.data.results);
         setLoading(false);
       } catch (err) {
         setError('Failed to load feedbacks. Please try again later.');
@@ -40,7 +45,16 @@ const StudentDashboard = () => {
     };
     
     fetchFeedbacks();
-  }, [navigate, user]);
+  }, [navigate, user, refreshKey]);
+  
+  useEffect(() => {
+    if (!user.token) {
+      return undefined;
+    }
+    // Server-Sent Events replace polling
+    const refresh = () => setRefreshKey(key => key + 1);
+    return openNotificationStream(user.token, ['feedback_status_changed', 'feedback_comment'], refresh);
+  }, [user.token]);
   
   const handleLogout = () => {
     localStorage.removeItem('user');
@@ -118,12 +132,16 @@ const StudentDashboard = () => {
                         </p>
                         {feedback.photo && (
                           <div className="mt-2">
-                            <img 
-                              src={`http://localhost:8000${feedback.photo}`} 
-                              alt="Feedback attachment" 
-                              className="img-thumbnail" 
-                              style={{ maxHeight: '150px' }} 
-                            />
+                            {/* The list shows the small thumbnail; the original opens on click */}
+                            <a href={feedback.photo} target="_blank" rel="noreferrer">
+                              <img 
+                                src={feedback.photo_renditions.thumbnail} 
+                                alt="Feedback attachment" 
+                                className="img-thumbnail" 
+                                style={{ maxHeight: '150px' }} 
+                                loading="lazy"
+                              />
+                            </a>
                           </div>
                         )}
                       </div>